@@ -1,3 +1,67 @@
 """Entry point for the pypmi package."""
-from . import _version
-__version__ = _version.get_versions()['version']
+
+# public functions are exposed lazily from their submodules so that importing
+# pypmi does not pull in `requests`, `sqlite3`, etc. until they are needed
+_SUBMODULES = ('catalog', 'datasets', 'fetchers', 'manifest', 'memo',
+               'readers', 'schema', 'utils')
+_EXPORTS = {
+    'fetchable_studydata': 'fetchers',
+    'fetchable_genetics': 'fetchers',
+    'fetch_studydata': 'fetchers',
+    'fetch_genetics': 'fetchers',
+    'refresh_catalog': 'fetchers',
+    'refresh_metadata': 'fetchers',
+    'search_datasets': 'catalog',
+    'describe_datasets': 'catalog',
+    'snapshot_catalog': 'catalog',
+    'list_snapshots': 'catalog',
+    'load_snapshot': 'catalog',
+    'diff_catalog': 'catalog',
+    'list_local': 'manifest',
+    'latest_local': 'manifest',
+    'rescan': 'manifest',
+    'clear_memo': 'memo',
+    'compile_schema': 'schema',
+    'get_schema': 'schema',
+    'decode': 'schema',
+    'find_variables': 'schema',
+    'load_behavior': 'datasets',
+    'load_demographics': 'datasets',
+    'align_visits': 'datasets',
+    'load_variables': 'datasets',
+    'read_studydata': 'readers',
+    'query': 'readers',
+    'iter_freeze': 'readers',
+    'load_all_studydata': 'readers',
+    'build_store': 'readers',
+    'read_arrow': 'readers',
+    'pack_studydata': 'readers',
+    'list_packed': 'readers',
+    'read_packed': 'readers',
+    'build_participant_index': 'readers',
+    'get_participant': 'readers',
+}
+
+__all__ = [*_SUBMODULES, *_EXPORTS]
+
+
+def __getattr__(name):
+    # resolving the version from a source checkout spawns `git` subprocesses,
+    # so it is deferred until first requested and then stored on the module
+    if name == '__version__':
+        from ._version import get_versions
+        version = globals()['__version__'] = get_versions()['version']
+        return version
+    if name in _SUBMODULES or name in _EXPORTS:
+        import importlib
+        module = importlib.import_module('.' + _EXPORTS.get(name, name),
+                                         __name__)
+        attr = module if name in _SUBMODULES else getattr(module, name)
+        globals()[name] = attr
+        return attr
+    raise AttributeError('module {!r} has no attribute {!r}'
+                         .format(__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | {'__version__'})
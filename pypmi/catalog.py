@@ -0,0 +1,909 @@
+# -*- coding: utf-8 -*-
+"""Functions for working with the catalog of datasets available from the PPMI."""
+
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime
+import functools
+from html.parser import HTMLParser
+import importlib.resources
+import json
+import os
+from pathlib import Path
+import re
+from types import MappingProxyType
+from typing import Dict, List, Mapping, NamedTuple, Tuple, Union
+
+from .utils import _get_cache_dir, _get_data_dir
+
+CATALOG_TYPES = ('studydata', 'genetics')
+
+_PROJECT_RE = re.compile(
+    r'project(?:\s+id)?\s*:?\s*(\d+(?:\.\d+)?)|(\d+(?:\.\d+)?)\s+project',
+    flags=re.IGNORECASE
+)
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_PART_RE = re.compile(
+    r'(?:[-\s]*set\s*(\d+)\s*of\s*(\d+))|(?:\s*\b(\d+)\s*(?:of|/)\s*(\d+)\b)',
+    flags=re.IGNORECASE
+)
+_CATEGORIES = {
+    'tabular': ('csv', 'tsv', 'xls', 'xlsx', 'h5ad'),
+    'document': ('pdf', 'doc', 'docx', 'rtf'),
+    'archive': ('zip', 'tar', 'tar.gz', 'tgz', 'gz'),
+}
+_METADATA_FIELDS = ('size', 'content_type', 'last_modified')
+_LISTING_ID_RE = {
+    'studydata': re.compile(r'fileid\W{0,3}(\d+)', flags=re.IGNORECASE),
+    'genetics': re.compile(r'(ppmi/[^\s\'"<>]+\.[A-Za-z0-9]+)'),
+}
+_FILENAME_RE = re.compile(
+    r'[^\s\'"<>]+\.(?:csv|pdf|xlsx?|docx?|rtf|zip|tar|tar\.gz|gz|h5ad)\b',
+    flags=re.IGNORECASE
+)
+
+
+class _SearchIndex(NamedTuple):
+    """Inverted token index over the entries of all dataset catalogs."""
+
+    entries: Tuple[Tuple[str, str], ...]
+    postings: Dict[str, Tuple[int, ...]]
+    vocabulary: Tuple[str, ...]
+
+
+class _CatalogIndex(NamedTuple):
+    """Compact, read-only index over the entries of a dataset catalog."""
+
+    names: Tuple[str, ...]
+    ids: Tuple[str, ...]
+    filenames: Tuple[str, ...]
+    positions: Dict[str, int]
+
+
+def _check_type(type: str) -> str:
+    """
+    Confirm that `type` is a valid catalog type.
+
+    Parameters
+    ----------
+    type : str
+        Catalog type
+
+    Returns
+    -------
+    type : str
+        Catalog type
+
+    Raises
+    ------
+    ValueError
+        If `type` is not one of :py:data:`CATALOG_TYPES`
+    """
+    if type not in CATALOG_TYPES:
+        raise ValueError('Invalid catalog type {}. Must be one of {}.'
+                         .format(type, CATALOG_TYPES))
+    return type
+
+
+@functools.lru_cache(maxsize=None)
+def _load_bundled_catalog(type: str) -> Dict[str, Dict[str, str]]:
+    """
+    Load the catalog of `type` datasets distributed with `pypmi`.
+
+    Parameters
+    ----------
+    type : {'studydata', 'genetics'}
+        Catalog to load
+
+    Returns
+    -------
+    catalog : dict
+        Mapping of dataset names to dictionaries with keys 'id' and 'filename'
+    """
+    fname = 'data/{}.json'.format(_check_type(type))
+    if getattr(importlib.resources, 'files', None) is not None:
+        src = importlib.resources.files('pypmi') / fname
+    else:
+        src = Path(__file__).parent / fname
+    with src.open('r', encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def _load_catalog(type: str, path: str = None) -> Mapping[str, Mapping]:
+    """
+    Load the catalog of `type` datasets on first access.
+
+    Entries retrieved with :py:func:`pypmi.fetchers.refresh_catalog` and
+    cached in the PPMI data directory take precedence over the catalog
+    distributed with `pypmi`.
+
+    Parameters
+    ----------
+    type : {'studydata', 'genetics'}
+        Catalog to load
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    catalog : mapping
+        Read-only mapping of dataset names to mappings with keys 'id' and
+        'filename', shared by all callers
+    """
+    # the data directory is resolved first so that it (rather than `path`,
+    # which may be None or relative) determines the cached catalog
+    return _load_catalog_at(_check_type(type), str(_get_data_dir(path)))
+
+
+@functools.lru_cache(maxsize=None)
+def _load_catalog_at(type: str, path: str) -> Mapping[str, Mapping]:
+    """Load read-only catalog of `type` datasets for data directory `path`."""
+    catalog = _load_bundled_catalog(type)
+    refreshed = _load_refreshed(path).get(type, {}).get('entries')
+    if refreshed:
+        catalog = {**catalog, **refreshed}
+    return MappingProxyType({
+        name: MappingProxyType(info) for name, info in catalog.items()
+    })
+
+
+def _load_refreshed(path: str = None) -> Dict[str, Dict]:
+    """
+    Load catalog entries cached by :py:func:`pypmi.fetchers.refresh_catalog`.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    refreshed : dict
+        Mapping of catalog types to dictionaries with keys 'entries' (mapping
+        of dataset names to file information) and 'etag', 'last_modified',
+        and 'sha256' (validators of the listing page the entries were parsed
+        from)
+    """
+    fname = _get_cache_dir(path) / 'catalog.json'
+    if not fname.is_file():
+        return {}
+    with open(fname, 'r', encoding='utf-8') as src:
+        return json.load(src)
+
+
+def _save_refreshed(refreshed: Dict[str, Dict], path: str = None) -> Path:
+    """
+    Save `refreshed` catalog entries to cache of PPMI data directory `path`.
+
+    Parameters
+    ----------
+    refreshed : dict
+        Refreshed catalog entries, as returned by :py:func:`_load_refreshed`
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    fname : pathlib.Path
+        Filepath to saved catalog entries
+    """
+    fname = _get_cache_dir(path) / 'catalog.json'
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    tmp = fname.with_suffix('.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as dest:
+        json.dump(refreshed, dest, indent=1)
+    os.replace(tmp, fname)
+    _clear_caches()
+    return fname
+
+
+def _clear_caches():
+    """Clear loaded catalogs and indices so they are re-built on access."""
+    for func in (_load_catalog_at, _get_index, _get_search_index):
+        func.cache_clear()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_index(type: str) -> _CatalogIndex:
+    """
+    Return compact index over the catalog of `type` datasets.
+
+    Parameters
+    ----------
+    type : {'studydata', 'genetics'}
+        Catalog to index
+
+    Returns
+    -------
+    index : _CatalogIndex
+        Parallel tuples of dataset names, IDs, and filenames, alongside a
+        mapping of dataset names to their position in those tuples
+    """
+    catalog = _load_catalog(type)
+    names = tuple(catalog)
+    return _CatalogIndex(
+        names=names,
+        ids=tuple(catalog[name]['id'] for name in names),
+        filenames=tuple(catalog[name]['filename'] for name in names),
+        positions={name: n for n, name in enumerate(names)}
+    )
+
+
+def _get_project(name: str) -> str:
+    """
+    Return project designation (e.g., '118' or '150.2') in dataset `name`.
+
+    Parameters
+    ----------
+    name : str
+        Name of dataset, as listed in the PPMI database
+
+    Returns
+    -------
+    project : str
+        Project designation, or None if `name` does not reference a project
+    """
+    match = _PROJECT_RE.search(name)
+    if match is None:
+        return None
+    return match.group(1) or match.group(2)
+
+
+def _tokenize(text: str) -> List[str]:
+    """
+    Split `text` into lower-case alphanumeric tokens.
+
+    Parameters
+    ----------
+    text : str
+        Text to tokenize
+
+    Returns
+    -------
+    tokens : list
+        Tokens in `text`
+    """
+    return _TOKEN_RE.findall(text.lower().replace('{datetoken}', ''))
+
+
+@functools.lru_cache(maxsize=None)
+def _get_search_index() -> _SearchIndex:
+    """
+    Return inverted token index over dataset names and filenames.
+
+    Returns
+    -------
+    index : _SearchIndex
+        Catalog entries as (type, name) pairs, mapping of tokens to the
+        positions of entries containing them, and the sorted token vocabulary
+    """
+    entries, postings = [], defaultdict(set)
+    for type in CATALOG_TYPES:
+        index = _get_index(type)
+        for name, filename in zip(index.names, index.filenames):
+            for token in _tokenize(name) + _tokenize(filename):
+                postings[token].add(len(entries))
+            entries.append((type, name))
+    return _SearchIndex(
+        entries=tuple(entries),
+        postings={k: tuple(sorted(v)) for k, v in postings.items()},
+        vocabulary=tuple(sorted(postings))
+    )
+
+
+def _match_token(token: str, index: _SearchIndex) -> Dict[int, float]:
+    """
+    Score entries in `index` against a single query `token`.
+
+    Exact token matches score 1, prefix matches 0.75, and (only if there are
+    no exact or prefix matches) fuzzy matches score up to 0.5 according to
+    their similarity with `token`.
+
+    Parameters
+    ----------
+    token : str
+        Query token
+    index : _SearchIndex
+        Search index
+
+    Returns
+    -------
+    scores : dict
+        Mapping of entry positions to match scores
+    """
+    scores = {}
+    vocab = index.vocabulary
+    for n in range(bisect_left(vocab, token), len(vocab)):
+        if not vocab[n].startswith(token):
+            break
+        weight = 1.0 if vocab[n] == token else 0.75
+        for pos in index.postings[vocab[n]]:
+            scores[pos] = max(scores.get(pos, 0), weight)
+    if scores or len(token) < 3:
+        return scores
+
+    # only consider tokens of similar length and with the same first letter;
+    # this keeps the (relatively slow) similarity computation cheap
+    candidates = [v for v in vocab
+                  if v[0] == token[0] and abs(len(v) - len(token)) <= 2]
+    import difflib
+
+    matcher = difflib.SequenceMatcher(b=token)
+    for candidate in difflib.get_close_matches(token, candidates, n=5,
+                                               cutoff=0.75):
+        matcher.set_seq1(candidate)
+        weight = 0.5 * matcher.ratio()
+        for pos in index.postings[candidate]:
+            scores[pos] = max(scores.get(pos, 0), weight)
+    return scores
+
+
+def search_datasets(query: str,
+                    type: str = None,
+                    extension: str = None,
+                    project: Union[int, str] = None,
+                    limit: int = None) -> List[Dict[str, str]]:
+    """
+    Search the datasets available to download from the PPMI.
+
+    Query terms are matched case-insensitively against the words in dataset
+    names and filenames, allowing for prefix (e.g., 'updrs' matches 'UPDRS')
+    and approximate (e.g., 'epwrth' matches 'Epworth') matches.
+
+    Parameters
+    ----------
+    query : str
+        Search terms
+    type : {'studydata', 'genetics'}, optional
+        Only search datasets of this type. If not specified all datasets are
+        searched. Default: None
+    extension : str, optional
+        Only return datasets whose filename has this extension (e.g., 'csv' or
+        '.tar.gz'). Default: None
+    project : int or str, optional
+        Only return datasets belonging to this project (e.g., 118). Project
+        numbers without a sub-project designation also match sub-projects.
+        Default: None
+    limit : int, optional
+        Maximum number of results to return. Default: None
+
+    Returns
+    -------
+    results : list of dict
+        Matching datasets ordered from most to least relevant, each with keys
+        'name', 'id', 'filename', and 'type'. The 'name' of a dataset can be
+        supplied directly to :py:func:`pypmi.fetch_studydata` or
+        :py:func:`pypmi.fetch_genetics`, as determined by its 'type'.
+
+    See Also
+    --------
+    pypmi.fetchable_studydata, pypmi.fetchable_genetics
+    """
+    if type is not None:
+        _check_type(type)
+    if extension is not None:
+        extension = '.' + extension.lower().lstrip('.')
+    if project is not None:
+        project = str(project)
+
+    index = _get_search_index()
+    scores = defaultdict(float)
+    for token in set(_tokenize(query)):
+        for pos, score in _match_token(token, index).items():
+            scores[pos] += score
+
+    results = []
+    for pos in sorted(scores, key=lambda pos: (-scores[pos], pos)):
+        etype, name = index.entries[pos]
+        if type is not None and etype != type:
+            continue
+        catalog_index = _get_index(etype)
+        n = catalog_index.positions[name]
+        filename = catalog_index.filenames[n]
+        if (extension is not None
+                and not filename.lower().endswith(extension)):
+            continue
+        if project is not None:
+            designation = _get_project(name)
+            if designation is None or project not in (
+                    designation, designation.split('.')[0]):
+                continue
+        results.append(dict(name=name, id=catalog_index.ids[n],
+                            filename=filename, type=etype))
+        if limit is not None and len(results) >= limit:
+            break
+
+    return results
+
+
+def _get_format(filename: str) -> str:
+    """
+    Return file format (i.e., lower-case extension) of `filename`.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of dataset
+
+    Returns
+    -------
+    format : str
+        File format without leading period (e.g., 'csv' or 'tar.gz')
+    """
+    filename = filename.lower()
+    if filename.endswith('.tar.gz'):
+        return 'tar.gz'
+    return Path(filename).suffix.lstrip('.')
+
+
+def _get_category(format: str) -> str:
+    """
+    Return category of datasets with file `format`.
+
+    Parameters
+    ----------
+    format : str
+        File format, as returned by :py:func:`_get_format`
+
+    Returns
+    -------
+    category : {'tabular', 'document', 'archive', 'other'}
+        Category of dataset
+    """
+    for category, formats in _CATEGORIES.items():
+        if format in formats:
+            return category
+    return 'other'
+
+
+def _get_part(name: str) -> Tuple[str, int, int]:
+    """
+    Return multi-part group membership of dataset `name`.
+
+    Parameters
+    ----------
+    name : str
+        Name of dataset (e.g., 'Project 118 WGS Variants - set 12 of 74')
+
+    Returns
+    -------
+    group : str
+        Name of multi-part group with the part designation removed (e.g.,
+        'Project 118 WGS Variants'), or None if `name` is not part of a group
+    part, parts : int
+        Part number of `name` in `group` and total number of parts in `group`,
+        or None if `name` is not part of a group
+    """
+    match = _PART_RE.search(name)
+    if match is None:
+        return None, None, None
+    part, parts = (int(n) for n in match.groups() if n is not None)
+    group = ' '.join((name[:match.start()] + ' ' + name[match.end():]).split())
+    return group, part, parts
+
+
+def _load_metadata(path: str = None) -> Dict[str, Dict[str, list]]:
+    """
+    Load cached file metadata for datasets in PPMI data directory `path`.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    metadata : dict
+        Mapping of catalog types to dictionaries, which map file IDs to lists
+        of [size, content_type, last_modified]
+    """
+    fname = _get_cache_dir(path) / 'metadata.json'
+    if not fname.is_file():
+        return {type: {} for type in CATALOG_TYPES}
+    with open(fname, 'r', encoding='utf-8') as src:
+        metadata = json.load(src)
+    for type in CATALOG_TYPES:
+        metadata.setdefault(type, {})
+    return metadata
+
+
+def _save_metadata(metadata: Dict[str, Dict[str, list]],
+                   path: str = None) -> Path:
+    """
+    Save file `metadata` to cache of PPMI data directory `path`.
+
+    Parameters
+    ----------
+    metadata : dict
+        Metadata, as returned by :py:func:`_load_metadata`
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    fname : pathlib.Path
+        Filepath to saved metadata
+    """
+    fname = _get_cache_dir(path) / 'metadata.json'
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    tmp = fname.with_suffix('.json.tmp')
+    with open(tmp, 'w', encoding='utf-8') as dest:
+        json.dump(metadata, dest, separators=(',', ':'))
+    os.replace(tmp, fname)
+    return fname
+
+
+def describe_datasets(datasets: List[str] = None,
+                      type: str = 'studydata',
+                      path: str = None) -> Dict[str, Dict]:
+    """
+    Describe datasets available to download from the PPMI.
+
+    File format, category, and multi-part group membership are derived from
+    the catalog itself. File size, content type, and last-modified date are
+    only available once they have been retrieved with
+    :py:func:`pypmi.fetchers.refresh_metadata`, and are None otherwise.
+
+    Parameters
+    ----------
+    datasets : list, optional
+        Datasets to describe. If not specified all datasets of `type` are
+        described. Default: None
+    type : {'studydata', 'genetics'}, optional
+        Type of datasets to describe. Default: 'studydata'
+    path : str, optional
+        Filepath to directory containing PPMI data files, in which retrieved
+        file metadata is cached. If not specified will look for an
+        environmental variable $PPMI_PATH and, if not set, use the current
+        directory. Default: None
+
+    Returns
+    -------
+    description : dict
+        Mapping of dataset names to dictionaries with keys 'id', 'filename',
+        'type', 'format', 'category' ('tabular', 'document', 'archive', or
+        'other'), 'group', 'part', 'parts', 'size' (in bytes),
+        'content_type', and 'last_modified'
+
+    See Also
+    --------
+    pypmi.fetchers.refresh_metadata
+    """
+    catalog = _load_catalog(_check_type(type))
+    if isinstance(datasets, str):
+        datasets = [datasets]
+    elif datasets is None:
+        datasets = list(catalog)
+    metadata = _load_metadata(path)[type]
+
+    description = {}
+    for name in datasets:
+        if name not in catalog:
+            raise ValueError('Provided dataset {} not available. Please see '
+                             'fetchable_{}() for valid entries.'
+                             .format(name, type))
+        info = catalog[name]
+        format = _get_format(info['filename'])
+        group, part, parts = _get_part(name)
+        cached = metadata.get(info['id'], [None] * len(_METADATA_FIELDS))
+        description[name] = dict(
+            id=info['id'], filename=info['filename'], type=type,
+            format=format, category=_get_category(format),
+            group=group, part=part, parts=parts,
+            **dict(zip(_METADATA_FIELDS, cached))
+        )
+
+    return description
+
+
+class _ListingParser(HTMLParser):
+    """Collect the text and attribute values of rows in an IDA listing."""
+
+    def __init__(self):
+        super().__init__()
+        self.rows = []
+        self._stack = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'tr':
+            self._stack.append(dict(text=[], attrs=[]))
+        elif self._stack:
+            self._stack[-1]['attrs'].extend(
+                '{}={}'.format(k, v) if v else k for k, v in attrs
+            )
+
+    def handle_endtag(self, tag):
+        if tag == 'tr' and self._stack:
+            self.rows.append(self._stack.pop())
+
+    def handle_data(self, data):
+        if self._stack and data.strip():
+            self._stack[-1]['text'].append(' '.join(data.split()))
+
+
+def _parse_listing(html: str, type: str) -> Dict[str, Dict[str, str]]:
+    """
+    Parse catalog entries from IDA listing page `html`.
+
+    Each table row of the listing that references a downloadable file is
+    parsed into an entry, where the longest text in the row that is not a
+    filename is used as the dataset name. Study data files are identified by
+    their numeric file ID (e.g., ``fileId=2822``) and genetics files by their
+    path (e.g., ``ppmi/ppmi_project118_set01of74.tar``).
+
+    Parameters
+    ----------
+    html : str
+        Contents of the studyData.jsp or geneticData.jsp listing page
+    type : {'studydata', 'genetics'}
+        Type of listing in `html`
+
+    Returns
+    -------
+    entries : dict
+        Mapping of dataset names to dictionaries with keys 'id' and 'filename'
+    """
+    id_re = _LISTING_ID_RE[_check_type(type)]
+    parser = _ListingParser()
+    parser.feed(html)
+    parser.close()
+
+    entries = {}
+    for row in parser.rows:
+        names = [t for t in row['text'] if _FILENAME_RE.fullmatch(t) is None]
+        if not names:
+            continue
+        name = max(names, key=len)
+        file_id = filename = None
+        for value in row['attrs'] + row['text']:
+            if file_id is None:
+                match = id_re.search(value)
+                if match is not None:
+                    file_id = match.group(1)
+            if filename is None:
+                match = _FILENAME_RE.search(value)
+                if match is not None and '/' not in match.group(0):
+                    filename = match.group(0)
+        if file_id is None:
+            continue
+        if type == 'genetics':
+            filename = file_id.rsplit('/', 1)[-1]
+        elif filename is None:
+            filename = re.sub(r'[^A-Za-z0-9\-]', '_', name) + '.csv'
+        entries[name] = dict(id=file_id, filename=filename)
+
+    return entries
+
+
+def _merge_listing(entries: Dict[str, Dict[str, str]],
+                   type: str) -> Dict[str, Dict[str, str]]:
+    """
+    Reconcile parsed listing `entries` with the bundled catalog.
+
+    Filenames of entries that are already in the bundled catalog (with the
+    same file ID) are kept as-is, so that date tokens are preserved; new
+    study data CSVs without a date in their filename are given one.
+
+    Parameters
+    ----------
+    entries : dict
+        Catalog entries, as returned by :py:func:`_parse_listing`
+    type : {'studydata', 'genetics'}
+        Type of catalog
+
+    Returns
+    -------
+    entries : dict
+        Reconciled catalog entries
+    """
+    bundled = _load_bundled_catalog(type)
+    merged = {}
+    for name, info in entries.items():
+        known = bundled.get(name)
+        if known is not None and known['id'] == info['id']:
+            info = dict(known)
+        elif (type == 'studydata' and info['filename'].endswith('.csv')
+                and not re.search(r'\d{8}', info['filename'])):
+            info = dict(info, filename=info['filename'][:-4] + '_{DATETOKEN}.csv')
+        merged[name] = info
+    return merged
+
+
+def snapshot_catalog(tag: str = None, path: str = None) -> Path:
+    """
+    Save a versioned snapshot of the current dataset catalogs.
+
+    Parameters
+    ----------
+    tag : str, optional
+        Version of the snapshot (e.g., the name of a PPMI data freeze). If not
+        specified the current date is used (e.g., '20250101'). Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files, in which snapshots
+        are stored. If not specified will look for an environmental variable
+        $PPMI_PATH and, if not set, use the current directory. Default: None
+
+    Returns
+    -------
+    fname : pathlib.Path
+        Filepath to saved snapshot
+
+    See Also
+    --------
+    pypmi.catalog.diff_catalog
+    """
+    if tag is None:
+        tag = datetime.now().strftime('%Y%m%d')
+    fname = _get_cache_dir(path) / 'snapshots' / '{}.json'.format(tag)
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    snapshot = {
+        type: {name: dict(info) for name, info in _load_catalog(type, path).items()}
+        for type in CATALOG_TYPES
+    }
+    with open(fname, 'w', encoding='utf-8') as dest:
+        json.dump(snapshot, dest, indent=1)
+    return fname
+
+
+def list_snapshots(path: str = None) -> List[str]:
+    """
+    List versioned snapshots of the dataset catalogs.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files, in which snapshots
+        are stored. If not specified will look for an environmental variable
+        $PPMI_PATH and, if not set, use the current directory. Default: None
+
+    Returns
+    -------
+    tags : list
+        Versions of saved snapshots, in sorted order
+
+    See Also
+    --------
+    pypmi.catalog.snapshot_catalog
+    """
+    return sorted(fn.stem for fn in
+                  (_get_cache_dir(path) / 'snapshots').glob('*.json'))
+
+
+def load_snapshot(tag: str, path: str = None) -> Dict[str, Dict]:
+    """
+    Load versioned snapshot `tag` of the dataset catalogs.
+
+    Parameters
+    ----------
+    tag : str
+        Version of the snapshot, as listed by
+        :py:func:`pypmi.catalog.list_snapshots`
+    path : str, optional
+        Filepath to directory containing PPMI data files, in which snapshots
+        are stored. If not specified will look for an environmental variable
+        $PPMI_PATH and, if not set, use the current directory. Default: None
+
+    Returns
+    -------
+    snapshot : dict
+        Mapping of catalog types to catalogs
+
+    Raises
+    ------
+    FileNotFoundError
+        If no snapshot `tag` exists
+    """
+    fname = _get_cache_dir(path) / 'snapshots' / '{}.json'.format(tag)
+    if not fname.is_file():
+        raise FileNotFoundError('No catalog snapshot {} found; available '
+                                'snapshots are {}.'
+                                .format(tag, list_snapshots(path)))
+    with open(fname, 'r', encoding='utf-8') as src:
+        return json.load(src)
+
+
+def _resolve_catalog(catalog: Union[str, Mapping], type: str,
+                     path: str = None) -> Mapping:
+    """
+    Resolve `catalog` into a mapping of dataset names to file information.
+
+    Parameters
+    ----------
+    catalog : str or mapping or None
+        Snapshot tag, catalog mapping (or snapshot mapping of catalog types to
+        catalogs), or None for the current catalog
+    type : {'studydata', 'genetics'}
+        Type of catalog
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    catalog : mapping
+        Mapping of dataset names to file information
+    """
+    if catalog is None:
+        return _load_catalog(type, path)
+    if isinstance(catalog, str):
+        catalog = load_snapshot(catalog, path)
+    if set(catalog) <= set(CATALOG_TYPES) and len(catalog) > 0:
+        catalog = catalog.get(type, {})
+    return catalog
+
+
+def diff_catalog(old: Union[str, Mapping],
+                 new: Union[str, Mapping] = None,
+                 type: str = 'studydata',
+                 path: str = None) -> Dict:
+    """
+    Compare two versions of a dataset catalog.
+
+    Parameters
+    ----------
+    old : str or mapping
+        Tag of a snapshot saved with :py:func:`pypmi.catalog.snapshot_catalog`
+        or a catalog mapping dataset names to file information
+    new : str or mapping, optional
+        As `old`. If not specified the current catalog is used. Default: None
+    type : {'studydata', 'genetics'}, optional
+        Type of catalog to compare when `old` or `new` are snapshots.
+        Default: 'studydata'
+    path : str, optional
+        Filepath to directory containing PPMI data files, in which snapshots
+        are stored. If not specified will look for an environmental variable
+        $PPMI_PATH and, if not set, use the current directory. Default: None
+
+    Returns
+    -------
+    diff : dict
+        With keys 'added', 'removed', and 'modified' (mappings of dataset
+        names to their file information in `new`, or in `old` for removed
+        datasets), 'renamed' (mapping of old to new names for datasets whose
+        file ID did not change), and 'fetch' (list of datasets in `new` that
+        must be (re-)fetched, which can be supplied directly to
+        :py:func:`pypmi.fetch_studydata` or :py:func:`pypmi.fetch_genetics`)
+
+    See Also
+    --------
+    pypmi.catalog.snapshot_catalog
+    """
+    _check_type(type)
+    old = _resolve_catalog(old, type, path)
+    new = _resolve_catalog(new, type, path)
+
+    added = {name: new[name] for name in new if name not in old}
+    removed = {name: old[name] for name in old if name not in new}
+    modified = {name: new[name] for name in new
+                if name in old and old[name] != new[name]}
+
+    # datasets that disappeared under one name but whose file ID re-appeared
+    # under another have been renamed
+    added_ids = {info['id']: name for name, info in added.items()}
+    renamed = {}
+    for name, info in removed.items():
+        new_name = added_ids.get(info['id'])
+        if new_name is not None:
+            renamed[name] = new_name
+    for name, new_name in renamed.items():
+        del removed[name]
+        info = added.pop(new_name)
+        if info['filename'] != old[name]['filename']:
+            modified[new_name] = info
+
+    return dict(
+        added=added,
+        removed=removed,
+        renamed=renamed,
+        modified=modified,
+        fetch=list(added) + list(modified)
+    )
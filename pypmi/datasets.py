@@ -0,0 +1,756 @@
+# -*- coding: utf-8 -*-
+"""Functions for loading tidy data frames from the PPMI study data."""
+
+import warnings
+from typing import TYPE_CHECKING, Callable, Dict, List, NamedTuple, Tuple
+
+from .manifest import latest_local
+from .memo import memoize
+from .readers import read_studydata
+from .schema import _read_headers, _variable_index
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_KEYS = ['PATNO', 'EVENT_ID', 'INFODT']
+
+
+class _Source(NamedTuple):
+    """Study data table (optionally, a subset of its rows) used by measures."""
+
+    dataset: str
+    where: Tuple[str, Tuple[str, ...]] = None
+
+
+class _Measure(NamedTuple):
+    """Items of a clinical-behavioral measure and how they are scored."""
+
+    items: Dict[str, Tuple[str, ...]]
+    score: Callable = None
+
+
+def _items(prefix: str, stop: int, start: int = 1) -> Tuple[str, ...]:
+    """Return numbered item names (e.g., 'ESS1', ..., 'ESS8')."""
+    return tuple('{}{}'.format(prefix, n) for n in range(start, stop + 1))
+
+
+def _sum(data: 'pd.DataFrame') -> 'pd.Series':
+    """Sum items in `data`, requiring that all of them are available."""
+    return data.sum(axis=1, min_count=data.shape[1])
+
+
+def _mean(data: 'pd.DataFrame') -> 'pd.Series':
+    """Average items in `data`, requiring that all of them are available."""
+    return data.mean(axis=1, skipna=False)
+
+
+def _reverse_sum(items: Tuple[str, ...], maximum: int) -> Callable:
+    """Return scoring function that sums items after reversing `items`."""
+    def score(data):
+        data = data.copy()
+        data[list(items)] = maximum - data[list(items)]
+        return _sum(data)
+    return score
+
+
+def _hvlt_recognition(data: 'pd.DataFrame') -> 'pd.Series':
+    """Score HVLT-R discrimination index (hits minus false positives)."""
+    return data['HVLTREC'] - data['HVLTFPRL'] - data['HVLTFPUN']
+
+
+def _hvlt_retention(data: 'pd.DataFrame') -> 'pd.Series':
+    """Score HVLT-R retention (delayed recall relative to trials 2 and 3)."""
+    best = data[['HVLTRT2', 'HVLTRT3']].max(axis=1, skipna=False)
+    return data['HVLTRDLY'] / best.where(best > 0)
+
+
+_QUIP_PAIRS = (('CNTRLGMB', 'TMGAMBLE'), ('CNTRLSEX', 'TMSEX'),
+               ('CNTRLBUY', 'TMBUY'), ('CNTRLEAT', 'TMEAT'))
+_QUIP_ITEMS = ('TMTORACT', 'TMTMTACT', 'TMTRWD')
+
+
+def _quip(data: 'pd.DataFrame') -> 'pd.Series':
+    """Score QUIP as the number of endorsed impulse-control behaviors."""
+    import pandas as pd
+
+    domains = pd.concat([data[list(pair)].max(axis=1, skipna=False)
+                         for pair in _QUIP_PAIRS], axis=1)
+    return _sum(pd.concat([domains, data[list(_QUIP_ITEMS)]], axis=1))
+
+
+_RBD_ITEMS = ('DRMVIVID', 'DRMAGRAC', 'DRMNOCTB', 'SLPLMBMV', 'SLPINJUR',
+              'DRMVERBL', 'DRMFIGHT', 'DRMUMV', 'DRMOBJFL', 'MVAWAKEN',
+              'DRMREMEM', 'SLPDSTRB')
+_RBD_NEURO = ('STROKE', 'HETRA', 'PARKISM', 'RLS', 'NARCLPSY', 'DEPRS',
+              'EPILEPSY', 'BRNINFM', 'CNSOTH')
+
+
+def _rbd(data: 'pd.DataFrame') -> 'pd.Series':
+    """Score RBDSQ, counting any neurological disease as one item."""
+    return (_sum(data[list(_RBD_ITEMS)])
+            + data[list(_RBD_NEURO)].max(axis=1).fillna(0))
+
+
+def _scopa_aut(data: 'pd.DataFrame') -> 'pd.Series':
+    """Score SCOPA-AUT, recoding 'not applicable' (9) responses."""
+    autonomic = data[list(_items('SCAU', 21))].replace(9, 3)
+    sexual = data[list(_items('SCAU', 25, 22))].replace(9, 0)
+    return _sum(autonomic) + sexual.sum(axis=1)
+
+
+def _difference(first: str, second: str) -> Callable:
+    """Return scoring function that subtracts item `second` from `first`."""
+    def score(data):
+        return data[first] - data[second]
+    return score
+
+
+_UPDRS_III = ('NP3SPCH', 'NP3FACXP', 'NP3RIGN', 'NP3RIGRU', 'NP3RIGLU',
+              'NP3RIGRL', 'NP3RIGLL', 'NP3FTAPR', 'NP3FTAPL', 'NP3HMOVR',
+              'NP3HMOVL', 'NP3PRSPR', 'NP3PRSPL', 'NP3TTAPR', 'NP3TTAPL',
+              'NP3LGAGR', 'NP3LGAGL', 'NP3RISNG', 'NP3GAIT', 'NP3FRZGT',
+              'NP3PSTBL', 'NP3POSTR', 'NP3BRADY', 'NP3PTRMR', 'NP3PTRML',
+              'NP3KTRMR', 'NP3KTRML', 'NP3RTARU', 'NP3RTALU', 'NP3RTARL',
+              'NP3RTALL', 'NP3RTALJ', 'NP3RTCON')
+_UPDRS_III_DATASET = ('MDS-UPDRS Part III Treatment Determination and Part '
+                      'III: Motor Examination')
+
+_SOURCES = {
+    'benton': _Source('Benton Judgement of Line Orientation'),
+    'epworth': _Source('Epworth Sleepiness Scale'),
+    'gds': _Source('Geriatric Depression Scale (Short Version)'),
+    'hvlt': _Source('Hopkins Verbal Learning Test - Revised'),
+    'lns': _Source('Letter - Number Sequencing'),
+    'moca': _Source('Montreal Cognitive Assessment (MoCA)'),
+    'quip': _Source("Questionnaire for Impulsive-Compulsive Disorders in "
+                    "Parkinson's Disease (QUIP-Current-Short)"),
+    'rbd': _Source('REM Sleep Behavior Disorder Questionnaire'),
+    'scopa_aut': _Source('SCOPA-AUT'),
+    'se_adl': _Source('Modified Schwab & England Activities of Daily Living'),
+    'semantic_fluency': _Source('Modified Semantic Fluency'),
+    'stai': _Source('State-Trait Anxiety Inventory'),
+    'symbol_digit': _Source('Symbol Digit Modalities Test'),
+    'vitals': _Source('Vital Signs'),
+    'updrs_i': _Source('MDS-UPDRS Part I: Non-Motor Aspects of Experiences '
+                       'of Daily Living (nM-EDL)'),
+    'updrs_i_pq': _Source('MDS-UPDRS Part I Patient Questionnaire: Non-Motor '
+                          'Aspects of Experiences of Daily Living (nM-EDL)'),
+    'updrs_ii': _Source('MDS-UPDRS Part II Patient Questionnaire: Motor '
+                        'Aspects of Experiences of Daily Living (M-EDL)'),
+    'updrs_iii': _Source(_UPDRS_III_DATASET, ('PAG_NAME', ('NUPDRS3',))),
+    'updrs_iii_a': _Source(_UPDRS_III_DATASET, ('PAG_NAME', ('NUPDRS3A',))),
+    'updrs_iv': _Source('MDS-UPDRS Part IV: Motor Complications'),
+    'upsit': _Source('University of Pennsylvania Smell Identification Test '
+                     '(UPSIT)'),
+}
+
+_GDS_POSITIVE = ('GDSSATIS', 'GDSGSPIR', 'GDSHAPPY', 'GDSALIVE', 'GDSENRGY')
+_STAI_STATE_POSITIVE = ('STAIAD1', 'STAIAD2', 'STAIAD5', 'STAIAD8',
+                        'STAIAD10', 'STAIAD11', 'STAIAD15', 'STAIAD16',
+                        'STAIAD19', 'STAIAD20')
+_STAI_TRAIT_POSITIVE = ('STAIAD21', 'STAIAD23', 'STAIAD26', 'STAIAD27',
+                        'STAIAD30', 'STAIAD33', 'STAIAD34', 'STAIAD36',
+                        'STAIAD39')
+
+_BEHAVIOR = {
+    'benton': _Measure({'benton': ('JLO_TOTRAW',)}),
+    'epworth': _Measure({'epworth': _items('ESS', 8)}),
+    'gds': _Measure(
+        {'gds': ('GDSSATIS', 'GDSDROPD', 'GDSEMPTY', 'GDSBORED', 'GDSGSPIR',
+                 'GDSAFRAD', 'GDSHAPPY', 'GDSHLPLS', 'GDSHOME', 'GDSMEMRY',
+                 'GDSALIVE', 'GDSWRTLS', 'GDSENRGY', 'GDSHOPLS', 'GDSBETER')},
+        _reverse_sum(_GDS_POSITIVE, 1)
+    ),
+    'hvlt_recall': _Measure({'hvlt': _items('HVLTRT', 3)}),
+    'hvlt_recognition': _Measure({'hvlt': ('HVLTREC', 'HVLTFPRL',
+                                           'HVLTFPUN')},
+                                 _hvlt_recognition),
+    'hvlt_retention': _Measure({'hvlt': ('HVLTRDLY', 'HVLTRT2', 'HVLTRT3')},
+                               _hvlt_retention),
+    'lns': _Measure({'lns': ('LNS_TOTRAW',)}),
+    'moca': _Measure({'moca': ('MCATOT',)}),
+    'pigd': _Measure({'updrs_ii': ('NP2WALK', 'NP2FREZ'),
+                      'updrs_iii': ('NP3GAIT', 'NP3FRZGT', 'NP3PSTBL')},
+                     _mean),
+    'quip': _Measure({'quip': sum(_QUIP_PAIRS, ()) + _QUIP_ITEMS}, _quip),
+    'rbd': _Measure({'rbd': _RBD_ITEMS + _RBD_NEURO}, _rbd),
+    'scopa_aut': _Measure({'scopa_aut': _items('SCAU', 25)}, _scopa_aut),
+    'se_adl': _Measure({'se_adl': ('MSEADLG',)}),
+    'semantic_fluency': _Measure({'semantic_fluency': ('VLTANIM', 'VLTVEG',
+                                                       'VLTFRUIT')}),
+    'stai_state': _Measure({'stai': _items('STAIAD', 20)},
+                           _reverse_sum(_STAI_STATE_POSITIVE, 5)),
+    'stai_trait': _Measure({'stai': _items('STAIAD', 40, 21)},
+                           _reverse_sum(_STAI_TRAIT_POSITIVE, 5)),
+    'symbol_digit': _Measure({'symbol_digit': ('SDMTOTAL',)}),
+    'systolic_bp_drop': _Measure({'vitals': ('SYSSUP', 'SYSSTND')},
+                                 _difference('SYSSUP', 'SYSSTND')),
+    'tremor': _Measure({'updrs_ii': ('NP2TRMR',),
+                        'updrs_iii': ('NP3PTRMR', 'NP3PTRML', 'NP3KTRMR',
+                                      'NP3KTRML', 'NP3RTARU', 'NP3RTALU',
+                                      'NP3RTARL', 'NP3RTALL', 'NP3RTALJ',
+                                      'NP3RTCON')},
+                       _mean),
+    'updrs_i': _Measure({'updrs_i': ('NP1COG', 'NP1HALL', 'NP1DPRS',
+                                     'NP1ANXS', 'NP1APAT', 'NP1DDS'),
+                         'updrs_i_pq': ('NP1SLPN', 'NP1SLPD', 'NP1PAIN',
+                                        'NP1URIN', 'NP1CNST', 'NP1LTHD',
+                                        'NP1FATG')}),
+    'updrs_ii': _Measure({'updrs_ii': ('NP2SPCH', 'NP2SALV', 'NP2SWAL',
+                                       'NP2EAT', 'NP2DRES', 'NP2HYGN',
+                                       'NP2HWRT', 'NP2HOBB', 'NP2TURN',
+                                       'NP2TRMR', 'NP2RISE', 'NP2WALK',
+                                       'NP2FREZ')}),
+    'updrs_iii': _Measure({'updrs_iii': _UPDRS_III}),
+    'updrs_iii_a': _Measure({'updrs_iii_a': _UPDRS_III}),
+    'updrs_iv': _Measure({'updrs_iv': ('NP4WDYSK', 'NP4DYSKI', 'NP4OFF',
+                                       'NP4FLCTI', 'NP4FLCTX', 'NP4DYSTN')}),
+    'upsit': _Measure({'upsit': _items('UPSITBK', 4)}),
+}
+
+
+def _parse_dates(dates: 'pd.Series') -> 'pd.Series':
+    """
+    Parse `dates` formatted as in the PPMI study data (i.e., 'MM/YYYY').
+
+    Dates in this fixed format are decoded directly from their bytes, which
+    is an order of magnitude faster than :py:func:`pandas.to_datetime`; any
+    other (non-missing) values are passed to the latter.
+
+    Parameters
+    ----------
+    dates : pandas.Series
+        Dates to parse
+
+    Returns
+    -------
+    parsed : pandas.Series
+        Parsed dates, with unparseable values set to NaT
+    """
+    import numpy as np
+    import pandas as pd
+
+    try:
+        raw = np.asarray(dates.astype(str), dtype='S8')
+    except UnicodeEncodeError:
+        return pd.to_datetime(dates, errors='coerce')
+    # valid dates are seven bytes long, with six digits around a '/'
+    codes = raw.view(np.uint8).reshape(-1, 8).astype(np.int16) - ord('0')
+    digits = codes[:, [0, 1, 3, 4, 5, 6]]
+    valid = (((digits >= 0) & (digits <= 9)).all(axis=1)
+             & (codes[:, 2] == ord('/') - ord('0'))
+             & (codes[:, 7] == -ord('0')))
+    month = codes[:, 0] * 10 + codes[:, 1]
+    year = digits[:, 2:] @ np.array([1000, 100, 10, 1])
+    valid &= (month >= 1) & (month <= 12)
+    months = np.where(valid, (year - 1970) * 12 + month - 1, 0)
+    parsed = months.astype('datetime64[M]').astype('datetime64[ns]')
+    parsed[~valid] = np.datetime64('NaT')
+    parsed = pd.Series(parsed, index=dates.index)
+
+    other = ~valid & dates.notna().to_numpy()
+    if other.any():
+        parsed[other] = pd.to_datetime(dates[other], errors='coerce')
+    return parsed
+
+
+def _load_sources(items: Dict[str, set],
+                  path: str = None) -> Dict[str, 'pd.DataFrame']:
+    """
+    Load `items` from study data sources, indexed by participant and visit.
+
+    Each study data table is read only once, and only the columns required
+    for the requested `items` are read from it.
+
+    Parameters
+    ----------
+    items : dict
+        Mapping of source names (keys of `_SOURCES`) to the items to load
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    sources : dict
+        Mapping of source names to data frames with numeric `items` and a
+        'date' column, indexed by ('PATNO', 'EVENT_ID')
+    """
+    import pandas as pd
+
+    tables = {}
+    for source in items:
+        tables.setdefault(_SOURCES[source].dataset, []).append(source)
+
+    sources = {}
+    for dataset, names in tables.items():
+        columns = list(_KEYS)
+        for source in names:
+            where = _SOURCES[source].where
+            if where is not None and where[0] not in columns:
+                columns.append(where[0])
+            columns.extend(it for it in sorted(items[source])
+                           if it not in columns)
+        data = read_studydata(dataset, columns=columns, path=path)
+        for source in names:
+            where = _SOURCES[source].where
+            subset = data
+            if where is not None:
+                subset = data[data[where[0]].isin(where[1])]
+            cols = sorted(items[source])
+            frame = subset[cols].apply(pd.to_numeric, errors='coerce')
+            frame['date'] = _parse_dates(subset['INFODT'])
+            frame.index = pd.MultiIndex.from_frame(subset[_KEYS[:2]])
+            # repeated assessments at the same visit are rare; keep the first
+            sources[source] = frame[~frame.index.duplicated()]
+    return sources
+
+
+def _behavior_inputs(measures: List[str] = None,
+                     path: str = None) -> List[str]:
+    """Return names of study data read to score `measures`."""
+    if measures is None:
+        measures = sorted(_BEHAVIOR)
+    elif isinstance(measures, str):
+        measures = [measures]
+    return [_SOURCES[source].dataset for measure in measures
+            if measure in _BEHAVIOR for source in _BEHAVIOR[measure].items]
+
+
+@memoize(_behavior_inputs)
+def load_behavior(measures: List[str] = None,
+                  path: str = None) -> 'pd.DataFrame':
+    """
+    Load clinical-behavioral measures into a tidy data frame.
+
+    Measures are scored from the items in the downloaded study data (see
+    :py:func:`pypmi.fetch_studydata`); only the columns required for the
+    requested `measures` are read. Scores are memoized on disk (see
+    :py:func:`pypmi.memo.memoize`) until any of the study data change.
+
+    Parameters
+    ----------
+    measures : list of str, optional
+        Measures to load. If not specified all available measures are loaded:
+        'benton', 'epworth', 'gds', 'hvlt_recall', 'hvlt_recognition',
+        'hvlt_retention', 'lns', 'moca', 'pigd', 'quip', 'rbd', 'scopa_aut',
+        'se_adl', 'semantic_fluency', 'stai_state', 'stai_trait',
+        'symbol_digit', 'systolic_bp_drop', 'tremor', 'updrs_i', 'updrs_ii',
+        'updrs_iii', 'updrs_iii_a', 'updrs_iv', and 'upsit'. Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    behavior : pandas.DataFrame
+        Tidy data frame with columns 'participant', 'visit', 'date', and one
+        column per measure, with one row per participant and visit
+
+    Raises
+    ------
+    FileNotFoundError
+        If any of the required study data have not been downloaded
+    """
+    import pandas as pd
+
+    if measures is None:
+        measures = sorted(_BEHAVIOR)
+    elif isinstance(measures, str):
+        measures = [measures]
+    invalid = [m for m in measures if m not in _BEHAVIOR]
+    if invalid:
+        raise ValueError('Provided measures {} not available. Please choose '
+                         'from {}.'.format(invalid, sorted(_BEHAVIOR)))
+
+    items = {}
+    for measure in measures:
+        for source, its in _BEHAVIOR[measure].items.items():
+            items.setdefault(source, set()).update(its)
+    sources = _load_sources(items, path=path)
+
+    scores = {}
+    for measure in measures:
+        spec = _BEHAVIOR[measure]
+        data = pd.concat([sources[source][list(its)]
+                          for source, its in spec.items.items()],
+                         axis=1, join='outer')
+        scores[measure] = (spec.score or _sum)(data)
+    behavior = pd.concat(scores, axis=1, join='outer')
+    # sources assessed at the same visit may be dated differently; use the
+    # earliest date on which any of them was assessed
+    dates = pd.concat([src['date'] for src in sources.values()], axis=1)
+    behavior.insert(0, 'date', dates.min(axis=1).reindex(behavior.index))
+
+    behavior.index.names = ['participant', 'visit']
+    return (behavior.reset_index()
+                    .sort_values(['participant', 'date', 'visit'])
+                    .reset_index(drop=True))
+
+
+@memoize(lambda datasets, *args, **kwargs: list(datasets))
+def align_visits(datasets: Dict[str, List[str]],
+                 reference: str = None,
+                 tolerance: int = 45,
+                 path: str = None) -> 'pd.DataFrame':
+    """
+    Align assessments from multiple study data tables to the same visits.
+
+    A grid of visits is built once, with one row per participant and visit.
+    Assessments of every table are matched to it by participant and visit
+    (i.e., EVENT_ID), and assessments of visits that are missing from a
+    table are filled in with a single nearest-date join of its remaining
+    assessments (see :py:func:`pandas.merge_asof`), so that assessments that
+    were coded with different visits still line up.
+
+    Parameters
+    ----------
+    datasets : dict
+        Mapping of dataset names, as listed in
+        :py:func:`pypmi.fetchable_studydata`, to the columns to load from them
+    reference : str, optional
+        Dataset (one of the keys of `datasets`) whose visits form the grid
+        that all other tables are aligned to. If not specified the grid has
+        one row per visit assessed in any of `datasets`. Default: None
+    tolerance : int, optional
+        Maximum number of days between the date of a visit in the grid and of
+        an assessment of another visit matched to it. Default: 45
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    aligned : pandas.DataFrame
+        Data frame indexed by a ('participant', 'visit') MultiIndex, ordered
+        by participant and visit date, with a 'date' column (the earliest
+        date the visit was assessed on in the grid) and the requested columns
+        of `datasets`; columns without a matching assessment are missing
+
+    Raises
+    ------
+    FileNotFoundError
+        If any of `datasets` have not been downloaded
+    ValueError
+        If `reference` is not in `datasets`, `tolerance` is negative, or the
+        same column is requested from multiple datasets
+    """
+    import numpy as np
+    import pandas as pd
+
+    if reference is not None and reference not in datasets:
+        raise ValueError('Provided reference {} must be one of the provided '
+                         'datasets {}.'.format(reference, list(datasets)))
+    if tolerance < 0:
+        raise ValueError('Provided tolerance must be non-negative, not {}.'
+                         .format(tolerance))
+    seen = {}
+    for dataset, columns in datasets.items():
+        for col in columns:
+            if col in _KEYS or seen.setdefault(col, dataset) != dataset:
+                raise ValueError('Provided column {} cannot be loaded from {}'
+                                 '; column names must be unique and not one '
+                                 'of {}.'.format(col, dataset, _KEYS))
+
+    keys = ['participant', 'visit']
+    tables = {}
+    for dataset, columns in datasets.items():
+        columns = list(columns)
+        data = read_studydata(dataset, columns=_KEYS + columns, path=path)
+        frame = data[columns].copy()
+        frame['participant'] = pd.to_numeric(data['PATNO'], errors='coerce')
+        frame['visit'] = data['EVENT_ID'].astype(object)
+        frame['date'] = _parse_dates(data['INFODT'])
+        frame = frame.dropna(subset=['participant'])
+        frame['participant'] = frame['participant'].astype('int64')
+        frame = frame.sort_values('date', kind='stable')
+        frame['row'] = np.arange(len(frame))
+        tables[dataset] = frame
+
+    grid = pd.concat([tables[dataset][keys + ['date']] for dataset in
+                      ([reference] if reference is not None else tables)])
+    grid = (grid.dropna(subset=['visit'])
+                .sort_values('date', kind='stable')
+                .drop_duplicates(keys)
+                .sort_values(['participant', 'date'], kind='stable')
+                .reset_index(drop=True))
+
+    aligned = [grid]
+    for dataset, frame in tables.items():
+        columns = list(datasets[dataset])
+        exact = frame.dropna(subset=['visit']).drop_duplicates(keys)
+        matched = grid[keys].merge(exact[keys + columns + ['row']], on=keys,
+                                   how='left')
+        # visits missing from the table are matched to the nearest of its
+        # assessments that were not matched to their own visit
+        missing = matched['row'].isna() & grid['date'].notna()
+        remaining = frame[~frame['row'].isin(matched['row'])
+                          & frame['date'].notna()]
+        if missing.any() and len(remaining) > 0:
+            nearest = pd.merge_asof(
+                grid.loc[missing, ['participant', 'date']]
+                    .reset_index().sort_values('date', kind='stable'),
+                remaining[['participant', 'date'] + columns],
+                on='date', by='participant', direction='nearest',
+                tolerance=pd.Timedelta(days=tolerance)
+            ).set_index('index')
+            matched.loc[nearest.index, columns] = nearest[columns]
+        aligned.append(matched[columns])
+    return pd.concat(aligned, axis=1).set_index(keys)
+
+
+_DEMOGRAPHICS = {
+    'Participant Status': ('COHORT', 'ENROLL_DATE', 'ENROLL_STATUS', 'SITE'),
+    'Demographics': ('BIRTHDT', 'SEX', 'HANDED', 'RAWHITE', 'RABLACK',
+                     'RAASIAN', 'RAHAWOPI', 'RAINDALS', 'RANOS'),
+    'PD Diagnosis History': ('PDDXDT',),
+    'Family History': ('ANYFAMPD',),
+    'Socio-Economics': ('EDUCYRS',),
+}
+_DIAGNOSIS = {1: 'pd', 2: 'hc', 3: 'swedd', 4: 'prodromal'}
+_GENDER = {0: 'f', 1: 'm'}
+_HANDEDNESS = {1: 'right', 2: 'left', 3: 'both'}
+_RACE = {'RAWHITE': 'white', 'RABLACK': 'black', 'RAASIAN': 'asian',
+         'RAHAWOPI': 'pacific_islander', 'RAINDALS': 'native_american',
+         'RANOS': 'other'}
+_DEMOGRAPHICS_CACHE = {}
+
+
+def _categorical(codes: 'pd.Series', labels: Dict[int, str]) -> 'pd.Series':
+    """Convert numeric `codes` into a categorical with `labels`."""
+    import pandas as pd
+
+    codes = pd.to_numeric(codes, errors='coerce')
+    return pd.Series(pd.Categorical(codes.map(labels),
+                                    categories=list(labels.values())),
+                     index=codes.index)
+
+
+def _race(data: 'pd.DataFrame') -> 'pd.Series':
+    """Convert race indicator columns in `data` into a single categorical."""
+    import numpy as np
+    import pandas as pd
+
+    flags = data[list(_RACE)].apply(pd.to_numeric, errors='coerce')
+    flags = flags.fillna(0).to_numpy() > 0
+    count = flags.sum(axis=1)
+    codes = np.where(count == 1, flags.argmax(axis=1),
+                     np.where(count > 1, len(_RACE), -1))
+    categories = list(_RACE.values()) + ['multiple']
+    return pd.Series(pd.Categorical.from_codes(codes, categories),
+                     index=data.index)
+
+
+@memoize(lambda path=None: list(_DEMOGRAPHICS))
+def load_demographics(path: str = None) -> 'pd.DataFrame':
+    """
+    Load demographic information into a tidy data frame.
+
+    Low-cardinality columns are returned as categoricals and participant IDs
+    as 32-bit integers, so the data frame takes a fraction of the memory it
+    would with object columns. The data frame is cached in memory and on
+    disk (see :py:func:`pypmi.memo.memoize`) and re-used by subsequent calls
+    until any of the required study data change.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    demographics : pandas.DataFrame
+        Tidy data frame with columns 'participant', 'diagnosis', 'date_birth',
+        'date_diagnosis', 'date_enroll', 'status', 'family_history', 'age',
+        'gender', 'race', 'site', 'handedness', and 'education', with one
+        row per participant
+
+    Raises
+    ------
+    FileNotFoundError
+        If any of the required study data have not been downloaded
+    """
+    import numpy as np
+    import pandas as pd
+
+    files = []
+    for dataset in _DEMOGRAPHICS:
+        fname = latest_local(dataset, path=path)
+        if fname is None:
+            raise FileNotFoundError('Provided dataset {} has not been '
+                                    'downloaded. Please use fetch_studydata() '
+                                    'to download it first.'.format(dataset))
+        stat = fname.stat()
+        files.append((str(fname), stat.st_size, stat.st_mtime_ns))
+    key = tuple(files)
+    if key in _DEMOGRAPHICS_CACHE:
+        return _DEMOGRAPHICS_CACHE[key].copy()
+
+    tables = {}
+    for dataset, columns in _DEMOGRAPHICS.items():
+        data = read_studydata(dataset, columns=['PATNO', *columns], path=path)
+        data = data[~data['PATNO'].duplicated()]
+        tables[dataset] = data.set_index(data['PATNO'].astype(np.int32))
+
+    status = tables['Participant Status']
+    index = status.index
+    demo, dx, famhx, socio = (tables[dataset].reindex(index) for dataset in
+                              ('Demographics', 'PD Diagnosis History',
+                               'Family History', 'Socio-Economics'))
+
+    family = pd.to_numeric(famhx['ANYFAMPD'], errors='coerce')
+    demographics = pd.DataFrame(dict(
+        diagnosis=_categorical(status['COHORT'], _DIAGNOSIS),
+        date_birth=_parse_dates(demo['BIRTHDT']),
+        date_diagnosis=_parse_dates(dx['PDDXDT']),
+        date_enroll=_parse_dates(status['ENROLL_DATE']),
+        status=status['ENROLL_STATUS'].astype('category'),
+        family_history=family.gt(0).astype('boolean').mask(family.isna()),
+    ), index=index)
+    age = (demographics['date_enroll'] - demographics['date_birth'])
+    demographics['age'] = (age.dt.days / 365.25).astype(np.float32)
+    demographics['gender'] = _categorical(demo['SEX'], _GENDER)
+    demographics['race'] = _race(demo)
+    demographics['site'] = status['SITE'].astype('category')
+    demographics['handedness'] = _categorical(demo['HANDED'], _HANDEDNESS)
+    demographics['education'] = pd.to_numeric(
+        socio['EDUCYRS'], errors='coerce'
+    ).astype(np.float32)
+
+    demographics = (demographics.rename_axis('participant')
+                                .reset_index()
+                                .sort_values('participant', kind='stable')
+                                .reset_index(drop=True))
+    _DEMOGRAPHICS_CACHE.clear()
+    _DEMOGRAPHICS_CACHE[key] = demographics
+    return demographics.copy()
+
+
+def load_variables(variables: List[str],
+                   path: str = None,
+                   fetch: bool = True,
+                   user: str = None,
+                   password: str = None) -> 'pd.DataFrame':
+    """
+    Load `variables` from whichever study data contain them.
+
+    The study data containing each variable are found in the Data Dictionary
+    and the columns of the downloaded study data (see
+    :py:func:`pypmi.schema.find_variables`). Downloaded datasets are
+    preferred, followed by those with the most of `variables`, such that as
+    few files as possible are read; only the required columns are read from
+    them.
+
+    Parameters
+    ----------
+    variables : list of str
+        Names of variables to load (e.g., ['NP3TOT', 'MCATOT'])
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    fetch : bool, optional
+        Whether to download required study data that have not been downloaded
+        yet with :py:func:`pypmi.fetch_studydata`. Default: True
+    user : str, optional
+        Email for user authentication to the LONI IDA database, if study data
+        need to be downloaded. Default: None
+    password : str, optional
+        Password for user authentication to the LONI IDA database, if study
+        data need to be downloaded. Default: None
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        Data frame with columns 'participant', 'visit' (if any of `variables`
+        are assessed at visits), and `variables`, with one row per participant
+        and visit. Variables that are not assessed at visits (e.g.,
+        demographics) are repeated for all visits of a participant. If a
+        dataset has repeated rows for a participant and visit (or for a
+        participant, if not assessed at visits) only the first is kept and a
+        warning is raised.
+
+    Raises
+    ------
+    FileNotFoundError
+        If required study data have not been downloaded and `fetch` is False
+    ValueError
+        If any of `variables` cannot be found in any study data
+    """
+    if isinstance(variables, str):
+        variables = [variables]
+    variables = list(dict.fromkeys(variables))
+    keys = _KEYS[:2]
+    index = _variable_index(path)
+    headers = _read_headers(path)
+    invalid = [var for var in variables if var in keys]
+    if invalid:
+        raise ValueError('Provided variables {} are returned as participant '
+                         'and visit and cannot be requested.'.format(invalid))
+    candidates = {
+        var: {name: local for name, local in index.get(var, {}).items()
+              if not local or 'PATNO' in headers.get(name, [])}
+        for var in variables
+    }
+    missing = [var for var, found in candidates.items() if not found]
+    if missing:
+        raise ValueError('Provided variables {} not found in any study data. '
+                         'Please see find_variables() for available entries.'
+                         .format(missing))
+
+    # greedily pick datasets that are downloaded and have the most variables
+    required, remaining = {}, list(variables)
+    while remaining:
+        covers = {}
+        for var in remaining:
+            for name in candidates[var]:
+                covers.setdefault(name, []).append(var)
+        best = max(sorted(covers), key=lambda name: (
+            any(candidates[var][name] for var in covers[name]),
+            len(covers[name])
+        ))
+        required[best] = covers[best]
+        remaining = [var for var in remaining if var not in covers[best]]
+
+    to_fetch = [name for name, its in required.items()
+                if not candidates[its[0]][name]]
+    if to_fetch:
+        if not fetch:
+            raise FileNotFoundError('Provided variables require datasets {} '
+                                    'which have not been downloaded. Please '
+                                    'use fetch_studydata() to download them '
+                                    'first.'.format(to_fetch))
+        from .fetchers import fetch_studydata
+        fetch_studydata(to_fetch, path=path, user=user, password=password,
+                        verbose=False)
+        headers = _read_headers(path)
+
+    visits, participants = [], []
+    for name, its in required.items():
+        on = [key for key in keys if key in headers.get(name, keys)]
+        data = read_studydata(name, columns=on + its, path=path)
+        repeated = data.duplicated(on)
+        if repeated.any():
+            warnings.warn('Dropping {} repeated rows per {} of {}; only the '
+                          'first is kept.'
+                          .format(repeated.sum(), ' and '.join(on), name),
+                          stacklevel=2)
+            data = data[~repeated]
+        (visits if 'EVENT_ID' in on else participants).append(data)
+
+    merged = None
+    for data in visits:
+        merged = data if merged is None else \
+            merged.merge(data, on=keys, how='outer')
+    for data in participants:
+        merged = data if merged is None else \
+            merged.merge(data, on='PATNO', how='outer' if not visits
+                         else 'left')
+    merged = merged.rename(columns={'PATNO': 'participant',
+                                    'EVENT_ID': 'visit'})
+    on = ['participant', 'visit'] if visits else ['participant']
+    return (merged[on + variables].sort_values(on)
+                                  .reset_index(drop=True))
@@ -1,38 +1,42 @@
 # -*- coding: utf-8 -*-
 """Functions for fetching/downloading data from the PPMI database."""
 
-from io import BytesIO
 from pathlib import Path
-import json
-import shutil
-import os
-import importlib.resources
+import fnmatch
+import hashlib
 import re
-from typing import Dict, List
-import zipfile
+from typing import TYPE_CHECKING, Dict, List, Pattern, Tuple, Union
 from datetime import datetime
 
-import requests
-from tqdm import tqdm
+if TYPE_CHECKING:
+    import requests
 
+from .catalog import (CATALOG_TYPES, _check_type, _get_index, _get_project,
+                      _load_catalog, _load_metadata, _load_refreshed,
+                      _merge_listing, _parse_listing, _save_metadata,
+                      _save_refreshed, describe_datasets)
+from .manifest import _record_downloads
+from .memo import _invalidate
 from .utils import _get_cred, _get_data_dir
 
+_LISTING_URLS = {
+    'studydata': "https://ida.loni.usc.edu/pages/access/studyData.jsp?project=PPMI",
+    'genetics': "https://ida.loni.usc.edu/pages/access/geneticData.jsp?project=PPMI",
+}
 
-if getattr(importlib.resources, 'files', None) is not None:
-    with open(importlib.resources.files("pypmi") / "data/studydata.json") as src:
-        _STUDYDATA = json.load(src)
-    with open(importlib.resources.files("pypmi") / "data/genetics.json") as src:
-        _GENETICS = json.load(src)
-else:
-    from pkg_resources import resource_filename
-    with open(resource_filename('pypmi', 'data/studydata.json'), 'r') as src:
-        _STUDYDATA = json.load(src)
-    with open(resource_filename('pypmi', 'data/genetics.json'), 'r') as src:
-        _GENETICS = json.load(src)
+
+def __getattr__(name):
+    # catalogs are loaded lazily on first access; see pypmi.catalog
+    if name == '_STUDYDATA':
+        return _load_catalog('studydata')
+    elif name == '_GENETICS':
+        return _load_catalog('genetics')
+    raise AttributeError('module {!r} has no attribute {!r}'
+                         .format(__name__, name))
 
 
 def _get_auth_session(
-        user: str = None, password: str = None) -> Dict[str, str]:
+        user: str = None, password: str = None) -> 'requests.Session':
     """
     Return credentials for downloading raw study data from the PPMI.
 
@@ -48,9 +52,11 @@ def _get_auth_session(
 
     Returns
     -------
-    params : dict
-        With keys 'userId' and 'authKey', ready to be supplied to a GET call
+    session : requests.Session
+        Authenticated session, ready to be used for GET calls
     """
+    import requests
+
     user, password = _get_cred(user, password)
 
     s = requests.Session()
@@ -69,13 +75,119 @@ def _get_auth_session(
     return s
 
 
+def _get_genetics_prefix(session: 'requests.Session') -> str:
+    """
+    Return URL prefix for genetics downloads from the genetics listing page.
+
+    Parameters
+    ----------
+    session : requests.Session
+        Authenticated session, as returned by :py:func:`_get_auth_session`
+
+    Returns
+    -------
+    prefix : str
+        URL path component to which genetics file IDs are appended
+    """
+    r_genetics = session.get(_LISTING_URLS['genetics'])
+    fileurl_match = re.search(r' \"/(.+)/\" +', r_genetics.text)
+    return fileurl_match.group(1) if fileurl_match else None
+
+
+def _get_download_url(session: 'requests.Session',
+                      type: str,
+                      file_id: str,
+                      prefix: str = None) -> str:
+    """
+    Resolve the download URL of `file_id` in the PPMI database.
+
+    Parameters
+    ----------
+    session : requests.Session
+        Authenticated session, as returned by :py:func:`_get_auth_session`
+    type : {'studydata', 'genetics'}
+        Type of data being downloaded
+    file_id : str
+        File ID of the dataset in the PPMI database
+    prefix : str, optional
+        URL prefix for genetics downloads, as returned by
+        :py:func:`_get_genetics_prefix`. Default: None
+
+    Returns
+    -------
+    url : str
+        URL from which the dataset can be downloaded
+    """
+    if type == 'studydata':
+        fileurl_resp = session.post(
+            "https://ida.loni.usc.edu/pages/ajax/getStudyData",
+            data=dict(fileId=file_id)
+        )
+        fileurl_match = re.search(r'<path name=\"(.+)\"/>', fileurl_resp.text)
+        if fileurl_match is None:
+            raise ValueError('Could not find download URL for file ID {}.'
+                             .format(file_id))
+        return ("https://ida.loni.usc.edu/download/files/study/{}"
+                .format(fileurl_match.group(1)))
+    elif type == 'genetics':
+        return ("https://ida.loni.usc.edu/download/files/genetic/{}/{}"
+                .format(prefix, file_id))
+    raise ValueError('Invalid data type requested for download.')
+
+
+def _download_file(session: 'requests.Session',
+                   type: str,
+                   file_id: str,
+                   file_name: Path,
+                   prefix: str = None,
+                   verbose: bool = True) -> Tuple[Path, str]:
+    """
+    Download a single dataset `file_id` from the PPMI database to `file_name`.
+
+    Parameters
+    ----------
+    session : requests.Session
+        Authenticated session, as returned by :py:func:`_get_auth_session`
+    type : {'studydata', 'genetics'}
+        Type of data being downloaded
+    file_id : str
+        File ID of the dataset in the PPMI database
+    file_name : pathlib.Path
+        Filepath where downloaded data should be saved
+    prefix : str, optional
+        URL prefix for genetics downloads. Default: None
+    verbose : bool, optional
+        Whether to print status messages. Default: True
+
+    Returns
+    -------
+    file_name : pathlib.Path
+        Filepath to downloaded dataset
+    sha256 : str
+        SHA-256 hash of downloaded dataset
+    """
+    fileurl = _get_download_url(session, type, file_id, prefix=prefix)
+    if verbose:
+        print('Downloading {}...'.format(file_name))
+    # hash the file as it is written so that it need not be re-read in order
+    # to be added to the index of downloaded files
+    sha256 = hashlib.sha256()
+    with session.get(fileurl, stream=True) as r:
+        with open(file_name, 'wb') as f:
+            for block in iter(lambda: r.raw.read(1 << 20), b''):
+                sha256.update(block)
+                f.write(block)
+    return file_name, sha256.hexdigest()
+
+
 def _download_data(info: Dict[str, Dict[str, str]],
                    type: str,
                    path: str = None,
                    user: str = None,
                    password: str = None,
                    overwrite: bool = False,
-                   verbose: bool = True) -> List[str]:
+                   verbose: bool = True,
+                   n_jobs: int = 1) -> List[str]:
     """
     Download dataset(s) listed in `info` from `url`.
 
@@ -107,12 +219,17 @@ def _download_data(info: Dict[str, Dict[str, str]],
         exist. Default: False
     verbose : bool, optional
         Whether to print progress bar as download occurs. Default: True
+    n_jobs : int, optional
+        Number of files to download concurrently. Default: 1
 
     Returns
     -------
     downloaded : list
         Filepath(s) to downloaded datasets
     """
+    if type not in ('studydata', 'genetics'):
+        raise ValueError('Invalid data type requested for download.')
+
     path = _get_data_dir(path)
 
     # check provided credentials; if none were supplied, look for creds in
@@ -127,7 +244,7 @@ def _download_data(info: Dict[str, Dict[str, str]],
     if verbose:
         print('Requesting {} datasets for download...'.format(len(info)))
 
-    files_to_download = []
+    files_to_download, fetched = [], []
     for dset, file_info in info.items():
         if file_info is None:
             raise ValueError('Provided dataset {} not available. Please see '
@@ -141,6 +258,7 @@ def _download_data(info: Dict[str, Dict[str, str]],
         # does not exist before appending it to request parameters
         if not file_name.is_file() or overwrite:
             files_to_download.append((file_id, file_name))
+            fetched.append(dset)
         else:
             downloaded.append(file_name)
 
@@ -150,55 +268,125 @@ def _download_data(info: Dict[str, Dict[str, str]],
 
     session = _get_auth_session(user=user, password=password)
     # access the page to update the session
+    prefix = None
     if type == 'studydata':
-        session.get(
-            "https://ida.loni.usc.edu/pages/access/studyData.jsp?project=PPMI"
-        )
-    elif type == 'genetics':
-        r_genetics = session.get(
-            "https://ida.loni.usc.edu/pages/access/geneticData.jsp?project=PPMI"
-        )
-
-        fileurl_match = re.search(r' \"/(.+)/\" +', r_genetics.text)
-        fileurl_string = fileurl_match.group(1) if fileurl_match else None
+        session.get(_LISTING_URLS['studydata'])
     else:
-        raise ValueError('Invalid data type requested for download.')
+        prefix = _get_genetics_prefix(session)
+
+    # schedule the largest files first so concurrent downloads finish at
+    # roughly the same time; sizes are those cached by refresh_metadata()
+    sizes = {fid: meta[0] for fid, meta in _load_metadata(path)[type].items()}
+    files_to_download.sort(key=lambda f: -(sizes.get(f[0]) or 0))
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    # download files concurrently; the work is I/O bound so threads sharing
+    # the authenticated session are sufficient
+    n_jobs = max(1, min(n_jobs, len(files_to_download)))
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        futures = [
+            executor.submit(_download_file, session, type, fid, fname,
+                            prefix=prefix, verbose=verbose)
+            for fid, fname in files_to_download
+        ]
+        results = [future.result() for future in futures]
+
+    files, hashes = zip(*results)
+    _record_downloads(files, hashes=hashes, path=path)
+    # loaders memoized on the previous versions of these data are now stale
+    _invalidate(fetched, path=path)
+    downloaded.extend(files)
 
-    print(f"{files_to_download = }")
-    if type == 'studydata':
-        for fid, fname in files_to_download:
-            print(fid)
-            fileurl_resp = session.post(
-                "https://ida.loni.usc.edu/pages/ajax/getStudyData",
-                data=dict(fileId=fid)
-            )
-            fileurl_match = re.search(r'<path name=\"(.+)\"/>', fileurl_resp.text)
-            fileurl_string = fileurl_match.group(1) if fileurl_match else None
-            if fileurl_string is None:
-                raise ValueError('Could not find download URL for file ID {}.'
-                                    .format(fid))
-            fileurl = f"https://ida.loni.usc.edu/download/files/study/{fileurl_string}"
-            if verbose:
-                print('Downloading {}...'.format(fname))
-            with session.get(fileurl, stream=True) as r:
-                with open(fname, 'wb') as f:
-                    shutil.copyfileobj(r.raw, f)
-            downloaded.append(fname)
-    elif type == 'genetics':
-        for fid, fname in files_to_download:
-            print(fid)
-            fileurl = f"https://ida.loni.usc.edu/download/files/genetic/{fileurl_string}/{fid}"
-            if verbose:
-                print('Downloading {}...'.format(fname))
-            with session.get(fileurl, stream=True) as r:
-                with open(fname, 'wb') as f:
-                    shutil.copyfileobj(r.raw, f)
-            downloaded.append(fname)
-    else:
-        raise ValueError('Invalid data type requested for download.')
     return downloaded
 
 
+def _head_file(session: 'requests.Session',
+               type: str,
+               file_id: str,
+               prefix: str = None) -> list:
+    """
+    Request file metadata of `file_id` without downloading it.
+
+    Parameters
+    ----------
+    session : requests.Session
+        Authenticated session, as returned by :py:func:`_get_auth_session`
+    type : {'studydata', 'genetics'}
+        Type of data being queried
+    file_id : str
+        File ID of the dataset in the PPMI database
+    prefix : str, optional
+        URL prefix for genetics downloads. Default: None
+
+    Returns
+    -------
+    metadata : list
+        File size (in bytes), content type, and last-modified date of
+        `file_id`; values not reported by the server are None
+    """
+    fileurl = _get_download_url(session, type, file_id, prefix=prefix)
+    r = session.head(fileurl, allow_redirects=True)
+    r.raise_for_status()
+    size = r.headers.get('Content-Length')
+    return [
+        int(size) if size is not None else None,
+        r.headers.get('Content-Type'),
+        r.headers.get('Last-Modified')
+    ]
+
+
+def _select_datasets(catalog: Dict[str, Dict[str, str]],
+                     datasets: List[str] = None,
+                     project: Union[int, str, List] = None,
+                     pattern: Union[str, Pattern] = None) -> List[str]:
+    """
+    Expand `datasets`, `project`, and `pattern` selectors into dataset names.
+
+    Parameters
+    ----------
+    catalog : dict
+        Mapping of available dataset names to file information
+    datasets : str or list, optional
+        Dataset name(s) in `catalog`, or 'all'. Default: None
+    project : int or str or list, optional
+        Project number(s) (e.g., 118); all datasets belonging to the specified
+        project(s) will be selected. Project numbers without a sub-project
+        designation also match sub-projects (e.g., 150 matches '150.2').
+        Default: None
+    pattern : str or re.Pattern, optional
+        Glob pattern (e.g., '*WGS Variants*') or compiled regular expression;
+        all datasets whose name matches will be selected. Default: None
+
+    Returns
+    -------
+    selected : list
+        Dataset names, in order and without duplicates
+    """
+    if isinstance(datasets, str):
+        datasets = list(catalog) if datasets == 'all' else [datasets]
+    selected = list(datasets) if datasets is not None else []
+
+    if project is not None:
+        if isinstance(project, (int, str)):
+            project = [project]
+        project = [str(p) for p in project]
+        for name in catalog:
+            designation = _get_project(name)
+            if designation is None:
+                continue
+            if (designation in project
+                    or designation.split('.')[0] in project):
+                selected.append(name)
+
+    if pattern is not None:
+        if isinstance(pattern, str):
+            pattern = re.compile(fnmatch.translate(pattern))
+        selected += [name for name in catalog if pattern.search(name)]
+
+    return list(dict.fromkeys(selected))
+
+
 def fetchable_studydata() -> List[str]:
     """
     List study data available to download from the PPMI.
@@ -212,31 +400,47 @@ def fetchable_studydata() -> List[str]:
     --------
     pypmi.fetch_studydata
     """
-    return list(_STUDYDATA.keys())
+    return list(_get_index('studydata').names)
 
 
-def fetchable_genetics() -> List[str]:
+def fetchable_genetics(projects: bool = False) -> List[str]:
     """
     List genetics data available to download from the PPMI.
 
+    Parameters
+    ----------
+    projects : bool, optional
+        Whether to list the project designations (e.g., '118') referenced by
+        the available data instead of the data files themselves. Project
+        designations can be supplied to the `project` argument of
+        :py:func:`pypmi.fetch_genetics`. Default: False
+
     Returns
     -------
     available : list
-        List of available data files
+        List of available data files (or project designations)
 
     See Also
     --------
     pypmi.fetch_genetics
     """
-    return list(_GENETICS.keys())
+    if projects:
+        designations = (_get_project(name)
+                        for name in _get_index('genetics').names)
+        return sorted({p for p in designations if p is not None},
+                      key=lambda p: [int(n) for n in p.split('.')])
+    return list(_get_index('genetics').names)
 
 
-def fetch_studydata(datasets: str,
+def fetch_studydata(datasets: str = None,
                     path: str = None,
                     user: str = None,
                     password: str = None,
                     overwrite: bool = False,
-                    verbose: bool = True) -> List[str]:
+                    verbose: bool = True,
+                    project: Union[int, str, List] = None,
+                    pattern: Union[str, Pattern] = None,
+                    n_jobs: int = 1) -> List[str]:
     """
     Download specified study data `datasets` from the PPMI database.
 
@@ -263,6 +467,14 @@ def fetch_studydata(datasets: str,
         exist. Default: False
     verbose : bool, optional
         Whether to print progress bar as download occurs. Default: True
+    project : int or str or list, optional
+        Project number(s) (e.g., 151); all datasets belonging to the specified
+        project(s) are fetched in addition to `datasets`. Default: None
+    pattern : str or re.Pattern, optional
+        Glob pattern or compiled regular expression; all datasets whose name
+        matches are fetched in addition to `datasets`. Default: None
+    n_jobs : int, optional
+        Number of datasets to download concurrently. Default: 1
 
     Returns
     -------
@@ -273,25 +485,28 @@ def fetch_studydata(datasets: str,
     --------
     pypmi.fetchable_studydata
     """
-    # take subset of available study data based on requested `datasets`
-    if isinstance(datasets, str) and datasets=='all':
-        datasets = fetchable_studydata()
+    # take subset of available study data based on requested `datasets`,
+    # expanding any project or pattern selectors
+    catalog = _load_catalog('studydata', path)
+    datasets = _select_datasets(catalog, datasets, project=project,
+                                pattern=pattern)
 
     # filter the dictionary of available datasets to only include those
     # requested by the user
-    # print(datasets)
-    info = {dset: _STUDYDATA.get(dset) for dset in datasets}
-    # print(info)
+    info = {dset: catalog.get(dset) for dset in datasets}
     return _download_data(info, "studydata", path=path, user=user, password=password,
-                          overwrite=overwrite, verbose=verbose)
+                          overwrite=overwrite, verbose=verbose, n_jobs=n_jobs)
 
 
-def fetch_genetics(datasets: str,
+def fetch_genetics(datasets: str = None,
                    path: str = None,
                    user: str = None,
                    password: str = None,
                    overwrite: bool = False,
-                   verbose: bool = True) -> List[str]:
+                   verbose: bool = True,
+                   project: Union[int, str, List] = None,
+                   pattern: Union[str, Pattern] = None,
+                   n_jobs: int = 1) -> List[str]:
     """
     Download specified genetics data `datasets` from the PPMI database.
 
@@ -318,6 +533,17 @@ def fetch_genetics(datasets: str,
         exist. Default: False
     verbose : bool, optional
         Whether to print progress bar as download occurs. Default: True
+    project : int or str or list, optional
+        Project number(s) (e.g., 118); all datasets belonging to the specified
+        project(s) are fetched in addition to `datasets`. See
+        :py:func:`pypmi.fetchable_genetics` for available projects. Default:
+        None
+    pattern : str or re.Pattern, optional
+        Glob pattern (e.g., '*WGS Variants - set*') or compiled regular
+        expression; all datasets whose name matches are fetched in addition to
+        `datasets`. Default: None
+    n_jobs : int, optional
+        Number of datasets to download concurrently. Default: 1
 
     Returns
     -------
@@ -328,20 +554,181 @@ def fetch_genetics(datasets: str,
     --------
     pypmi.fetchable_genetics
     """
-    url = "https://utilities.loni.usc.edu/download/genetic"
-    datasets = list(datasets)
+    # take subset of available genetics data based on requested `datasets`,
+    # expanding any project or pattern selectors
+    catalog = _load_catalog('genetics', path)
+    datasets = _select_datasets(catalog, datasets, project=project,
+                                pattern=pattern)
 
-    # take subset of available genetics data based on requested `datasets`
-    if isinstance(datasets, str) and datasets=='all':
-        datasets = fetchable_studydata()
+    info = {dset: catalog.get(dset) for dset in datasets}
 
-    # check for project designations in requested data
-    # for project in fetchable_genetics(projects=True):
-    #     if project in datasets:
-    #         datasets.remove(project)
-    #         datasets += [f for f in _GENETICS.keys() if project in f.lower()]
+    return _download_data(info, "genetics", path=path, user=user, password=password,
+                          overwrite=overwrite, verbose=verbose, n_jobs=n_jobs)
 
-    info = {dset: _GENETICS.get(dset) for dset in datasets}
 
-    return _download_data(info, "genetics", path=path, user=user, password=password,
-                          overwrite=overwrite, verbose=verbose)
+def refresh_metadata(datasets: str = None,
+                     type: str = 'studydata',
+                     path: str = None,
+                     user: str = None,
+                     password: str = None,
+                     verbose: bool = True,
+                     n_jobs: int = 1) -> Dict[str, Dict]:
+    """
+    Retrieve file metadata of `datasets` from the PPMI database.
+
+    File size, content type, and last-modified date are requested for each
+    dataset (without downloading it) and cached in the PPMI data directory,
+    where they are used by :py:func:`pypmi.catalog.describe_datasets` and to
+    schedule downloads.
+
+    Parameters
+    ----------
+    datasets : str or list, optional
+        Datasets for which to retrieve metadata, or 'all'. If not specified
+        metadata is only retrieved for datasets without cached metadata.
+        Default: None
+    type : {'studydata', 'genetics'}, optional
+        Type of datasets. Default: 'studydata'
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    user : str, optional
+        Email for user authentication to the LONI IDA database. If not supplied
+        will look for $PPMI_USER variable in environment. Default: None
+    password : str, optional
+        Password for user authentication to the LONI IDA database. If not
+        supplied will look for $PPMI_PASSWORD variable in environment. Default:
+        None
+    verbose : bool, optional
+        Whether to print status messages. Default: True
+    n_jobs : int, optional
+        Number of concurrent requests. Default: 1
+
+    Returns
+    -------
+    description : dict
+        Description of `datasets`, as returned by
+        :py:func:`pypmi.catalog.describe_datasets`
+
+    See Also
+    --------
+    pypmi.catalog.describe_datasets
+    """
+    catalog = _load_catalog(type, path)
+    metadata = _load_metadata(path)
+    if datasets is None:
+        datasets = [dset for dset, info in catalog.items()
+                    if info['id'] not in metadata[type]]
+    datasets = _select_datasets(catalog, datasets)
+
+    if len(datasets) > 0:
+        user, password = _get_cred(user, password)
+        session = _get_auth_session(user=user, password=password)
+        prefix = None
+        if type == 'studydata':
+            session.get(_LISTING_URLS['studydata'])
+        else:
+            prefix = _get_genetics_prefix(session)
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        if verbose:
+            print('Requesting metadata for {} datasets...'
+                  .format(len(datasets)))
+        ids = [catalog[dset]['id'] for dset in datasets]
+        n_jobs = max(1, min(n_jobs, len(ids)))
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            results = executor.map(
+                lambda fid: _head_file(session, type, fid, prefix=prefix), ids
+            )
+            metadata[type].update(zip(ids, results))
+        _save_metadata(metadata, path)
+
+    return describe_datasets(datasets, type=type, path=path)
+
+
+def refresh_catalog(type: str = None,
+                    path: str = None,
+                    user: str = None,
+                    password: str = None,
+                    verbose: bool = True) -> Dict[str, Dict[str, Dict]]:
+    """
+    Update the catalog of available datasets from the PPMI database listings.
+
+    The study data and genetics listing pages are downloaded and parsed into
+    catalog entries, which are cached in the PPMI data directory and take
+    precedence over the catalog distributed with `pypmi`. Listings are only
+    re-parsed when they have changed since the last refresh (as determined
+    by conditional requests and a hash of the page contents).
+
+    Parameters
+    ----------
+    type : {'studydata', 'genetics'}, optional
+        Catalog to refresh. If not specified all catalogs are refreshed.
+        Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    user : str, optional
+        Email for user authentication to the LONI IDA database. If not supplied
+        will look for $PPMI_USER variable in environment. Default: None
+    password : str, optional
+        Password for user authentication to the LONI IDA database. If not
+        supplied will look for $PPMI_PASSWORD variable in environment. Default:
+        None
+    verbose : bool, optional
+        Whether to print status messages. Default: True
+
+    Returns
+    -------
+    catalogs : dict
+        Mapping of refreshed catalog types to the updated catalogs
+
+    See Also
+    --------
+    pypmi.fetchable_studydata, pypmi.fetchable_genetics
+    """
+    types = CATALOG_TYPES if type is None else (_check_type(type),)
+    user, password = _get_cred(user, password)
+    session = _get_auth_session(user=user, password=password)
+
+    refreshed = _load_refreshed(path)
+    for ctype in types:
+        cached = refreshed.get(ctype, {})
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        r = session.get(_LISTING_URLS[ctype], headers=headers)
+        if r.status_code == 304:
+            if verbose:
+                print('Catalog of {} is up to date.'.format(ctype))
+            continue
+        r.raise_for_status()
+        sha256 = hashlib.sha256(r.content).hexdigest()
+        if sha256 == cached.get('sha256'):
+            if verbose:
+                print('Catalog of {} is up to date.'.format(ctype))
+            continue
+
+        entries = _merge_listing(_parse_listing(r.text, ctype), ctype)
+        if len(entries) == 0:
+            raise ValueError('Could not find any datasets in the {} listing; '
+                             'the catalog was not updated.'.format(ctype))
+        refreshed[ctype] = dict(
+            etag=r.headers.get('ETag'),
+            last_modified=r.headers.get('Last-Modified'),
+            sha256=sha256,
+            entries=entries
+        )
+        if verbose:
+            print('Found {} datasets in {} listing.'
+                  .format(len(entries), ctype))
+
+    _save_refreshed(refreshed, path)
+
+    return {ctype: _load_catalog(ctype, path) for ctype in types}
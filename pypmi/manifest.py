@@ -0,0 +1,535 @@
+# -*- coding: utf-8 -*-
+"""Functions for tracking PPMI data files downloaded to the data directory."""
+
+from contextlib import closing
+from datetime import datetime
+import hashlib
+import os
+from pathlib import Path
+import re
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from .catalog import CATALOG_TYPES, _load_catalog
+from .utils import _get_cache_dir, _get_data_dir
+
+if TYPE_CHECKING:
+    import sqlite3
+
+_DATETOKEN_RE = re.compile(r'\d{2}[A-Z][a-z]{2}\d{4}')
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    filename TEXT PRIMARY KEY,
+    template TEXT NOT NULL,
+    type TEXT,
+    dataset TEXT,
+    datetoken TEXT,
+    date TEXT,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER,
+    sha256 TEXT
+);
+CREATE INDEX IF NOT EXISTS files_template ON files (template, date);
+CREATE INDEX IF NOT EXISTS files_dataset ON files (type, dataset, date);
+"""
+_COLUMNS = ('filename', 'template', 'type', 'dataset', 'datetoken', 'date',
+            'size', 'mtime_ns', 'inode', 'sha256')
+
+
+def _get_templates(path: str = None) -> Dict[str, Tuple[str, str]]:
+    """
+    Return mapping of catalog filename templates to their datasets.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    templates : dict
+        Mapping of filename templates (e.g., 'Code_List_{DATETOKEN}.csv') to
+        (type, dataset name) tuples
+    """
+    templates = {}
+    for type in CATALOG_TYPES:
+        for name, info in _load_catalog(type, path).items():
+            templates.setdefault(info['filename'], (type, name))
+    return templates
+
+
+def _identify(filename: str,
+              templates: Dict[str, Tuple[str, str]]) -> Tuple[str, str, str, str]:
+    """
+    Identify the catalog dataset that `filename` was downloaded from.
+
+    Parameters
+    ----------
+    filename : str
+        Name of file in the PPMI data directory
+    templates : dict
+        Mapping of filename templates to datasets, as returned by
+        :py:func:`_get_templates`
+
+    Returns
+    -------
+    template : str
+        Catalog filename template matching `filename`, or `filename` itself
+        if it does not belong to a catalog dataset
+    type, dataset, datetoken : str
+        Catalog type, dataset name, and date token of `filename`, or None if
+        it does not belong to a catalog dataset
+    """
+    if filename in templates:
+        return (filename,) + templates[filename] + (None,)
+    match = _DATETOKEN_RE.search(filename)
+    if match is not None:
+        template = (filename[:match.start()] + '{DATETOKEN}'
+                    + filename[match.end():])
+        if template in templates:
+            return (template,) + templates[template] + (match.group(0),)
+    return filename, None, None, None
+
+
+def _parse_datetoken(datetoken: str) -> str:
+    """
+    Convert `datetoken` (e.g., '01Jan2024') into a sortable ISO date.
+
+    Parameters
+    ----------
+    datetoken : str
+        Date token, as formatted into downloaded filenames
+
+    Returns
+    -------
+    date : str
+        ISO formatted date (e.g., '2024-01-01'), or None if `datetoken` is
+        None or invalid
+    """
+    if datetoken is None:
+        return None
+    try:
+        return datetime.strptime(datetoken, '%d%b%Y').date().isoformat()
+    except ValueError:
+        return None
+
+
+def _hash_file(fname: Path, blocksize: int = 1 << 20) -> str:
+    """
+    Compute SHA-256 hash of contents of `fname`.
+
+    Parameters
+    ----------
+    fname : pathlib.Path
+        Filepath to hash
+    blocksize : int, optional
+        Number of bytes to read at a time. Default: 1 MiB
+
+    Returns
+    -------
+    sha256 : str
+        Hexadecimal digest of file contents
+    """
+    sha256 = hashlib.sha256()
+    with open(fname, 'rb') as src:
+        for block in iter(lambda: src.read(blocksize), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def _connect(path: str = None) -> 'sqlite3.Connection':
+    """
+    Open index of files in the PPMI data directory `path`.
+
+    If the index does not yet exist it is created from the files currently
+    in the data directory (without computing their hashes).
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    conn : sqlite3.Connection
+        Connection to index
+    """
+    import sqlite3
+
+    fname = _get_cache_dir(path) / 'manifest.sqlite'
+    exists = fname.is_file()
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(fname, timeout=60)
+    conn.row_factory = sqlite3.Row
+    with conn:
+        conn.executescript(_SCHEMA)
+    if not exists:
+        data_dir = _get_data_dir(path)
+        with os.scandir(data_dir) as entries:
+            files = [data_dir / e.name for e in entries if e.is_file()]
+        _register_files(conn, files, path=path)
+    return conn
+
+
+def _relname(fname: Path, data_dir: Path) -> str:
+    """
+    Return name of `fname` relative to `data_dir`, as stored in the index.
+
+    Symlinks are not resolved, such that files linked into the data directory
+    from elsewhere are indexed under their name in the data directory.
+    """
+    return Path(os.path.relpath(os.path.abspath(fname), data_dir)).as_posix()
+
+
+def _register_files(conn: 'sqlite3.Connection',
+                    files: List[Path],
+                    hashes: List[str] = None,
+                    path: str = None) -> None:
+    """
+    Add (or update) `files` in the index of the PPMI data directory.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to index, as returned by :py:func:`_connect`
+    files : list of pathlib.Path
+        Filepaths to files in the PPMI data directory
+    hashes : list of str, optional
+        SHA-256 hashes of `files`, if known. Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+    """
+    data_dir = _get_data_dir(path)
+    templates = _get_templates(path)
+    if hashes is None:
+        hashes = [None] * len(files)
+    rows = []
+    for fname, sha256 in zip(files, hashes):
+        fname = Path(fname)
+        stat = fname.stat()
+        relname = _relname(fname, data_dir)
+        template, type, dataset, datetoken = _identify(relname, templates)
+        rows.append((relname, template, type, dataset, datetoken,
+                     _parse_datetoken(datetoken), stat.st_size,
+                     stat.st_mtime_ns, stat.st_ino, sha256))
+    with conn:
+        conn.executemany(
+            'INSERT OR REPLACE INTO files ({}) VALUES ({})'
+            .format(', '.join(_COLUMNS), ', '.join('?' * len(_COLUMNS))),
+            rows
+        )
+
+
+def _record_downloads(files: List[Path],
+                      hashes: List[str] = None,
+                      path: str = None) -> None:
+    """
+    Record downloaded `files` in the index of the PPMI data directory.
+
+    Parameters
+    ----------
+    files : list of pathlib.Path
+        Filepaths to downloaded files
+    hashes : list of str, optional
+        SHA-256 hashes of `files`, if known. Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+    """
+    with closing(_connect(path)) as conn:
+        _register_files(conn, files, hashes=hashes, path=path)
+
+
+def _get_hash(fname: Path, path: str = None) -> str:
+    """
+    Return SHA-256 hash of `fname`, re-using the hash stored in the index.
+
+    The stored hash is only used if the size, modification time, and inode of
+    `fname` match those in the index; otherwise, the file is hashed again and
+    the index is updated.
+
+    Parameters
+    ----------
+    fname : pathlib.Path
+        Filepath to file in the PPMI data directory
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    sha256 : str
+        Hex digest of `fname`
+    """
+    data_dir = _get_data_dir(path)
+    fname = Path(fname)
+    stat = fname.stat()
+    relname = _relname(fname, data_dir)
+    with closing(_connect(path)) as conn:
+        row = conn.execute('SELECT size, mtime_ns, inode, sha256 FROM files '
+                           'WHERE filename = ?', (relname,)).fetchone()
+        if row is not None and row['sha256'] is not None \
+                and (row['size'], row['mtime_ns'], row['inode']) == \
+                (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+            return row['sha256']
+        sha256 = _hash_file(fname)
+        _register_files(conn, [fname], hashes=[sha256], path=path)
+    return sha256
+
+
+def _find_files(template: str,
+                datetoken: str = None,
+                path: str = None) -> List[Path]:
+    """
+    Find files downloaded for catalog filename `template`, newest first.
+
+    Index entries for files that no longer exist are removed.
+
+    Parameters
+    ----------
+    template : str
+        Catalog filename template (e.g., 'Code_List_{DATETOKEN}.csv')
+    datetoken : str, optional
+        Only find files with this date token (e.g., '01Jan2024'). Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    files : list of pathlib.Path
+        Filepaths to downloaded files
+    """
+    data_dir = _get_data_dir(path)
+    query = 'SELECT filename FROM files WHERE template = ?'
+    params = [template]
+    if datetoken is not None:
+        query += ' AND datetoken = ?'
+        params.append(datetoken)
+    query += ' ORDER BY date DESC, mtime_ns DESC'
+
+    with closing(_connect(path)) as conn:
+        files, missing = [], []
+        for row in conn.execute(query, params):
+            fname = data_dir / row['filename']
+            (files if fname.is_file() else missing).append(fname)
+        if missing:
+            with conn:
+                conn.executemany(
+                    'DELETE FROM files WHERE filename = ?',
+                    [(fname.relative_to(data_dir).as_posix(),)
+                     for fname in missing]
+                )
+    return files
+
+
+def list_local(type: str = None, path: str = None) -> List[Dict]:
+    """
+    List PPMI datasets that have been downloaded to the data directory.
+
+    Parameters
+    ----------
+    type : {'studydata', 'genetics'}, optional
+        Only list datasets of this type. If not specified all downloaded
+        files, including those that do not belong to a catalog dataset, are
+        listed. Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    files : list of dict
+        Downloaded files, each with keys 'filename', 'template', 'type',
+        'dataset', 'datetoken', 'date', 'size', 'mtime_ns', 'inode', and
+        'sha256'
+
+    See Also
+    --------
+    pypmi.manifest.latest_local
+    """
+    query = 'SELECT * FROM files'
+    params = []
+    if type is not None:
+        query += ' WHERE type = ?'
+        params.append(type)
+    query += ' ORDER BY type, dataset, date'
+    with closing(_connect(path)) as conn:
+        return [dict(row) for row in conn.execute(query, params)]
+
+
+def latest_local(dataset: str,
+                 type: str = 'studydata',
+                 path: str = None) -> Path:
+    """
+    Return the most recent downloaded version of `dataset`.
+
+    Parameters
+    ----------
+    dataset : str
+        Name of dataset, as listed in :py:func:`pypmi.fetchable_studydata` or
+        :py:func:`pypmi.fetchable_genetics`
+    type : {'studydata', 'genetics'}, optional
+        Type of `dataset`. Default: 'studydata'
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    fname : pathlib.Path
+        Filepath to the most recent version of `dataset`, or None if it has
+        not been downloaded
+
+    See Also
+    --------
+    pypmi.manifest.list_local
+    """
+    info = _load_catalog(type, path).get(dataset)
+    if info is None:
+        raise ValueError('Provided dataset {} not available. Please see '
+                         'fetchable_{}() for valid entries.'
+                         .format(dataset, type))
+    files = _find_files(info['filename'], path=path)
+    return files[0] if files else None
+
+
+def _walk(directory: Path) -> Dict[str, os.stat_result]:
+    """
+    Recursively stat all files in `directory`, skipping the `pypmi` cache.
+
+    Parameters
+    ----------
+    directory : pathlib.Path
+        Directory to scan
+
+    Returns
+    -------
+    stats : dict
+        Mapping of filepaths to their stat results
+    """
+    stats, stack = {}, [directory]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != '.pypmi':
+                        stack.append(entry.path)
+                elif entry.is_file():
+                    stats[entry.path] = entry.stat()
+    return stats
+
+
+def _scan(data_dir: Path, n_jobs: int = 1) -> Dict[str, os.stat_result]:
+    """
+    Stat all files in `data_dir`, scanning sub-directories concurrently.
+
+    Parameters
+    ----------
+    data_dir : pathlib.Path
+        PPMI data directory
+    n_jobs : int, optional
+        Number of sub-directories to scan concurrently. Default: 1
+
+    Returns
+    -------
+    stats : dict
+        Mapping of filepaths relative to `data_dir` to their stat results
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    stats, subdirs = {}, []
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name != '.pypmi':
+                    subdirs.append(Path(entry.path))
+            elif entry.is_file():
+                stats[entry.path] = entry.stat()
+    with ThreadPoolExecutor(max_workers=max(1, n_jobs)) as executor:
+        for substats in executor.map(_walk, subdirs):
+            stats.update(substats)
+    return {Path(fn).relative_to(data_dir).as_posix(): stat
+            for fn, stat in stats.items()}
+
+
+def rescan(path: str = None,
+           hash: bool = True,
+           n_jobs: int = 1,
+           verbose: bool = False) -> Dict[str, List[str]]:
+    """
+    Update the index of the PPMI data directory with changes made on disk.
+
+    Files added, modified, or removed outside of `pypmi` (e.g., by unzipping
+    archives or mirroring the data directory) are detected by comparing their
+    size, modification time, and inode with the index, such that only new
+    or modified files need to be hashed.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    hash : bool, optional
+        Whether to compute hashes of new and modified files, as well as of
+        unchanged files that have not been hashed yet. Default: True
+    n_jobs : int, optional
+        Number of sub-directories to scan, and files to hash, concurrently.
+        Default: 1
+    verbose : bool, optional
+        Whether to print a summary of detected changes. Default: False
+
+    Returns
+    -------
+    changes : dict
+        With keys 'added', 'modified', and 'removed', listing the filenames
+        (relative to the data directory) that changed since the last scan
+
+    See Also
+    --------
+    pypmi.manifest.list_local
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    data_dir = _get_data_dir(path)
+    stats = _scan(data_dir, n_jobs=n_jobs)
+
+    with closing(_connect(path)) as conn:
+        indexed = {
+            row['filename']: row for row in
+            conn.execute('SELECT filename, size, mtime_ns, inode, sha256 '
+                         'FROM files')
+        }
+        added = [fn for fn in stats if fn not in indexed]
+        removed = [fn for fn in indexed if fn not in stats]
+        modified, unhashed = [], []
+        for fn, stat in stats.items():
+            row = indexed.get(fn)
+            if row is None:
+                continue
+            if (row['size'], row['mtime_ns'], row['inode']) != \
+                    (stat.st_size, stat.st_mtime_ns, stat.st_ino):
+                modified.append(fn)
+            elif row['sha256'] is None:
+                unhashed.append(fn)
+
+        update = added + modified + (unhashed if hash else [])
+        files = [data_dir / fn for fn in update]
+        hashes = None
+        if hash:
+            with ThreadPoolExecutor(max_workers=max(1, n_jobs)) as executor:
+                hashes = list(executor.map(_hash_file, files))
+        _register_files(conn, files, hashes=hashes, path=path)
+        with conn:
+            conn.executemany('DELETE FROM files WHERE filename = ?',
+                             [(fn,) for fn in removed])
+
+    if verbose:
+        print('Found {} added, {} modified, and {} removed files.'
+              .format(len(added), len(modified), len(removed)))
+
+    return dict(added=added, modified=modified, removed=removed)
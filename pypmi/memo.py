@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+"""Functions for memoizing data frames derived from PPMI study data."""
+
+from contextlib import closing
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List
+
+from .manifest import _get_hash, latest_local
+from .schema import _DICTIONARY
+from .utils import _atomic_write, _get_cache_dir
+
+if TYPE_CHECKING:
+    import sqlite3
+
+    import pandas as pd
+
+_MAX_SIZE = 1 << 30
+_CATEGORIES_KEY = b'pypmi.categories'
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    function TEXT NOT NULL,
+    datasets TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used REAL NOT NULL
+);
+"""
+
+
+def _get_memo_dir(path: str = None) -> Path:
+    """Return directory where memoized results for `path` are stored."""
+    return _get_cache_dir(path) / 'memo'
+
+
+def _get_max_size() -> int:
+    """
+    Get maximum size of memoized results, searching environment if necessary.
+
+    Returns
+    -------
+    max_size : int
+        Maximum size (in bytes) of memoized results, taken from environmental
+        variable $PPMI_MEMO_SIZE if set. Default: 1 GiB
+    """
+    try:
+        return int(os.environ['PPMI_MEMO_SIZE'])
+    except (KeyError, ValueError):
+        return _MAX_SIZE
+
+
+def _connect(memo_dir: Path) -> 'sqlite3.Connection':
+    """
+    Open index of memoized results in `memo_dir`, creating it if necessary.
+
+    Parameters
+    ----------
+    memo_dir : pathlib.Path
+        Directory where memoized results are stored
+
+    Returns
+    -------
+    conn : sqlite3.Connection
+        Connection to index
+    """
+    import sqlite3
+
+    memo_dir.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(memo_dir / 'index.sqlite', timeout=60)
+    conn.row_factory = sqlite3.Row
+    with conn:
+        conn.executescript(_SCHEMA)
+    return conn
+
+
+def _remove(keys: List[str], memo_dir: Path) -> None:
+    """Remove memoized results `keys` from `memo_dir`, if they exist."""
+    for key in keys:
+        try:
+            os.remove(memo_dir / '{}.parquet'.format(key))
+        except FileNotFoundError:
+            pass
+
+
+def _evict(conn: 'sqlite3.Connection', max_size: int) -> List[str]:
+    """
+    Remove least recently used results from index until under `max_size`.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to index of memoized results, in a transaction
+    max_size : int
+        Maximum total size (in bytes) of memoized results
+
+    Returns
+    -------
+    evicted : list of str
+        Keys of results removed from the index, whose files should be removed
+    """
+    rows = conn.execute('SELECT key, size FROM results ORDER BY used')
+    rows = rows.fetchall()
+    total = sum(row['size'] for row in rows)
+    evicted = []
+    for row in rows:
+        if total <= max_size:
+            break
+        total -= row['size']
+        evicted.append(row['key'])
+    conn.executemany('DELETE FROM results WHERE key = ?',
+                     [(key,) for key in evicted])
+    return evicted
+
+
+def _encode(value):
+    """
+    Convert `value` into JSON-serializable form that preserves its order.
+
+    Mappings are converted to lists of their items rather than serialized
+    with sorted keys, since the order of their keys may determine the result
+    of a loader (e.g., the order of columns). Sets are sorted.
+    """
+    if isinstance(value, dict):
+        return [['dict'], [[_encode(k), _encode(v)] for k, v in value.items()]]
+    if isinstance(value, (set, frozenset)):
+        return [['set'], sorted((_encode(v) for v in value), key=repr)]
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _get_key(func: Callable, arguments: Dict, datasets: List[str],
+             path: str = None) -> str:
+    """
+    Return key identifying call of `func` with `arguments` on `datasets`.
+
+    Parameters
+    ----------
+    func : callable
+        Memoized function
+    arguments : dict
+        Arguments `func` is called with, other than `path`
+    datasets : list of str
+        Names of study data `func` reads
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    key : str
+        Hex digest of `func`, `arguments`, the version of `pypmi` (which
+        determines the code of `func`), and the hashes of the files of
+        `datasets` (and of the Data Dictionary, which determines their
+        dtypes), or None if any of `datasets` has not been downloaded
+    """
+    from . import __version__
+
+    hashes = []
+    for dataset in sorted(set(datasets)):
+        fname = latest_local(dataset, path=path)
+        if fname is None:
+            return None
+        hashes.append((dataset, _get_hash(fname, path=path)))
+    fname = latest_local(_DICTIONARY, path=path)
+    if fname is not None:
+        hashes.append((_DICTIONARY, _get_hash(fname, path=path)))
+    description = json.dumps(
+        ['{}.{}'.format(func.__module__, func.__qualname__),
+         _encode(arguments), __version__, hashes], default=repr
+    )
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def memoize(inputs: Callable) -> Callable:
+    """
+    Memoize data frames returned by a loader of PPMI study data on disk.
+
+    Results are keyed by the decorated function, its arguments, the version
+    of `pypmi`, and the hashes of the study data files it reads, and stored
+    as Parquet files in the cache of the data directory. When their total
+    size exceeds $PPMI_MEMO_SIZE bytes (default: 1 GiB) the least recently
+    used results are removed. Results that read a dataset are also removed
+    when :py:func:`pypmi.fetch_studydata` downloads a new version of it.
+
+    Parameters
+    ----------
+    inputs : callable
+        Function accepting the same arguments as the decorated function and
+        returning the names of the study data it reads, as listed in
+        :py:func:`pypmi.fetchable_studydata`. The decorated function must
+        accept a `path` argument specifying the data directory.
+
+    Returns
+    -------
+    decorator : callable
+        Decorator memoizing the decorated function
+    """
+    def decorator(func):
+        import inspect
+
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            from .readers import _has_pyarrow
+
+            if not _has_pyarrow():
+                return func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            path = arguments.pop('path', None)
+            datasets = inputs(*args, **kwargs)
+            key = _get_key(func, arguments, datasets, path)
+            if key is None:
+                return func(*args, **kwargs)
+            return _call(func, args, kwargs, key, datasets, path)
+
+        return wrapper
+
+    return decorator
+
+
+def _write_result(result: 'pd.DataFrame', fname: Path) -> bool:
+    """
+    Write memoized `result` to Parquet `fname`.
+
+    Parquet only reads back string columns as categoricals, so categories of
+    other categorical columns (e.g., of integer codes) are stored alongside.
+
+    Parameters
+    ----------
+    result : pandas.DataFrame
+        Result to memoize
+    fname : pathlib.Path
+        Filepath to memoized result
+
+    Returns
+    -------
+    written : bool
+        Whether `result` could be written
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        table = pa.Table.from_pandas(result)
+        categories = {
+            col: [dtype.categories.tolist(), bool(dtype.ordered)]
+            for col, dtype in result.dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype)
+            and not pd.api.types.is_string_dtype(dtype.categories)
+        }
+        metadata = dict(table.schema.metadata or {})
+        metadata[_CATEGORIES_KEY] = json.dumps(categories).encode()
+    except (TypeError, ValueError, pa.ArrowInvalid, pa.ArrowTypeError):
+        return False
+    with _atomic_write(fname) as tmp:
+        pq.write_table(table.replace_schema_metadata(metadata), tmp)
+    return True
+
+
+def _read_result(fname: Path) -> 'pd.DataFrame':
+    """
+    Read memoized result from Parquet `fname`.
+
+    Parameters
+    ----------
+    fname : pathlib.Path
+        Filepath to memoized result
+
+    Returns
+    -------
+    result : pandas.DataFrame
+        Memoized result
+    """
+    import pandas as pd
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(fname)
+    categories = json.loads(
+        (table.schema.metadata or {}).get(_CATEGORIES_KEY, b'{}')
+    )
+    result = table.to_pandas()
+    for col, (cats, ordered) in categories.items():
+        result[col] = result[col].astype(pd.CategoricalDtype(cats, ordered))
+    return result
+
+
+def _call(func: Callable, args: tuple, kwargs: dict, key: str,
+          datasets: List[str], path: str = None) -> 'pd.DataFrame':
+    """
+    Return memoized result `key` of `func`, calling it if not available.
+
+    Parameters
+    ----------
+    func : callable
+        Memoized function
+    args, kwargs
+        Arguments to call `func` with
+    key : str
+        Key identifying the result, as returned by :py:func:`_get_key`
+    datasets : list of str
+        Names of study data `func` reads
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    result : pandas.DataFrame
+        Result of calling `func`
+    """
+    import pyarrow as pa
+
+    memo_dir = _get_memo_dir(path)
+    fname = memo_dir / '{}.parquet'.format(key)
+    with closing(_connect(memo_dir)) as conn:
+        with conn:
+            found = conn.execute('UPDATE results SET used = ? WHERE key = ?',
+                                 (time.time(), key)).rowcount
+        if found:
+            try:
+                return _read_result(fname)
+            except (OSError, pa.ArrowInvalid):
+                with conn:
+                    conn.execute('DELETE FROM results WHERE key = ?', (key,))
+
+        result = func(*args, **kwargs)
+        if not _write_result(result, fname):
+            return result
+        # other processes may update the index concurrently, so it is locked
+        # while the result is added and others are evicted
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)',
+                         (key, func.__qualname__,
+                          json.dumps(sorted(set(datasets))),
+                          fname.stat().st_size, time.time()))
+            evicted = _evict(conn, _get_max_size())
+    _remove(evicted, memo_dir)
+    return result
+
+
+def _invalidate(datasets: List[str], path: str = None) -> None:
+    """
+    Remove memoized results that read any of `datasets`.
+
+    All results are removed if `datasets` includes the Data Dictionary.
+
+    Parameters
+    ----------
+    datasets : list of str
+        Names of study data that have changed
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+    """
+    memo_dir = _get_memo_dir(path)
+    if not (memo_dir / 'index.sqlite').is_file():
+        return
+    with closing(_connect(memo_dir)) as conn:
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            stale = [
+                row['key'] for row in
+                conn.execute('SELECT key, datasets FROM results')
+                if _DICTIONARY in datasets
+                or set(json.loads(row['datasets'])).intersection(datasets)
+            ]
+            conn.executemany('DELETE FROM results WHERE key = ?',
+                             [(key,) for key in stale])
+    _remove(stale, memo_dir)
+
+
+def clear_memo(path: str = None) -> None:
+    """
+    Remove all memoized results of loaders (e.g., ``load_behavior``).
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    """
+    memo_dir = _get_memo_dir(path)
+    if not memo_dir.is_dir():
+        return
+    with closing(_connect(memo_dir)) as conn:
+        with conn:
+            conn.execute('DELETE FROM results')
+    # results of processes that failed before indexing them are removed, too
+    for fname in memo_dir.glob('*.parquet'):
+        fname.unlink()
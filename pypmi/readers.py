@@ -0,0 +1,1760 @@
+# -*- coding: utf-8 -*-
+"""Functions for reading tabular PPMI data downloaded to the data directory."""
+
+import copy
+import io
+import json
+import os
+from pathlib import Path
+import warnings
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, Tuple
+
+from .catalog import _load_catalog
+from .manifest import (_get_templates, _hash_file, _identify, latest_local,
+                       list_local)
+from .schema import _schema_key, get_schema
+from .utils import _atomic_write, _get_cache_dir, _get_data_dir
+
+if TYPE_CHECKING:
+    import sqlite3
+
+    import numpy as np
+    import pandas as pd
+    import polars as pl
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+_SOURCE_KEY = b'pypmi.source'
+_BACKENDS = ('pandas', 'polars')
+
+
+def _has_pyarrow() -> bool:
+    """Return whether `pyarrow` is available for caching converted tables."""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _get_table_cache(template: str,
+                     path: str = None,
+                     store: str = 'tables',
+                     suffix: str = '.parquet') -> Path:
+    """
+    Return filepath to the columnar cache of CSV filename `template`.
+
+    Parameters
+    ----------
+    template : str
+        Catalog filename template (e.g., 'Code_List_{DATETOKEN}.csv')
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+    store : str, optional
+        Name of cache sub-directory. Default: 'tables'
+    suffix : str, optional
+        File extension of cache. Default: '.parquet'
+
+    Returns
+    -------
+    cache : pathlib.Path
+        Filepath to cache (e.g., '.pypmi/tables/Code_List.parquet')
+    """
+    stem = template.replace('_{DATETOKEN}', '').replace('{DATETOKEN}', '')
+    return _get_cache_dir(path) / store / Path(stem).with_suffix(suffix)
+
+
+def _read_csv(fname: Path, dtype: Dict[str, str] = None,
+              **kwargs) -> 'pd.DataFrame':
+    """
+    Read CSV file `fname`, inferring column dtypes from the whole file.
+
+    Parameters
+    ----------
+    fname : pathlib.Path
+        Filepath to CSV file
+    dtype : dict, optional
+        Mapping of column names to dtypes, as returned by
+        :py:func:`pypmi.schema.get_schema`, used instead of inferring them.
+        If the data do not match these dtypes (e.g., a numeric column has
+        text entries in a new release) a warning is raised and dtypes are
+        inferred instead. Default: None
+    kwargs : key-value pairs
+        Passed to :py:func:`pandas.read_csv`
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        Loaded data
+    """
+    import pandas as pd
+
+    if dtype:
+        try:
+            return pd.read_csv(fname, dtype=dtype, low_memory=False, **kwargs)
+        except (TypeError, ValueError) as err:
+            _warn_drift(fname, err)
+    return pd.read_csv(fname, low_memory=False, **kwargs)
+
+
+def _warn_drift(fname: Path, err: Exception) -> None:
+    """Warn that columns of `fname` do not match the Data Dictionary."""
+    warnings.warn('Columns of {} do not match their dtypes in the Data '
+                  'Dictionary ({}); inferring dtypes instead.'
+                  .format(Path(fname).name, err), stacklevel=3)
+
+
+def _read_cache(cache: Path,
+                fname: Path,
+                columns: List[str] = None,
+                filters: 'pc.Expression' = None,
+                schema: str = None) -> 'pd.DataFrame':
+    """
+    Read table from `cache` if it was converted from the current `fname`.
+
+    The cache is considered valid when the size and modification time of
+    `fname` (and the dtypes it was converted with) match those it was
+    converted from. If only the modification time
+    differs (e.g., the file was re-downloaded or copied) the content hash of
+    `fname` is compared instead, and the cache is updated to the new
+    modification time if the contents are unchanged.
+
+    Parameters
+    ----------
+    cache : pathlib.Path
+        Filepath to Parquet cache
+    fname : pathlib.Path
+        Filepath to source CSV file
+    columns : list of str, optional
+        Columns to read from the cache. Default: None
+    filters : pyarrow.compute.Expression or callable, optional
+        Row filter applied while reading, or function returning it given the
+        :py:class:`pyarrow.Schema` of the cache. Default: None
+    schema : str, optional
+        Key of the dtypes the cache should have been converted with, as
+        returned by :py:func:`pypmi.schema._schema_key`. Default: None
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        Cached data, or None if the cache is missing or stale
+    """
+    import pyarrow.parquet as pq
+
+    arrow_schema = _validate_cache(cache, fname, schema)
+    if arrow_schema is None:
+        return None
+    if columns is not None:
+        _check_columns(columns, arrow_schema.names, fname)
+    if callable(filters):
+        filters = filters(arrow_schema)
+    return pq.read_table(cache, columns=columns, filters=filters).to_pandas()
+
+
+def _validate_cache(cache: Path,
+                    fname: Path,
+                    schema: str = None) -> 'pa.Schema':
+    """
+    Check whether `cache` was converted from the current `fname`.
+
+    See :py:func:`_read_cache` for when the cache is considered valid.
+
+    Parameters
+    ----------
+    cache : pathlib.Path
+        Filepath to Parquet cache
+    fname : pathlib.Path
+        Filepath to source CSV file
+    schema : str, optional
+        Key of the dtypes the cache should have been converted with.
+        Default: None
+
+    Returns
+    -------
+    arrow_schema : pyarrow.Schema
+        Schema of the cached table, or None if the cache is missing or stale
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        arrow_schema = pq.read_schema(cache)
+    except (OSError, pa.ArrowInvalid):
+        return None
+    source = json.loads(
+        (arrow_schema.metadata or {}).get(_SOURCE_KEY, b'{}')
+    )
+    stat = fname.stat()
+    if source.get('filename') != fname.name \
+            or source.get('size') != stat.st_size \
+            or source.get('schema') != schema:
+        return None
+
+    if source.get('mtime_ns') != stat.st_mtime_ns:
+        if source.get('sha256') != _hash_file(fname):
+            return None
+        source['mtime_ns'] = stat.st_mtime_ns
+        _write_cache(pq.read_table(cache), cache, source)
+    return arrow_schema
+
+
+def _check_columns(columns: List[str], available: List[str],
+                   fname: Path) -> None:
+    """Raise ValueError if any of `columns` are not `available` in `fname`."""
+    missing = [col for col in columns if col not in available]
+    if missing:
+        raise ValueError('Provided columns {} not available in {}.'
+                         .format(missing, fname.name))
+
+
+def _write_cache(table: 'pa.Table', cache: Path, source: dict) -> None:
+    """
+    Write `table` converted from `source` file to Parquet `cache`.
+
+    Parameters
+    ----------
+    table : pyarrow.Table
+        Table to write
+    cache : pathlib.Path
+        Filepath to Parquet cache
+    source : dict
+        Description of source file, with keys 'filename', 'size', 'mtime_ns',
+        and 'sha256'
+    """
+    import pyarrow.parquet as pq
+
+    metadata = dict(table.schema.metadata or {})
+    metadata[_SOURCE_KEY] = json.dumps(source).encode()
+    table = table.replace_schema_metadata(metadata)
+    with _atomic_write(cache) as tmp:
+        pq.write_table(table, tmp)
+
+
+def read_studydata(name: str,
+                   path: str = None,
+                   cache: bool = True,
+                   columns: List[str] = None,
+                   backend: str = 'pandas') -> 'pd.DataFrame':
+    """
+    Read tabular study data `name` downloaded to the data directory.
+
+    The most recently downloaded version of `name` is read, with the column
+    dtypes listed in the Data Dictionary if it has been downloaded (see
+    :py:func:`pypmi.schema.get_schema`) or as inferred by pandas otherwise.
+    The first time a CSV file is read it is converted to a Parquet file in
+    the cache of the data directory, which is used for subsequent reads until
+    the CSV file (or the Data Dictionary) changes. Caching requires `pyarrow`;
+    if it is not installed the CSV file is read on every call.
+
+    Parameters
+    ----------
+    name : str
+        Name of dataset, as listed in :py:func:`pypmi.fetchable_studydata`
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    cache : bool, optional
+        Whether to read from (and write to) the columnar cache. Default: True
+    columns : list of str, optional
+        Columns to read. Only these columns are read from the cache (or
+        parsed from the CSV file, if not caching). If not specified all
+        columns are read. Default: None
+    backend : {'pandas', 'polars'}, optional
+        Library to load data with. If 'polars' the data are not loaded but
+        scanned lazily from the cache (or, if not caching, from the CSV file
+        with the dtypes of the Data Dictionary), such that further filters
+        and joins are planned together and run multi-threaded. Values that
+        do not match the dtypes of the Data Dictionary then raise an error
+        once the frame is collected, rather than falling back to inferred
+        dtypes. Only this function and :py:func:`pypmi.readers.query` support
+        polars; the loaders of :py:mod:`pypmi.datasets` return pandas data
+        frames. Default: 'pandas'
+
+    Returns
+    -------
+    data : pandas.DataFrame or polars.LazyFrame
+        Loaded data
+
+    Raises
+    ------
+    FileNotFoundError
+        If `name` has not been downloaded
+    ValueError
+        If `name` is not tabular data, any of `columns` are not available, or
+        `backend` is not supported
+
+    See Also
+    --------
+    pypmi.fetch_studydata
+    """
+    _check_backend(backend)
+    if backend == 'polars':
+        return _scan_polars(name, columns=columns, path=path, cache=cache)
+
+    fname, template = _locate_studydata(name, path)
+    dtypes = get_schema(name, path)
+
+    if not (cache and _has_pyarrow()):
+        if columns is None:
+            return _read_csv(fname, dtype=dtypes)
+        wanted = set(columns)
+        data = _read_csv(fname, dtype=dtypes,
+                         usecols=lambda col: col in wanted)
+        _check_columns(columns, data.columns, fname)
+        return data[columns]
+
+    cache_file = _get_table_cache(template, path)
+    data = _read_cache(cache_file, fname, columns=columns,
+                       schema=_schema_key(dtypes))
+    if data is not None:
+        return data
+
+    data = _convert(fname, cache_file, dtypes)
+    if columns is not None:
+        _check_columns(columns, data.columns, fname)
+    return data if columns is None else data[columns]
+
+
+def _locate_studydata(name: str, path: str = None) -> Tuple[Path, str]:
+    """
+    Find most recently downloaded CSV file of study data `name`.
+
+    Parameters
+    ----------
+    name : str
+        Name of dataset, as listed in :py:func:`pypmi.fetchable_studydata`
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    fname : pathlib.Path
+        Filepath to downloaded CSV file
+    template : str
+        Catalog filename template of `name`
+
+    Raises
+    ------
+    FileNotFoundError
+        If `name` has not been downloaded
+    ValueError
+        If `name` is not tabular data
+    """
+    fname = latest_local(name, type='studydata', path=path)
+    template = _load_catalog('studydata', path)[name]['filename']
+    if not template.endswith('.csv'):
+        raise ValueError('Provided dataset {} is not tabular (csv) data.'
+                         .format(name))
+    if fname is None:
+        raise FileNotFoundError('Provided dataset {} has not been downloaded. '
+                                'Please use fetch_studydata() to download it '
+                                'first.'.format(name))
+    return fname, template
+
+
+def _convert(fname: Path,
+             cache: Path,
+             dtypes: Dict[str, str] = None) -> 'pd.DataFrame':
+    """
+    Read CSV file `fname` and convert it to Parquet `cache`.
+
+    Parameters
+    ----------
+    fname : pathlib.Path
+        Filepath to CSV file
+    cache : pathlib.Path
+        Filepath to Parquet cache
+    dtypes : dict, optional
+        Mapping of column names to dtypes. Default: None
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        Loaded data
+    """
+    import pyarrow as pa
+
+    stat = fname.stat()
+    data = _read_csv(fname, dtype=dtypes)
+    source = dict(filename=fname.name, size=stat.st_size,
+                  mtime_ns=stat.st_mtime_ns, sha256=_hash_file(fname),
+                  schema=_schema_key(dtypes))
+    try:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # columns pyarrow cannot represent (e.g., mixed-type objects) are
+        # rare; such tables are simply read from the CSV file every time
+        return data
+    _write_cache(table, cache, source)
+    return data
+
+
+def _check_backend(backend: str) -> None:
+    """Raise ValueError if `backend` is not a supported data frame library."""
+    if backend not in _BACKENDS:
+        raise ValueError('Provided backend {} not supported. Please choose '
+                         'from {}.'.format(backend, list(_BACKENDS)))
+
+
+def _scan_polars(name: str,
+                 columns: List[str] = None,
+                 path: str = None,
+                 cache: bool = True,
+                 required: List[str] = ()) -> 'pl.LazyFrame':
+    """
+    Lazily scan tabular study data `name` with :py:mod:`polars`.
+
+    Parameters
+    ----------
+    name : str
+        Name of dataset, as listed in :py:func:`pypmi.fetchable_studydata`
+    columns : list of str, optional
+        Columns to select. Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+    cache : bool, optional
+        Whether to scan (and write) the columnar cache. Default: True
+    required : list of str, optional
+        Columns that must be available, in addition to `columns`. Default: ()
+
+    Returns
+    -------
+    frame : polars.LazyFrame
+        Lazy scan of `name`
+    """
+    import polars as pl
+
+    fname, template = _locate_studydata(name, path)
+    frame = None
+    if cache and _has_pyarrow():
+        dtypes = get_schema(name, path)
+        schema = _schema_key(dtypes)
+        cache_file = _get_table_cache(template, path)
+        arrow_schema = _validate_cache(cache_file, fname, schema)
+        if arrow_schema is None:
+            data = _convert(fname, cache_file, dtypes)
+            arrow_schema = _validate_cache(cache_file, fname, schema)
+        if arrow_schema is not None:
+            frame = pl.scan_parquet(cache_file)
+        else:
+            # tables that could not be cached are loaded with pandas
+            frame = pl.from_pandas(data).lazy()
+    if frame is None:
+        frame = pl.scan_csv(fname, infer_schema_length=None,
+                            schema_overrides=_polars_schema(
+                                get_schema(name, path)))
+    _check_columns(list(columns or []) + list(required),
+                   frame.collect_schema().names(), fname)
+    return frame if columns is None else frame.select(columns)
+
+
+def _polars_schema(dtypes: Dict[str, str]) -> Dict[str, 'pl.DataType']:
+    """
+    Convert pandas `dtypes` from the Data Dictionary to :py:mod:`polars` types.
+
+    Parameters
+    ----------
+    dtypes : dict
+        Mapping of columns to pandas dtypes, as returned by
+        :py:func:`pypmi.schema.get_schema`
+
+    Returns
+    -------
+    schema : dict
+        Mapping of columns to polars data types
+    """
+    import polars as pl
+
+    types = {'Int64': pl.Int64, 'float64': pl.Float64, 'string': pl.String}
+    return {col: types[dtype] for col, dtype in dtypes.items()
+            if dtype in types}
+
+
+def _get_store_file(name: str, path: str = None) -> Path:
+    """Return filepath to the Arrow file of dataset `name` in the store."""
+    template = _load_catalog('studydata', path)[name]['filename']
+    return _get_table_cache(template, path, store='store', suffix='.arrow')
+
+
+def _load_store_entry(dest: Path) -> dict:
+    """
+    Load source of Arrow file `dest` in the store of a PPMI data directory.
+
+    The source is stored in the schema metadata of each Arrow file, rather
+    than in an index shared by all tables, so that processes building the
+    store concurrently cannot overwrite each other's entries.
+
+    Parameters
+    ----------
+    dest : pathlib.Path
+        Filepath to Arrow file in the store
+
+    Returns
+    -------
+    entry : dict
+        Name, size, and modification time of the source file `dest` was
+        built from, or None if `dest` does not exist
+    """
+    import pyarrow as pa
+
+    try:
+        with pa.memory_map(str(dest), 'r') as source:
+            metadata = pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+    return json.loads(metadata.get(_SOURCE_KEY, b'null'))
+
+
+def _is_current(entry: dict, fname: Path) -> bool:
+    """Return whether store `entry` was built from the current `fname`."""
+    if entry is None or fname is None or entry['filename'] != fname.name:
+        return False
+    stat = fname.stat()
+    return (entry['size'], entry['mtime_ns']) == \
+        (stat.st_size, stat.st_mtime_ns)
+
+
+def build_store(datasets: List[str] = None,
+                path: str = None,
+                verbose: bool = False) -> Path:
+    """
+    Build memory-mappable Arrow store of downloaded tabular study data.
+
+    Each table is written uncompressed to an Arrow IPC (Feather v2) file in
+    the cache of the data directory such that it can be opened with
+    :py:func:`pypmi.readers.read_arrow` without copying or parsing, and the
+    same memory pages are shared by all processes reading it. Tables that are
+    already in the store and whose CSV files have not changed are skipped.
+
+    Parameters
+    ----------
+    datasets : list of str, optional
+        Names of datasets to add to the store, as listed in
+        :py:func:`pypmi.fetchable_studydata`. If not specified all downloaded
+        tabular (csv) study data are added. Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    verbose : bool, optional
+        Whether to print progress messages. Default: False
+
+    Returns
+    -------
+    store : pathlib.Path
+        Filepath to store directory
+
+    See Also
+    --------
+    pypmi.readers.read_arrow
+    """
+    import pyarrow as pa
+
+    if datasets is None:
+        datasets = sorted({
+            f['dataset'] for f in list_local(type='studydata', path=path)
+            if f['filename'].endswith('.csv')
+        })
+    elif isinstance(datasets, str):
+        datasets = [datasets]
+
+    store = _get_cache_dir(path) / 'store'
+    built = 0
+    for name in datasets:
+        fname = latest_local(name, type='studydata', path=path)
+        dest = _get_store_file(name, path)
+        if _is_current(_load_store_entry(dest), fname):
+            continue
+        data = read_studydata(name, path=path)
+        stat = fname.stat()
+        try:
+            table = pa.Table.from_pandas(data, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            if verbose:
+                print('Skipping {}: cannot convert to Arrow.'.format(name))
+            continue
+        metadata = dict(table.schema.metadata or {})
+        metadata[_SOURCE_KEY] = json.dumps(dict(
+            filename=fname.name, size=stat.st_size, mtime_ns=stat.st_mtime_ns
+        )).encode()
+        table = table.replace_schema_metadata(metadata)
+        # replacing (rather than overwriting) keeps tables that are currently
+        # memory-mapped by other processes intact
+        with _atomic_write(dest) as tmp, \
+                pa.OSFile(str(tmp), 'wb') as sink, \
+                pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        built += 1
+
+    if verbose:
+        print('Added {} tables to Arrow store at {}.'.format(built, store))
+
+    return store
+
+
+def read_arrow(name: str,
+               columns: List[str] = None,
+               path: str = None) -> 'pa.Table':
+    """
+    Read tabular study data `name` from the memory-mapped Arrow store.
+
+    The returned table references the memory-mapped store directly, so
+    reading it is (nearly) free and selecting `columns` copies no data. The
+    table is added to (or updated in) the store first if needed.
+
+    Parameters
+    ----------
+    name : str
+        Name of dataset, as listed in :py:func:`pypmi.fetchable_studydata`
+    columns : list of str, optional
+        Columns to select. If not specified all columns are returned.
+        Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    table : pyarrow.Table
+        Loaded data. Use :py:meth:`pyarrow.Table.to_pandas` to convert it to
+        a :py:class:`pandas.DataFrame`
+
+    See Also
+    --------
+    pypmi.readers.build_store
+    """
+    import pyarrow as pa
+
+    fname = latest_local(name, type='studydata', path=path)
+    dest = _get_store_file(name, path)
+    if not _is_current(_load_store_entry(dest), fname):
+        build_store([name], path=path)
+        if _load_store_entry(dest) is None:
+            raise ValueError('Provided dataset {} cannot be stored as an '
+                             'Arrow table.'.format(name))
+
+    with pa.memory_map(str(dest), 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    if columns is not None:
+        table = table.select(columns)
+    return table
+
+
+def pack_studydata(path: str = None,
+                   out: str = None,
+                   datasets: List[str] = None,
+                   verbose: bool = False) -> Path:
+    """
+    Pack downloaded tabular study data into a single HDF5 container.
+
+    Each table is stored as an HDF5 group with one chunked, compressed
+    dataset per column, and a table of contents mapping dataset names to
+    their groups and columns is stored alongside them. The container can be
+    moved around as a single file and individual tables (or columns) read
+    from it with :py:func:`pypmi.readers.read_packed` without unpacking.
+    Requires `h5py`.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    out : str, optional
+        Filepath to the container. If not specified it is created as
+        'studydata.h5' in the data directory. Default: None
+    datasets : list of str, optional
+        Names of datasets to pack, as listed in
+        :py:func:`pypmi.fetchable_studydata`. If not specified all downloaded
+        tabular (csv) study data are packed. Default: None
+    verbose : bool, optional
+        Whether to print progress messages. Default: False
+
+    Returns
+    -------
+    out : pathlib.Path
+        Filepath to the container
+
+    See Also
+    --------
+    pypmi.readers.read_packed
+    """
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError('Packing study data requires h5py. Please install '
+                          'it with `pip install pypmi[hdf5]`.') from None
+    import numpy as np
+    import pandas as pd
+
+    if datasets is None:
+        datasets = sorted({
+            f['dataset'] for f in list_local(type='studydata', path=path)
+            if f['filename'].endswith('.csv')
+        })
+    elif isinstance(datasets, str):
+        datasets = [datasets]
+    if out is None:
+        out = _get_data_dir(path) / 'studydata.h5'
+    out = Path(out)
+
+    toc = {}
+    tmp = out.with_name(out.name + '.tmp')
+    with h5py.File(tmp, 'w') as dest:
+        for n, name in enumerate(datasets):
+            data = read_studydata(name, path=path)
+            group = dest.create_group('t{:04d}'.format(n))
+            columns = []
+            for c, (column, series) in enumerate(data.items()):
+                numeric = (pd.api.types.is_numeric_dtype(series)
+                           or pd.api.types.is_bool_dtype(series))
+                if numeric:
+                    values = series.to_numpy()
+                else:
+                    # HDF5 has no missing strings: store them as empty strings
+                    # alongside a mask of which values were missing
+                    missing = series.isna().to_numpy()
+                    values = series.astype(object).where(~missing, '')
+                    values = np.asarray(values.astype(str), dtype=object)
+                opts = dict(compression='gzip', shuffle=numeric) \
+                    if len(values) else {}
+                ds = group.create_dataset(
+                    'c{:04d}'.format(c), data=values, **opts,
+                    dtype=None if numeric else h5py.string_dtype()
+                )
+                if not numeric and missing.any():
+                    group.create_dataset('m{:04d}'.format(c), data=missing,
+                                         compression='gzip')
+                ds.attrs['dtype'] = str(series.dtype)
+                columns.append(str(column))
+            toc[name] = dict(group=group.name, columns=columns,
+                             rows=len(data))
+            if verbose:
+                print('Packed {} ({} rows)'.format(name, len(data)))
+        dest.create_dataset('toc', data=json.dumps(toc),
+                            dtype=h5py.string_dtype())
+    os.replace(tmp, out)
+
+    return out
+
+
+def _load_toc(src) -> Dict[str, dict]:
+    """Return table of contents of open HDF5 container `src`."""
+    return json.loads(src['toc'].asstr()[()])
+
+
+def list_packed(fname: str) -> Dict[str, List[str]]:
+    """
+    List tables in HDF5 container `fname` and their columns.
+
+    Parameters
+    ----------
+    fname : str
+        Filepath to container, as created by
+        :py:func:`pypmi.readers.pack_studydata`
+
+    Returns
+    -------
+    tables : dict
+        Mapping of dataset names to their columns
+    """
+    import h5py
+
+    with h5py.File(fname, 'r') as src:
+        return {name: info['columns'] for name, info in _load_toc(src).items()}
+
+
+def read_packed(fname: str,
+                name: str,
+                columns: List[str] = None) -> 'pd.DataFrame':
+    """
+    Read table `name` from HDF5 container `fname`.
+
+    Only the requested `columns` are read (and decompressed) from the
+    container.
+
+    Parameters
+    ----------
+    fname : str
+        Filepath to container, as created by
+        :py:func:`pypmi.readers.pack_studydata`
+    name : str
+        Name of dataset, as listed in :py:func:`pypmi.readers.list_packed`
+    columns : list of str, optional
+        Columns to read. If not specified all columns are read. Default: None
+
+    Returns
+    -------
+    data : pandas.DataFrame
+        Loaded data
+
+    See Also
+    --------
+    pypmi.readers.pack_studydata
+    """
+    import h5py
+    import pandas as pd
+
+    with h5py.File(fname, 'r') as src:
+        info = _load_toc(src).get(name)
+        if info is None:
+            raise ValueError('Provided dataset {} not available in {}.'
+                             .format(name, fname))
+        if columns is None:
+            columns = info['columns']
+        missing = set(columns).difference(info['columns'])
+        if missing:
+            raise ValueError('Provided columns {} not available for dataset '
+                             '{}.'.format(sorted(missing), name))
+        group = src[info['group']]
+        data = {}
+        for column in columns:
+            key = '{:04d}'.format(info['columns'].index(column))
+            ds = group['c' + key]
+            dtype = ds.attrs['dtype']
+            if h5py.check_string_dtype(ds.dtype) is None:
+                values = pd.Series(ds[()], dtype=dtype)
+            else:
+                values = pd.Series(ds.asstr()[()], dtype=object)
+                if 'm' + key in group:
+                    values[group['m' + key][()]] = None
+                values = values.astype(dtype)
+            data[column] = values
+    return pd.DataFrame(data, columns=columns)
+
+
+_OPERATORS = {
+    '==': lambda col, val: col == val,
+    '!=': lambda col, val: col != val,
+    '<': lambda col, val: col < val,
+    '<=': lambda col, val: col <= val,
+    '>': lambda col, val: col > val,
+    '>=': lambda col, val: col >= val,
+    'in': lambda col, val: col.isin(val),
+    'not in': lambda col, val: ~col.isin(val),
+}
+
+
+def _coerce_value(value, text: bool):
+    """
+    Convert filter `value` to text (if `text`) or a number otherwise.
+
+    Returns None if `value` is text that cannot be parsed as a number.
+    """
+    if text:
+        return value if isinstance(value, str) else str(value)
+    if not isinstance(value, str):
+        return value
+    for parse in (int, float):
+        try:
+            return parse(value)
+        except ValueError:
+            pass
+    return None
+
+
+def _coerce_filter(column: str, op: str, value, text: bool):
+    """
+    Convert `value` of filter on `column` to match the dtype of the column.
+
+    Values are compared in the dtype of their column, such that all backends
+    match them alike: values of text columns are converted to text and text
+    values of other columns are parsed as numbers.
+
+    Parameters
+    ----------
+    column : str
+        Name of column filtered on
+    op : str
+        Comparison operator, as in :py:meth:`Query.where`
+    value : object
+        Value to compare `column` to; a list of values for 'in' and 'not in'
+    text : bool
+        Whether `column` holds text
+
+    Returns
+    -------
+    value : object
+        Converted `value`. Values of 'in' and 'not in' that cannot be
+        converted are dropped, since they never match, and a single value
+        that cannot be converted is None.
+
+    Raises
+    ------
+    ValueError
+        If `value` cannot be converted for an ordering comparison
+    """
+    if op in ('in', 'not in'):
+        converted = (_coerce_value(val, text) for val in value)
+        return [val for val in converted if val is not None]
+    converted = _coerce_value(value, text)
+    if converted is None and op not in ('==', '!='):
+        raise ValueError('Provided value {!r} cannot be compared to numeric '
+                         'column {}.'.format(value, column))
+    return converted
+
+
+def _compare(col, op: str, val, constant: Callable):
+    """
+    Return comparison `op` of column expression `col` to coerced `val`.
+
+    A value that could not be coerced (i.e., None) matches no rows for '=='
+    and all rows for '!=', as built by `constant`.
+    """
+    if val is None:
+        return constant(op == '!=')
+    return _OPERATORS[op](col, val)
+
+
+class Query:
+    """
+    Lazy query over tabular study data downloaded to the data directory.
+
+    Queries are built by chaining :py:meth:`select` and :py:meth:`where` and
+    nothing is read until :py:meth:`collect` is called. Only the selected
+    (and filtered) columns are read from the Parquet cache of the data (see
+    :py:func:`pypmi.readers.read_studydata`) and rows are filtered while it
+    is scanned, skipping row groups that cannot match. Without a cache the
+    CSV file is scanned in chunks, such that only matching rows are kept.
+
+    Parameters
+    ----------
+    dataset : str
+        Name of dataset, as listed in :py:func:`pypmi.fetchable_studydata`
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    cache : bool, optional
+        Whether to read from (and write to) the columnar cache. Default: True
+    backend : {'pandas', 'polars'}, optional
+        Library to return results with. If 'polars' :py:meth:`collect`
+        returns a lazy frame with the selection and filters applied, which can
+        be joined with other lazy frames before it is collected (see
+        :py:func:`pypmi.readers.read_studydata`). Default: 'pandas'
+
+    Examples
+    --------
+    >>> import pypmi
+    >>> updrs = (pypmi.query('MDS-UPDRS Part IV: Motor Complications')
+    ...               .select('PATNO', 'EVENT_ID', 'NP4TOT')
+    ...               .where('EVENT_ID', 'in', ['BL', 'V04'])
+    ...               .where('NP4TOT', '>', 0)
+    ...               .collect())  # doctest: +SKIP
+    """
+
+    def __init__(self, dataset, path=None, cache=True, backend='pandas'):
+        _check_backend(backend)
+        self.dataset = dataset
+        self.path = path
+        self.cache = cache
+        self.backend = backend
+        self.columns = None
+        self.filters = ()
+
+    def __repr__(self):
+        """Return representation of dataset, columns, and filters."""
+        return '{}({!r}, columns={}, filters={})'.format(
+            type(self).__name__, self.dataset, self.columns, list(self.filters)
+        )
+
+    def _replace(self, **kwargs):
+        query = copy.copy(self)
+        query.__dict__.update(kwargs)
+        return query
+
+    def select(self, *columns: str) -> 'Query':
+        """
+        Select `columns` to return from the query.
+
+        Parameters
+        ----------
+        *columns : str
+            Names of columns to select
+
+        Returns
+        -------
+        query : pypmi.readers.Query
+            New query selecting `columns`
+        """
+        return self._replace(columns=list(columns))
+
+    def where(self, column: str, op: str, value) -> 'Query':
+        """
+        Filter rows of the query on `column`.
+
+        Multiple filters are combined such that returned rows match all of
+        them. Rows where `column` is missing never match. Values are compared
+        in the dtype of `column`, such that e.g. '3000' matches 3000.
+
+        Parameters
+        ----------
+        column : str
+            Name of column to filter on
+        op : {'==', '!=', '<', '<=', '>', '>=', 'in', 'not in'}
+            Comparison operator
+        value : object
+            Value to compare `column` to; a list of values for 'in' and
+            'not in'
+
+        Returns
+        -------
+        query : pypmi.readers.Query
+            New query with the additional filter
+        """
+        if op not in _OPERATORS:
+            raise ValueError('Provided op {} not supported. Please choose '
+                             'from {}.'.format(op, list(_OPERATORS)))
+        if op in ('in', 'not in'):
+            value = list(value)
+        return self._replace(filters=self.filters + ((column, op, value),))
+
+    def collect(self) -> 'pd.DataFrame':
+        """
+        Run the query.
+
+        Returns
+        -------
+        data : pandas.DataFrame or polars.LazyFrame
+            Selected columns of the rows matching all filters
+        """
+        columns = self.columns
+        needed = None
+        if columns is not None:
+            needed = columns + [col for col, _, _ in self.filters
+                                if col not in columns]
+        if self.backend == 'polars':
+            return self._scan_polars(needed)
+
+        fname, template = _locate_studydata(self.dataset, self.path)
+
+        dtypes = get_schema(self.dataset, self.path)
+        if self.cache and _has_pyarrow():
+            cache = _get_table_cache(template, self.path)
+            filters = self._arrow_filters if self.filters else None
+            schema = _schema_key(dtypes)
+            data = _read_cache(cache, fname, needed, filters, schema)
+            if data is None:
+                _convert(fname, cache, dtypes)
+                data = _read_cache(cache, fname, needed, filters, schema)
+            if data is not None:
+                return data if columns is None else data[columns]
+        try:
+            return self._scan_csv(fname, needed, dtypes)
+        except (TypeError, ValueError) as err:
+            if not dtypes:
+                raise
+            _warn_drift(fname, err)
+        return self._scan_csv(fname, needed)
+
+    def _arrow_filters(self, schema: 'pa.Schema') -> 'pc.Expression':
+        """Return filters of the query on `schema` as a pyarrow expression."""
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        expression = None
+        for col, op, val in self.filters:
+            if col not in schema.names:
+                raise ValueError('Provided columns {} not available in {}.'
+                                 .format([col], self.dataset))
+            type = schema.field(col).type
+            if pa.types.is_dictionary(type):
+                type = type.value_type
+            text = not (pa.types.is_integer(type)
+                        or pa.types.is_floating(type)
+                        or pa.types.is_boolean(type))
+            val = _coerce_filter(col, op, val, text)
+            field = pc.field(col)
+            if op in ('in', 'not in'):
+                cond = field.isin(pa.array(val, type=type))
+                cond = ~cond if op == 'not in' else cond
+            else:
+                cond = _compare(field, op, val, pc.scalar)
+            cond = field.is_valid() & cond
+            expression = cond if expression is None else expression & cond
+        return expression
+
+    def _scan_polars(self, needed):
+        """Return lazy frame of the query with :py:mod:`polars`."""
+        import polars as pl
+
+        frame = _scan_polars(self.dataset, columns=needed, path=self.path,
+                             cache=self.cache,
+                             required=[col for col, _, _ in self.filters])
+        schema = frame.collect_schema()
+        for col, op, val in self.filters:
+            field = pl.col(col)
+            text = not (schema[col].is_numeric() or schema[col] == pl.Boolean)
+            val = _coerce_filter(col, op, val, text)
+            if op in ('in', 'not in'):
+                values = pl.Series(val).cast(schema[col], strict=False)
+                cond = field.is_in(values.implode())
+                cond = ~cond if op == 'not in' else cond
+            else:
+                cond = _compare(field, op, val, pl.lit)
+            frame = frame.filter(field.is_not_null() & cond)
+        return frame if self.columns is None else frame.select(self.columns)
+
+    def _scan_csv(self, fname, needed, dtypes=None, chunksize=100000):
+        """
+        Read `needed` columns of CSV file `fname` in filtered chunks.
+
+        Columns without `dtypes` are inferred in each chunk and converted to
+        the dtype inferred for the whole file once the chunks are combined.
+        """
+        import pandas as pd
+
+        usecols = None
+        if needed is not None:
+            wanted = set(needed)
+            usecols = lambda col: col in wanted  # noqa: E731
+        chunks, inferred = [], {}
+        reader = pd.read_csv(fname, usecols=usecols, dtype=dtypes or None,
+                             chunksize=chunksize, low_memory=False)
+        with reader:
+            for chunk in reader:
+                if needed is not None:
+                    _check_columns(needed, chunk.columns, fname)
+                for col, dtype in chunk.dtypes.items():
+                    inferred.setdefault(col, []).append(dtype)
+                keep = pd.Series(True, index=chunk.index)
+                for col, op, val in self.filters:
+                    _check_columns([col], chunk.columns, fname)
+                    text = not pd.api.types.is_numeric_dtype(chunk[col])
+                    val = _coerce_filter(col, op, val, text)
+                    keep &= chunk[col].notna() & _compare(chunk[col], op, val,
+                                                          bool)
+                chunks.append(chunk[keep])
+        data = pd.concat(chunks, ignore_index=True)
+        common = {col: _common_dtype(found) for col, found in inferred.items()}
+        data = data.astype({col: dtype for col, dtype in common.items()
+                            if data[col].dtype != dtype})
+        return data if self.columns is None else data[self.columns]
+
+
+def _common_dtype(dtypes: List['np.dtype']) -> 'np.dtype':
+    """
+    Return dtype pandas infers for column read in chunks with `dtypes`.
+
+    Parameters
+    ----------
+    dtypes : list of dtypes
+        Dtypes inferred for the column in each chunk
+
+    Returns
+    -------
+    dtype : dtype
+        Dtype inferred when reading the column at once: the shared dtype of
+        all chunks, float64 if all chunks are numeric, or the (string) dtype
+        of the first chunk with text otherwise
+    """
+    from pandas.api.types import (is_bool_dtype, is_numeric_dtype,
+                                  is_string_dtype, pandas_dtype)
+
+    if all(dtype == dtypes[0] for dtype in dtypes):
+        return dtypes[0]
+    if all(is_numeric_dtype(dtype) and not is_bool_dtype(dtype)
+           for dtype in dtypes):
+        return pandas_dtype('float64')
+    return next((dtype for dtype in dtypes if is_string_dtype(dtype)),
+                pandas_dtype('object'))
+
+
+def query(dataset: str,
+          path: str = None,
+          cache: bool = True,
+          backend: str = 'pandas') -> Query:
+    """
+    Start a lazy query over tabular study data `dataset`.
+
+    Parameters
+    ----------
+    dataset : str
+        Name of dataset, as listed in :py:func:`pypmi.fetchable_studydata`
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    cache : bool, optional
+        Whether to read from (and write to) the columnar cache. Default: True
+    backend : {'pandas', 'polars'}, optional
+        Library to return results with; see :py:class:`Query`. Default:
+        'pandas'
+
+    Returns
+    -------
+    query : pypmi.readers.Query
+        Query to refine with :py:meth:`~pypmi.readers.Query.select` and
+        :py:meth:`~pypmi.readers.Query.where` and run with
+        :py:meth:`~pypmi.readers.Query.collect`
+    """
+    return Query(dataset, path=path, cache=cache, backend=backend)
+
+
+def iter_freeze(freeze: str,
+                tables: List[str] = None,
+                columns: List[str] = None,
+                chunksize: int = 50000,
+                path: str = None) -> Iterator[Tuple[str, 'pd.DataFrame']]:
+    """
+    Iterate over chunks of the tables in a PPMI data freeze archive.
+
+    The archive is decompressed as a stream and each table parsed in chunks
+    of `chunksize` rows, such that memory use is bounded regardless of the
+    size of the archive. Stopping the iteration early (e.g., with `break`)
+    closes the archive without reading the rest of it.
+
+    Columns are parsed with their dtypes in the Data Dictionary, if it has
+    been downloaded and describes the table (see
+    :py:func:`pypmi.schema.get_schema`). The dtypes of other columns are
+    inferred from each chunk, and so may differ between chunks of a table
+    (e.g., integers in one chunk and floats in a chunk with missing values).
+
+    Parameters
+    ----------
+    freeze : str
+        Name of data freeze, as listed in :py:func:`pypmi.fetchable_studydata`
+        (e.g., '2025Q1 Data Freeze'), or filepath to a data freeze archive
+    tables : list of str, optional
+        Names (or glob-style patterns, e.g., 'MDS*UPDRS*') of tables to read,
+        matched against the table filenames without their extension. If not
+        specified all tables are read. Default: None
+    columns : list of str, optional
+        Columns to read from each table. Tables without any of `columns` are
+        skipped. If not specified all columns are read. Default: None
+    chunksize : int, optional
+        Number of rows per chunk. Default: 50000
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Yields
+    ------
+    table : str
+        Name of table in the archive
+    chunk : pandas.DataFrame
+        Next chunk of rows from `table`
+    """
+    import fnmatch
+    import gzip
+    import tarfile
+
+    if freeze in _load_catalog('studydata', path):
+        fname = latest_local(freeze, type='studydata', path=path)
+        if fname is None:
+            raise FileNotFoundError('Provided dataset {} has not been '
+                                    'downloaded. Please use fetch_studydata() '
+                                    'to download it first.'.format(freeze))
+    else:
+        fname = Path(freeze)
+        if not fname.is_file():
+            raise FileNotFoundError('Provided freeze {} is neither a dataset '
+                                    'nor an existing file.'.format(freeze))
+
+    def _wanted(table):
+        return tables is None or any(fnmatch.fnmatch(table, pattern)
+                                     for pattern in tables)
+
+    templates = _get_templates(path)
+
+    def _chunks(table, src):
+        dtypes = _freeze_schema(table, templates, path)
+        return _iter_chunks(table, src, columns, chunksize, dtypes)
+
+    try:
+        archive = tarfile.open(fname, mode='r|*')
+    except tarfile.ReadError:
+        archive = None
+    if archive is None:
+        # some freezes may be a single compressed table rather than a tarball
+        table = Path(fname.stem).stem
+        if _wanted(table):
+            with gzip.open(fname, 'rb') as src:
+                yield from _chunks(table, src)
+        return
+
+    with archive:
+        for member in archive:
+            table, ext = os.path.splitext(os.path.basename(member.name))
+            if not member.isfile() or ext.lower() != '.csv' \
+                    or not _wanted(table):
+                continue
+            src = io.BufferedReader(_StreamReader(archive.extractfile(member)))
+            yield from _chunks(table, src)
+
+
+class _StreamReader(io.RawIOBase):
+    """Non-seekable reader of a member of a tar archive opened as a stream."""
+
+    def __init__(self, src):
+        self.src = src
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.src.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _freeze_schema(table: str,
+                   templates: Dict[str, Tuple[str, str]],
+                   path: str = None) -> Dict[str, str]:
+    """
+    Return column dtypes of `table` from a data freeze, if known.
+
+    Parameters
+    ----------
+    table : str
+        Name of table in the archive (i.e., its filename without extension)
+    templates : dict
+        Mapping of filename templates to datasets, as returned by
+        :py:func:`pypmi.manifest._get_templates`
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    dtypes : dict
+        Mapping of column names to pandas dtypes, matched by the dataset the
+        table was released as or by its form code; empty if unknown
+    """
+    _, type, dataset, _ = _identify(table + '.csv', templates)
+    for name in (dataset if type == 'studydata' else None, table):
+        if name is None:
+            continue
+        try:
+            dtypes = get_schema(name, path)
+        except ValueError:
+            continue
+        if dtypes:
+            return dtypes
+    return {}
+
+
+def _iter_chunks(table: str,
+                 src,
+                 columns: List[str] = None,
+                 chunksize: int = 50000,
+                 dtypes: Dict[str, str] = None) -> Iterator:
+    """
+    Yield `table` and chunks of `columns` parsed from CSV stream `src`.
+
+    Text columns of `dtypes` are parsed as such, while other columns of
+    `dtypes` are converted in each chunk: the stream cannot be parsed again,
+    so a column whose values do not match its dtype is left inferred (with a
+    warning) from then on.
+    """
+    import pandas as pd
+
+    dtypes = dict(dtypes or {})
+    usecols = None
+    if columns is not None:
+        wanted = set(columns)
+        usecols = lambda col: col in wanted  # noqa: E731
+    text = {col: dtype for col, dtype in dtypes.items() if dtype == 'string'}
+    try:
+        reader = pd.read_csv(src, usecols=usecols, chunksize=chunksize,
+                             dtype=text, low_memory=False)
+    except pd.errors.EmptyDataError:
+        return
+    with reader:
+        for chunk in reader:
+            if len(chunk.columns) == 0:
+                return
+            for col in chunk.columns:
+                if col in text or col not in dtypes:
+                    continue
+                try:
+                    chunk[col] = chunk[col].astype(dtypes[col])
+                except (TypeError, ValueError) as err:
+                    _warn_drift(table, err)
+                    del dtypes[col]
+            yield table, chunk
+
+
+def _load_ipc(name: str, path: str = None):
+    """
+    Read study data `name` and serialize it as an Arrow IPC stream.
+
+    Used by :py:func:`load_all_studydata` in worker processes: returning the
+    serialized buffer avoids pickling the data frame object by object.
+
+    Parameters
+    ----------
+    name : str
+        Name of dataset
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    data : bytes or pandas.DataFrame
+        Arrow IPC stream of data or, if it cannot be converted to Arrow, the
+        data frame itself
+    """
+    import pyarrow as pa
+
+    data = read_studydata(name, path=path)
+    try:
+        table = pa.Table.from_pandas(data, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return data
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def load_all_studydata(datasets: List[str] = None,
+                       path: str = None,
+                       n_jobs: int = 1,
+                       verbose: bool = False) -> Dict[str, 'pd.DataFrame']:
+    """
+    Load downloaded tabular study data in parallel.
+
+    Tables are loaded in a pool of `n_jobs` processes, largest first so that
+    the load is balanced between them, and sent back to the main process as
+    Arrow IPC buffers rather than pickled data frames. Requires `pyarrow`
+    when `n_jobs` is greater than one.
+
+    Parameters
+    ----------
+    datasets : list of str, optional
+        Names of datasets to load, as listed in
+        :py:func:`pypmi.fetchable_studydata`. If not specified all downloaded
+        tabular (csv) study data are loaded. Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    n_jobs : int, optional
+        Number of processes to load tables with. Default: 1
+    verbose : bool, optional
+        Whether to print progress messages. Default: False
+
+    Returns
+    -------
+    data : dict
+        Mapping of dataset names to loaded data frames
+
+    See Also
+    --------
+    pypmi.readers.read_studydata
+    """
+    local = [f for f in list_local(type='studydata', path=path)
+             if f['filename'].endswith('.csv')]
+    if datasets is None:
+        datasets = sorted({f['dataset'] for f in local})
+    elif isinstance(datasets, str):
+        datasets = [datasets]
+    sizes = {}
+    for f in local:
+        sizes[f['dataset']] = max(sizes.get(f['dataset'], 0), f['size'])
+    order = sorted(datasets, key=lambda name: -sizes.get(name, 0))
+
+    n_jobs = max(1, min(n_jobs, len(order)))
+    if n_jobs == 1:
+        loaded = {name: read_studydata(name, path=path) for name in order}
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        import pyarrow as pa
+
+        loaded = {}
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [(name, executor.submit(_load_ipc, name, path))
+                       for name in order]
+            for name, future in futures:
+                data = future.result()
+                if isinstance(data, bytes):
+                    data = pa.ipc.open_stream(data).read_all().to_pandas()
+                loaded[name] = data
+                if verbose:
+                    print('Loaded {} ({} rows)'.format(name, len(data)))
+
+    return {name: loaded[name] for name in datasets}
+
+
+_PARTICIPANTS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tables (
+    dataset TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    header BLOB,
+    indexed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS rows (
+    dataset TEXT NOT NULL,
+    participant TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rows_participant ON rows (participant, dataset);
+"""
+_NO_PARTICIPANTS, _INDEXED, _UNINDEXED = 0, 1, -1
+
+
+def _connect_participants(path: str = None) -> 'sqlite3.Connection':
+    """Open index of participant rows in the PPMI data directory `path`."""
+    import sqlite3
+
+    fname = _get_cache_dir(path) / 'participants.sqlite'
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(fname, timeout=60)
+    conn.row_factory = sqlite3.Row
+    with conn:
+        conn.executescript(_PARTICIPANTS_SCHEMA)
+    return conn
+
+
+def _find_records(fname: Path) -> Tuple['np.ndarray', 'np.ndarray']:
+    """
+    Find byte offsets of the records in CSV file `fname`.
+
+    Records end at newlines outside of quoted fields, which are found by
+    counting the quotes preceding each newline.
+
+    Parameters
+    ----------
+    fname : pathlib.Path
+        Filepath to CSV file
+
+    Returns
+    -------
+    starts, ends : numpy.ndarray
+        Offsets of the first byte of each non-blank record (including the
+        header) and of the byte after it
+    """
+    import numpy as np
+
+    raw = np.fromfile(fname, dtype=np.uint8)
+    if not len(raw):
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    newlines = np.flatnonzero(raw == ord('\n'))
+    quotes = np.flatnonzero(raw == ord('"'))
+    newlines = newlines[np.searchsorted(quotes, newlines) % 2 == 0]
+    ends = newlines + 1
+    if raw[-1] != ord('\n'):
+        ends = np.append(ends, len(raw))
+    starts = np.concatenate([[0], ends[:-1]])
+    # lines that are empty (save for line endings) are skipped by parsers
+    lengths = ends - starts - (raw[ends - 1] == ord('\n'))
+    lengths -= (lengths > 0) & (raw[np.maximum(starts + lengths - 1, 0)]
+                                == ord('\r'))
+    blank = lengths == 0
+    return starts[~blank], ends[~blank]
+
+
+def _index_participants(conn: 'sqlite3.Connection',
+                        name: str,
+                        fname: Path) -> None:
+    """
+    Index byte offsets of the rows of each participant in table `name`.
+
+    Consecutive rows of the same participant are stored as a single range.
+    Tables without a 'PATNO' column are recorded as such, and tables whose
+    rows cannot be delimited as not indexed.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to index, as returned by :py:func:`_connect_participants`
+    name : str
+        Name of dataset
+    fname : pathlib.Path
+        Filepath to CSV file of `name`
+    """
+    import numpy as np
+    import pandas as pd
+
+    stat = fname.stat()
+    rows, header, indexed = [], None, _NO_PARTICIPANTS
+    try:
+        columns = pd.read_csv(fname, nrows=0).columns
+    except (ValueError, pd.errors.EmptyDataError):
+        columns = []
+    if 'PATNO' in columns:
+        starts, ends = _find_records(fname)
+        with open(fname, 'rb') as src:
+            src.seek(int(starts[0]))
+            header = src.read(int(ends[0] - starts[0]))
+        patno = pd.read_csv(fname, usecols=['PATNO'], dtype=str,
+                            keep_default_na=False)['PATNO']
+        indexed = _UNINDEXED
+        if len(patno) == len(starts) - 1:
+            patno = patno.str.strip().to_numpy()
+            starts, ends = starts[1:], ends[1:]
+            # split rows into runs of the same participant
+            split = np.flatnonzero(patno[1:] != patno[:-1]) + 1
+            first = np.concatenate([[0], split])
+            last = np.concatenate([split, [len(patno)]]) - 1
+            rows = [
+                (name, pid, int(start), int(end - start)) for pid, start, end
+                in zip(patno[first], starts[first], ends[last])
+            ]
+            indexed = _INDEXED
+
+    with conn:
+        conn.execute('DELETE FROM rows WHERE dataset = ?', (name,))
+        conn.executemany('INSERT INTO rows VALUES (?, ?, ?, ?)', rows)
+        conn.execute('INSERT OR REPLACE INTO tables VALUES (?, ?, ?, ?, ?, ?)',
+                     (name, fname.name, stat.st_size, stat.st_mtime_ns,
+                      header, indexed))
+
+
+def _update_participants(conn: 'sqlite3.Connection',
+                         datasets: List[str] = None,
+                         path: str = None,
+                         verbose: bool = False) -> Dict[str, Path]:
+    """
+    Re-index tables in `datasets` that changed since they were indexed.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to index, as returned by :py:func:`_connect_participants`
+    datasets : list of str, optional
+        Names of datasets to update. If not specified all downloaded tabular
+        study data are updated. Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+    verbose : bool, optional
+        Whether to print progress messages. Default: False
+
+    Returns
+    -------
+    files : dict
+        Mapping of dataset names to the filepaths of their latest version
+    """
+    if datasets is None:
+        datasets = sorted({f['dataset'] for f in
+                           list_local(type='studydata', path=path)
+                           if f['filename'].endswith('.csv')})
+    elif isinstance(datasets, str):
+        datasets = [datasets]
+    indexed = {row['dataset']: row for row in
+               conn.execute('SELECT dataset, filename, size, mtime_ns '
+                            'FROM tables')}
+
+    files = {}
+    for name in datasets:
+        fname, _ = _locate_studydata(name, path)
+        stat = fname.stat()
+        row = indexed.get(name)
+        if row is None or (row['filename'], row['size'], row['mtime_ns']) \
+                != (fname.name, stat.st_size, stat.st_mtime_ns):
+            if verbose:
+                print('Indexing participants in {}'.format(name))
+            _index_participants(conn, name, fname)
+        files[name] = fname
+    return files
+
+
+def build_participant_index(path: str = None, verbose: bool = False) -> None:
+    """
+    Index the rows of each participant in all downloaded tabular study data.
+
+    The byte offsets of the rows of every participant in every table are
+    stored in the cache of the data directory, such that
+    :py:func:`get_participant` only reads those rows. Tables that changed
+    since they were indexed are re-indexed.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+    verbose : bool, optional
+        Whether to print progress messages. Default: False
+    """
+    from contextlib import closing
+
+    with closing(_connect_participants(path)) as conn:
+        _update_participants(conn, path=path, verbose=verbose)
+
+
+def get_participant(participant: int,
+                    datasets: List[str] = None,
+                    path: str = None) -> Dict[str, 'pd.DataFrame']:
+    """
+    Load all rows of `participant` in downloaded tabular study data.
+
+    Only the rows of `participant` are read, using an index of their byte
+    offsets in each table (see :py:func:`build_participant_index`). Tables
+    that are not yet indexed, or changed since they were, are indexed first.
+
+    Parameters
+    ----------
+    participant : int
+        ID of participant (i.e., 'PATNO')
+    datasets : list of str, optional
+        Names of datasets to load, as listed in
+        :py:func:`pypmi.fetchable_studydata`. If not specified all downloaded
+        tabular (csv) study data are searched. Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    data : dict
+        Mapping of dataset names to data frames with the rows of
+        `participant`, for datasets that have any
+
+    Raises
+    ------
+    FileNotFoundError
+        If any of `datasets` have not been downloaded
+    ValueError
+        If any of `datasets` are not tabular data
+    """
+    from contextlib import closing
+    import pandas as pd
+
+    participant = str(participant).strip()
+    with closing(_connect_participants(path)) as conn:
+        files = _update_participants(conn, datasets=datasets, path=path)
+        tables = {row['dataset']: row for row in
+                  conn.execute('SELECT dataset, header, indexed FROM tables')}
+        ranges = {}
+        for row in conn.execute('SELECT dataset, offset, length FROM rows '
+                                'WHERE participant = ? ORDER BY offset',
+                                (participant,)):
+            ranges.setdefault(row['dataset'], []).append(
+                (row['offset'], row['length'])
+            )
+
+    data = {}
+    for name, fname in files.items():
+        if tables[name]['indexed'] == _UNINDEXED:
+            # rows of tables that could not be indexed are found by scanning
+            table = read_studydata(name, path=path)
+            rows = table[table['PATNO'].astype(str).str.strip()
+                         == participant]
+            if len(rows):
+                data[name] = rows.reset_index(drop=True)
+            continue
+        if name not in ranges:
+            continue
+        chunks = [tables[name]['header'].rstrip(b'\r\n') + b'\n']
+        with open(fname, 'rb') as src:
+            for offset, length in ranges[name]:
+                src.seek(offset)
+                chunks.append(src.read(length).rstrip(b'\r\n') + b'\n')
+        buffer = b''.join(chunks)
+        dtypes = get_schema(name, path)
+        try:
+            data[name] = pd.read_csv(io.BytesIO(buffer), dtype=dtypes or None)
+        except (TypeError, ValueError) as err:
+            if not dtypes:
+                raise
+            _warn_drift(fname, err)
+            data[name] = pd.read_csv(io.BytesIO(buffer))
+    return data
@@ -0,0 +1,644 @@
+# -*- coding: utf-8 -*-
+"""Functions for compiling column dtypes and codes of PPMI study data tables."""
+
+import hashlib
+import json
+import re
+from typing import TYPE_CHECKING, Dict, List, Tuple
+
+from .catalog import _load_catalog
+from .manifest import latest_local, list_local
+from .utils import _atomic_write, _get_cache_dir, _get_data_dir
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import numpy as np
+    import pandas as pd
+
+_DICTIONARY = 'Data Dictionary'
+_TABLE_COLUMNS = ('MOD_NAME', 'TABLE_NAME', 'TBL_NAME', 'DATASET', 'FORM')
+_ITEM_COLUMNS = ('ITM_NAME', 'ITEM_NAME', 'VARIABLE', 'COLUMN_NAME')
+_TYPE_COLUMNS = ('ITM_TYPE', 'DATA_TYPE', 'DATATYPE', 'TYPE', 'FIELD_TYPE')
+_DTYPES = (
+    (('INT', 'SMALLINT', 'BIGINT'), 'Int64'),
+    (('NUM', 'FLOAT', 'DOUBLE', 'DECIMAL', 'REAL'), 'float64'),
+    (('CHAR', 'VARCHAR', 'TEXT', 'STRING', 'MEMO', 'DATE', 'TIME'), 'string'),
+)
+_SCHEMA = {}
+_CODE_LIST = 'Code List'
+_PAGE_COLUMNS = ('PAG_NAME', 'PAGE_NAME') + _TABLE_COLUMNS
+_CODE_COLUMNS = ('CODE', 'CD', 'CODE_VALUE')
+_LABEL_COLUMNS = ('DECODE', 'CD_DESCR', 'LABEL', 'CODE_LABEL')
+_CODES = {}
+# the Data Dictionary and Code List identify tables by the codes of their forms
+# rather than by dataset names; codes of the tables read by `pypmi.datasets`
+# are listed here, and those of other tables are read from their PAG_NAME
+_TABLE_CODES = {
+    'Benton Judgement of Line Orientation': ('LINEORNT',),
+    'Demographics': ('SCREEN',),
+    'Epworth Sleepiness Scale': ('EPWORTH',),
+    'Geriatric Depression Scale (Short Version)': ('GDSSHORT',),
+    'Hopkins Verbal Learning Test - Revised': ('HVLT',),
+    'Letter - Number Sequencing': ('LNSPD',),
+    'MDS-UPDRS Part I Patient Questionnaire: Non-Motor Aspects of '
+    'Experiences of Daily Living (nM-EDL)': ('NUPDRS1P',),
+    'MDS-UPDRS Part I: Non-Motor Aspects of Experiences of Daily Living '
+    '(nM-EDL)': ('NUPDRS1',),
+    'MDS-UPDRS Part II Patient Questionnaire: Motor Aspects of Experiences '
+    'of Daily Living (M-EDL)': ('NUPDRS2P',),
+    'MDS-UPDRS Part III Treatment Determination and Part III: Motor '
+    'Examination': ('NUPDRS3', 'NUPDRS3A'),
+    'MDS-UPDRS Part IV: Motor Complications': ('NUPDRS4',),
+    'Modified Schwab & England Activities of Daily Living': ('MODSEADL',),
+    'Modified Semantic Fluency': ('SFTANIM',),
+    'Montreal Cognitive Assessment (MoCA)': ('MOCA',),
+    "Questionnaire for Impulsive-Compulsive Disorders in Parkinson's "
+    "Disease (QUIP-Current-Short)": ('QUIPCS',),
+    'REM Sleep Behavior Disorder Questionnaire': ('REMSLEEP',),
+    'SCOPA-AUT': ('SCOPAAUT',),
+    'Socio-Economics': ('SOCIOECO',),
+    'State-Trait Anxiety Inventory': ('STAI',),
+    'Symbol Digit Modalities Test': ('SDM',),
+    'University of Pennsylvania Smell Identification Test (UPSIT)':
+        ('UPSIT',),
+    'Vital Signs': ('VITAL',),
+}
+
+
+def _normalize(name: str) -> str:
+    """Normalize table `name` for matching (e.g., 'MDS-UPDRS_Part_III')."""
+    return re.sub(r'[^0-9a-z]', '', str(name).lower())
+
+
+def _find_column(columns: List[str], candidates: List[str]) -> str:
+    """
+    Find which of `columns` is one of `candidates`, ignoring case.
+
+    Parameters
+    ----------
+    columns : list of str
+        Columns of the Data Dictionary
+    candidates : list of str
+        Known names of the column to find, in order of preference
+
+    Returns
+    -------
+    column : str
+        Matching column, or None if none of `candidates` are in `columns`
+    """
+    lookup = {_normalize(col): col for col in columns}
+    for candidate in candidates:
+        if _normalize(candidate) in lookup:
+            return lookup[_normalize(candidate)]
+    return None
+
+
+def _to_dtype(type: str) -> str:
+    """
+    Convert Data Dictionary item `type` (e.g., 'NUMBER') to a pandas dtype.
+
+    Parameters
+    ----------
+    type : str
+        Type of item, as listed in the Data Dictionary
+
+    Returns
+    -------
+    dtype : str
+        Corresponding pandas dtype, or None if `type` is not recognized
+    """
+    type = _normalize(type).upper()
+    for prefixes, dtype in _DTYPES:
+        if type.startswith(prefixes):
+            return dtype
+    return None
+
+
+def compile_schema(path: str = None) -> Dict[str, Dict[str, str]]:
+    """
+    Compile column dtypes of all study data tables from the Data Dictionary.
+
+    The compiled schema is cached in the data directory and re-compiled when
+    a new version of the Data Dictionary is downloaded. Names of the columns
+    holding the table, item, and type in the Data Dictionary are detected
+    from a set of known alternatives, so that minor changes to its layout
+    between releases are tolerated.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    schema : dict
+        Mapping of (normalized) form codes of tables (e.g., 'nupdrs3') to
+        mappings of column names to pandas dtypes
+
+    Raises
+    ------
+    FileNotFoundError
+        If the Data Dictionary has not been downloaded
+    ValueError
+        If the table, item, or type columns cannot be found in the Data
+        Dictionary
+    """
+    import pandas as pd
+
+    fname = latest_local(_DICTIONARY, path=path)
+    if fname is None:
+        raise FileNotFoundError('Provided dataset {} has not been downloaded. '
+                                'Please use fetch_studydata() to download it '
+                                'first.'.format(_DICTIONARY))
+    stat = fname.stat()
+    source = dict(filename=fname.name, size=stat.st_size,
+                  mtime_ns=stat.st_mtime_ns)
+    cache = _get_cache_dir(path) / 'schema.json'
+    key = (str(cache), tuple(source.values()))
+    if key in _SCHEMA:
+        return _SCHEMA[key]
+    try:
+        with open(cache, 'r', encoding='utf-8') as src:
+            compiled = json.load(src)
+    except (FileNotFoundError, ValueError):
+        compiled = {}
+
+    if compiled.get('source') != source:
+        dictionary = pd.read_csv(fname, dtype=str, keep_default_na=False)
+        columns = [
+            _find_column(dictionary.columns, candidates) for candidates in
+            (_TABLE_COLUMNS, _ITEM_COLUMNS, _TYPE_COLUMNS)
+        ]
+        if None in columns:
+            raise ValueError('Cannot find table, item, and type columns in {}'
+                             '; found {}.'.format(fname.name, columns))
+        dictionary = dictionary[columns].set_axis(['table', 'item', 'type'],
+                                                  axis=1)
+        dictionary['table'] = dictionary['table'].map(_normalize)
+        dictionary['dtype'] = dictionary['type'].map(_to_dtype)
+        dictionary = dictionary.dropna(subset=['dtype'])
+        dictionary = dictionary[~dictionary[['table', 'item']].duplicated()]
+        tables = {
+            table: dict(zip(group['item'], group['dtype']))
+            for table, group in dictionary.groupby('table', sort=True)
+        }
+        compiled = dict(source=source, tables=tables)
+        with _atomic_write(cache) as tmp, \
+                open(tmp, 'w', encoding='utf-8') as dest:
+            json.dump(compiled, dest, indent=1)
+
+    _SCHEMA.clear()
+    _SCHEMA[key] = compiled['tables']
+    return compiled['tables']
+
+
+def _table_key(template: str) -> str:
+    """Return normalized name of table with filename `template`."""
+    return _normalize(template.replace('{DATETOKEN}', '').rsplit('.', 1)[0])
+
+
+def _dataset_keys(datasets: List[str],
+                  tables: Dict[str, Dict],
+                  path: str = None) -> Dict[str, List[str]]:
+    """
+    Find which of `tables` describe each of `datasets`.
+
+    Tables are matched by the form codes listed for a dataset in
+    `_TABLE_CODES` or by its (normalized) filename. Datasets matching neither
+    are matched by the form codes in the PAG_NAME column of their latest
+    downloaded version, if any.
+
+    Parameters
+    ----------
+    datasets : list of str
+        Names of datasets, as listed in :py:func:`pypmi.fetchable_studydata`
+    tables : dict
+        Mapping of normalized form codes to their items, as returned by
+        :py:func:`compile_schema`
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    keys : dict
+        Mapping of `datasets` to the keys of `tables` describing them
+    """
+    catalog = _load_catalog('studydata', path)
+    keys, unmatched = {}, []
+    for name in datasets:
+        candidates = [_normalize(code) for code in _TABLE_CODES.get(name, ())]
+        candidates.append(_table_key(catalog[name]['filename']))
+        keys[name] = [key for key in dict.fromkeys(candidates)
+                      if key in tables]
+        if not keys[name]:
+            unmatched.append(name)
+    if unmatched and tables:
+        for name, forms in _read_headers(path, unmatched, forms=True).items():
+            keys[name] = [key for key in dict.fromkeys(map(_normalize, forms))
+                          if key in tables]
+    return keys
+
+
+def _find_table(name: str,
+                tables: Dict[str, Dict],
+                path: str = None) -> Dict[str, object]:
+    """
+    Return items of `tables` describing dataset or form code `name`.
+
+    Parameters
+    ----------
+    name : str
+        Name of dataset, as listed in :py:func:`pypmi.fetchable_studydata`,
+        or form code of a table in the Data Dictionary (e.g., 'NUPDRS3')
+    tables : dict
+        Mapping of normalized form codes to their items
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    items : dict
+        Items of all tables describing `name`, or None if `name` is neither
+        a dataset nor a form code in `tables`
+    """
+    if name in _load_catalog('studydata', path):
+        items = {}
+        for key in _dataset_keys([name], tables, path)[name]:
+            items = {**tables[key], **items}
+        return items
+    return tables.get(_normalize(name))
+
+
+def get_schema(name: str, path: str = None) -> Dict[str, str]:
+    """
+    Return column dtypes of tabular study data `name`.
+
+    Parameters
+    ----------
+    name : str
+        Name of dataset, as listed in :py:func:`pypmi.fetchable_studydata`,
+        or form code of a table in the Data Dictionary (e.g., 'NUPDRS3')
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    dtypes : dict
+        Mapping of column names to pandas dtypes; empty if the Data
+        Dictionary has not been downloaded or does not describe `name`
+
+    Raises
+    ------
+    ValueError
+        If `name` is neither a dataset nor a table in the Data Dictionary
+    """
+    try:
+        schema = compile_schema(path)
+    except (FileNotFoundError, ValueError):
+        schema = {}
+    dtypes = _find_table(name, schema, path)
+    if dtypes is None:
+        raise ValueError('Provided dataset {} not available. Please see '
+                         'fetchable_studydata() for valid entries.'
+                         .format(name))
+    return dict(dtypes)
+
+
+def _schema_key(dtypes: Dict[str, str]) -> str:
+    """Return short digest identifying `dtypes` (or None if empty)."""
+    if not dtypes:
+        return None
+    digest = hashlib.sha256(json.dumps(dtypes, sort_keys=True).encode())
+    return digest.hexdigest()[:16]
+
+
+def _compile_codes(path: str = None) -> Dict[str, Dict[str, Tuple]]:
+    """
+    Compile categorical dtypes of all coded items from the Code List.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    codes : dict
+        Mapping of (normalized) form codes of tables to mappings of item names to
+        tuples of (codes, positions, dtype), where `codes` is a
+        :py:class:`pandas.Index` of the codes as strings, `positions` the
+        category of each code in `dtype`, a
+        :py:class:`pandas.CategoricalDtype` of the decoded labels
+
+    Raises
+    ------
+    FileNotFoundError
+        If the Code List has not been downloaded
+    ValueError
+        If the table, item, code, or label columns cannot be found in the
+        Code List
+    """
+    import pandas as pd
+
+    from .readers import read_studydata
+
+    fname = latest_local(_CODE_LIST, path=path)
+    if fname is None:
+        raise FileNotFoundError('Provided dataset {} has not been downloaded. '
+                                'Please use fetch_studydata() to download it '
+                                'first.'.format(_CODE_LIST))
+    stat = fname.stat()
+    key = (str(fname), stat.st_size, stat.st_mtime_ns)
+    if key in _CODES:
+        return _CODES[key]
+
+    codelist = read_studydata(_CODE_LIST, path=path)
+    columns = [
+        _find_column(codelist.columns, candidates) for candidates in
+        (_PAGE_COLUMNS, _ITEM_COLUMNS, _CODE_COLUMNS, _LABEL_COLUMNS)
+    ]
+    if None in columns:
+        raise ValueError('Cannot find table, item, code, and label columns in '
+                         '{}; found {}.'.format(fname.name, columns))
+    codelist = codelist[columns].set_axis(['table', 'item', 'code', 'label'],
+                                          axis=1).dropna()
+    codelist['table'] = codelist['table'].map(_normalize)
+    codelist['code'] = codelist['code'].astype(str).str.strip() \
+                                       .str.replace(r'\.0+$', '', regex=True)
+    codelist = codelist[~codelist[['table', 'item', 'code']].duplicated()]
+
+    codes = {}
+    for (table, item), group in codelist.groupby(['table', 'item'],
+                                                 sort=False):
+        labels = pd.Index(group['label'].astype(str))
+        categories = labels.unique()
+        codes.setdefault(table, {})[item] = (
+            pd.Index(group['code']),
+            categories.get_indexer(labels),
+            pd.CategoricalDtype(categories),
+        )
+
+    _CODES.clear()
+    _CODES[key] = codes
+    return codes
+
+
+def _recode(values: 'pd.Series', codes: 'pd.Index', positions: 'np.ndarray',
+            dtype: 'pd.CategoricalDtype') -> 'pd.Series':
+    """
+    Recode `values` into categorical `dtype` in a single vectorized lookup.
+
+    Parameters
+    ----------
+    values : pandas.Series
+        Coded values
+    codes : pandas.Index
+        Codes listed for `values`, as strings
+    positions : numpy.ndarray
+        Category in `dtype` of each of `codes`
+    dtype : pandas.CategoricalDtype
+        Categorical dtype of decoded labels
+
+    Returns
+    -------
+    decoded : pandas.Series
+        Decoded `values`; values not in `codes` are missing
+    """
+    import numpy as np
+    import pandas as pd
+
+    numeric = pd.to_numeric(codes, errors='coerce')
+    if pd.api.types.is_numeric_dtype(values) and numeric.notna().all() \
+            and numeric.is_unique:
+        found = pd.Index(numeric).get_indexer(values)
+    else:
+        values = values.astype(str).str.replace(r'\.0+$', '', regex=True)
+        found = codes.get_indexer(values)
+    categories = np.where(found >= 0, positions[found], -1)
+    return pd.Series(pd.Categorical.from_codes(categories, dtype=dtype),
+                     index=values.index, name=values.name)
+
+
+def decode(data: 'pd.DataFrame',
+           table: str,
+           columns: List[str] = None,
+           path: str = None) -> 'pd.DataFrame':
+    """
+    Decode coded answers in `data` using the harmonized Code List.
+
+    Categorical dtypes for every coded item are built from the Code List the
+    first time it is used and are re-used until a new version is downloaded,
+    so that each column is recoded with a single vectorized lookup.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Study data with coded answers
+    table : str
+        Name of the dataset `data` was taken from, as listed in
+        :py:func:`pypmi.fetchable_studydata`, or form code of its table in the
+        Code List (e.g., 'NUPDRS3')
+    columns : list of str, optional
+        Columns of `data` to decode. If not specified all columns listed in
+        the Code List for `table` are decoded. Default: None
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    decoded : pandas.DataFrame
+        Copy of `data` where decoded columns are categoricals of their labels.
+        Values not listed in the Code List are missing.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the Code List has not been downloaded
+    ValueError
+        If `table` is not in the Code List or any of `columns` are not coded
+    """
+    items = _find_table(table, _compile_codes(path), path)
+    if not items:
+        raise ValueError('Provided table {} not available in the {}.'
+                         .format(table, _CODE_LIST))
+    if columns is None:
+        columns = [col for col in data.columns if col in items]
+    missing = [col for col in columns if col not in items
+               or col not in data.columns]
+    if missing:
+        raise ValueError('Provided columns {} are not coded items of {}.'
+                         .format(missing, table))
+
+    decoded = data.copy()
+    for col in columns:
+        decoded[col] = _recode(data[col], *items[col])
+    return decoded
+
+
+def _read_forms(fname: 'Path', columns: List[str]) -> List[str]:
+    """
+    Read form codes in the PAG_NAME column of study data `fname`.
+
+    Only tables of participant data (i.e., with a PATNO column) are read, so
+    that tables describing other tables (e.g., the Code List) are skipped.
+
+    Parameters
+    ----------
+    fname : pathlib.Path
+        Filepath to CSV file
+    columns : list of str
+        Columns of `fname`
+
+    Returns
+    -------
+    forms : list of str
+        Unique form codes in `fname`
+    """
+    import pandas as pd
+
+    if 'PATNO' not in columns or 'PAG_NAME' not in columns:
+        return []
+    forms = pd.read_csv(fname, usecols=['PAG_NAME'], dtype=str)['PAG_NAME']
+    return sorted(forms.dropna().unique().tolist())
+
+
+def _read_headers(path: str = None,
+                  datasets: List[str] = None,
+                  forms: bool = False) -> Dict[str, List[str]]:
+    """
+    Read columns of the latest downloaded version of tabular study data.
+
+    Columns (and form codes, once requested) are cached in the data directory
+    and only re-read from files that changed since.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+    datasets : list of str, optional
+        Names of datasets to read. If not specified all downloaded datasets
+        are read. Default: None
+    forms : bool, optional
+        Whether to return the form codes in the PAG_NAME column of datasets
+        (see :py:func:`_read_forms`) instead of their columns. Default: False
+
+    Returns
+    -------
+    headers : dict
+        Mapping of names of downloaded datasets to their columns (or form
+        codes)
+    """
+    import pandas as pd
+
+    cache = _get_cache_dir(path) / 'headers.json'
+    try:
+        with open(cache, 'r', encoding='utf-8') as src:
+            cached = json.load(src)
+    except (FileNotFoundError, ValueError):
+        cached = {}
+
+    # files are listed oldest first, so the latest version of each wins
+    latest = {f['dataset']: f['filename'] for f in
+              list_local(type='studydata', path=path)
+              if f['dataset'] is not None and f['filename'].endswith('.csv')
+              and (datasets is None or f['dataset'] in datasets)}
+    data_dir = _get_data_dir(path)
+    headers = {}
+    entries = {} if datasets is None else dict(cached)
+    for dataset, filename in latest.items():
+        fname = data_dir / filename
+        stat = fname.stat()
+        entry = cached.get(filename)
+        if entry is None or len(entry) != 4 \
+                or entry[:2] != [stat.st_size, stat.st_mtime_ns]:
+            try:
+                columns = pd.read_csv(fname, nrows=0).columns.tolist()
+            except (ValueError, pd.errors.EmptyDataError):
+                columns = []
+            entry = [stat.st_size, stat.st_mtime_ns, columns, None]
+        if forms and entry[3] is None:
+            entry = entry[:3] + [_read_forms(fname, entry[2])]
+        entries[filename] = entry
+        headers[dataset] = entry[3 if forms else 2]
+
+    if entries != cached:
+        with _atomic_write(cache) as tmp, \
+                open(tmp, 'w', encoding='utf-8') as dest:
+            json.dump(entries, dest)
+    return headers
+
+
+def _variable_index(path: str = None) -> Dict[str, Dict[str, bool]]:
+    """
+    Build reverse index of the tabular study data containing each variable.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. Default: None
+
+    Returns
+    -------
+    index : dict
+        Mapping of variable names to mappings of the names of datasets with
+        that variable to whether they have been downloaded
+    """
+    index = {}
+    try:
+        tables = compile_schema(path)
+    except (FileNotFoundError, ValueError):
+        tables = {}
+    if tables:
+        datasets = [name for name, info in
+                    _load_catalog('studydata', path).items()
+                    if info['filename'].endswith('.csv')]
+        for dataset, keys in _dataset_keys(datasets, tables, path).items():
+            for key in keys:
+                for item in tables[key]:
+                    index.setdefault(item, {})[dataset] = False
+    for dataset, columns in _read_headers(path).items():
+        for col in columns:
+            index.setdefault(col, {})[dataset] = True
+    return index
+
+
+def find_variables(variables: List[str],
+                   path: str = None) -> Dict[str, List[str]]:
+    """
+    Find which tabular study data contain `variables`.
+
+    Variables are looked up in the Data Dictionary (if it has been downloaded)
+    and in the columns of all downloaded study data.
+
+    Parameters
+    ----------
+    variables : list of str
+        Names of variables (e.g., 'NP3TOT')
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory. Default: None
+
+    Returns
+    -------
+    datasets : dict
+        Mapping of `variables` to the names of the datasets containing them,
+        with downloaded datasets first; empty if a variable is not found
+    """
+    if isinstance(variables, str):
+        variables = [variables]
+    index = _variable_index(path)
+    return {
+        var: sorted(index.get(var, {}),
+                    key=lambda name: (not index[var][name], name))
+        for var in variables
+    }
@@ -15,6 +15,24 @@ else:
     with open(resource_filename('pypmi', 'data/studydata.json'), 'r') as src:
         _STUDYDATA = json.load(src)
 
+def pytest_configure(config):
+    """Register marker for tests timing against a fixed budget."""
+    config.addinivalue_line(
+        'markers', 'benchmark: wall-clock benchmark, only run if '
+        '$PYPMI_BENCHMARK is set'
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmarks unless $PYPMI_BENCHMARK is set."""
+    if os.environ.get('PYPMI_BENCHMARK'):
+        return
+    skip = pytest.mark.skip(reason='set $PYPMI_BENCHMARK to run benchmarks')
+    for item in items:
+        if 'benchmark' in item.keywords:
+            item.add_marker(skip)
+
+
 @pytest.fixture(scope='session')
 def datadir():
     """Return the path to the data directory."""
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""Code for testing the `pypmi` package."""
+
+import subprocess
+import sys
+
+import pytest
+
+from pypmi import catalog
+
+
+def _run_python(code):
+    """Run `code` in a fresh interpreter and return its stdout and stderr."""
+    out = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                         capture_output=True, text=True, check=True)
+    return out.stdout, out.stderr
+
+
+def _self_importtime(stderr, module):
+    """Return self import time (in microseconds) of `module` from `stderr`."""
+    for line in stderr.splitlines():
+        fields = [f.strip() for f in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[0].split()[-1])
+    raise ValueError('Module {} not found in import times'.format(module))
+
+
+def test_load_catalog():
+    """Test that we can load the bundled catalogs."""
+    studydata = catalog._load_catalog('studydata')
+    assert len(studydata) == 538
+    assert all({'id', 'filename'} <= set(v) for v in studydata.values())
+    # repeated access re-uses the loaded catalog
+    assert catalog._load_catalog('studydata') is studydata
+
+    with pytest.raises(ValueError):
+        catalog._load_catalog('imaging')
+
+
+def test_get_index():
+    """Test that the compact catalog index mirrors the catalog."""
+    genetics = catalog._load_catalog('genetics')
+    index = catalog._get_index('genetics')
+    assert len(index.names) == len(index.ids) == len(genetics)
+    for name in ('Project 118 WGS Variants - set 01 of 74',
+                 'Project 193: Whole Genome Sequencing of iPSC lines'):
+        pos = index.positions[name]
+        assert index.names[pos] == name
+        assert index.ids[pos] == genetics[name]['id']
+        assert index.filenames[pos] == genetics[name]['filename']
+
+
+def test_catalog_import_is_lazy():
+    """Test that importing the fetchers does not load the catalogs."""
+    stdout, stderr = _run_python(
+        'import pypmi.fetchers, pypmi.catalog as c; '
+        'print(c._load_bundled_catalog.cache_info().currsize)'
+    )
+    assert stdout.strip() == '0'
+    assert 'pkg_resources' not in stderr
+
+    # the catalogs are still available from the fetchers on access
+    stdout, _ = _run_python(
+        'import pypmi.fetchers as f; print(len(f._STUDYDATA))'
+    )
+    assert stdout.strip() == '538'
+
+
+@pytest.mark.parametrize(('query', 'kwargs', 'expected'), [
+    ('epworth', dict(), 'Epworth Sleepiness Scale'),
+    ('Epworth', dict(), 'Epworth Sleepiness Scale'),
+    ('epwrth', dict(), 'Epworth Sleepiness Scale'),
+    ('montreal cog', dict(), 'Montreal Cognitive Assessment (MoCA)'),
+    ('wgs variants', dict(project=118),
+     'Project 118 WGS Variants - set 01 of 74'),
+    ('code list', dict(type='studydata', extension='csv'), 'Code List'),
+])
+def test_search_datasets(query, kwargs, expected):
+    """Test that we can search the catalogs."""
+    results = catalog.search_datasets(query, **kwargs)
+    assert results[0]['name'] == expected
+    assert set(results[0]) == {'name', 'id', 'filename', 'type'}
+
+
+def test_search_datasets_filters():
+    """Test that search results respect the provided filters."""
+    results = catalog.search_datasets('wgs variants set', project=118)
+    assert all(r['type'] == 'genetics' for r in results)
+    assert all(' - set ' in r['name'] for r in results[:74])
+
+    results = catalog.search_datasets('proteomics', extension='.csv')
+    assert results and all(r['filename'].endswith('.csv') for r in results)
+
+    results = catalog.search_datasets('sequencing', type='genetics', limit=5)
+    assert len(results) == 5
+
+    assert catalog.search_datasets('qwxzvy') == []
+    with pytest.raises(ValueError):
+        catalog.search_datasets('updrs', type='imaging')
+
+
+@pytest.mark.parametrize(('name', 'expected'), [
+    ('Project 118 WGS Variants - set 12 of 74',
+     ('Project 118 WGS Variants', 12, 74)),
+    ('Project 190 Targeted & untargeted MS-based proteomics of urine in PD '
+     '1 of 5',
+     ('Project 190 Targeted & untargeted MS-based proteomics of urine in PD',
+      1, 5)),
+    ('Project 140: Comprehensive Methylation Profiling of the PPMI Cohort '
+     '02/28',
+     ('Project 140: Comprehensive Methylation Profiling of the PPMI Cohort',
+      2, 28)),
+    ('Benton Judgement of Line Orientation', (None, None, None)),
+])
+def test_get_part(name, expected):
+    """Test that we can determine multi-part group membership."""
+    assert catalog._get_part(name) == expected
+
+
+def test_describe_datasets(tmp_path):
+    """Test that we can describe datasets with cached metadata."""
+    desc = catalog.describe_datasets(path=tmp_path)
+    assert len(desc) == 538
+    info = desc['Code List']
+    assert info['format'] == 'csv' and info['category'] == 'tabular'
+    assert info['size'] is None
+    assert not (tmp_path / '.pypmi').exists()
+
+    desc = catalog.describe_datasets(
+        ['Project 118 WGS Variants - set 12 of 74'], type='genetics',
+        path=tmp_path
+    )
+    info = desc['Project 118 WGS Variants - set 12 of 74']
+    assert info['category'] == 'archive' and info['format'] == 'tar'
+    assert (info['group'], info['part'], info['parts']) == \
+        ('Project 118 WGS Variants', 12, 74)
+
+    metadata = catalog._load_metadata(tmp_path)
+    metadata['studydata']['2822'] = [1024, 'text/csv', 'Mon, 01 Jan 2024']
+    catalog._save_metadata(metadata, tmp_path)
+    info = catalog.describe_datasets('Code List', path=tmp_path)['Code List']
+    assert info['size'] == 1024 and info['content_type'] == 'text/csv'
+
+    with pytest.raises(ValueError):
+        catalog.describe_datasets(['Not a dataset'], path=tmp_path)
+
+
+STUDYDATA_LISTING = """
+<table>
+  <tr><th>Name</th><th>File</th></tr>
+  <tr>
+    <td><input type="checkbox" onclick="selectFile({fileId: 2822})"/></td>
+    <td>Code List</td><td>Code_List_-_Harmonized.csv</td>
+  </tr>
+  <tr>
+    <td><input type="checkbox" data-fileId="9999"/></td>
+    <td>Brand New Assessment</td><td>Brand_New_Assessment.csv</td>
+  </tr>
+  <tr><td>Section header without a file</td></tr>
+</table>
+"""
+
+GENETICS_LISTING = """
+<table>
+  <tr>
+    <td><a href="#" data-file="ppmi/ppmi_project118_set01of74.tar">Get</a></td>
+    <td>Project 118 WGS Variants - set 01 of 74</td>
+  </tr>
+  <tr>
+    <td><input value="ppmi/ppmi_project999_new.tar.gz"/></td>
+    <td>Project 999 New Variants</td>
+  </tr>
+</table>
+"""
+
+
+def test_parse_listing():
+    """Test that we can parse catalog entries from the IDA listings."""
+    entries = catalog._parse_listing(STUDYDATA_LISTING, 'studydata')
+    assert entries == {
+        'Code List': dict(id='2822', filename='Code_List_-_Harmonized.csv'),
+        'Brand New Assessment': dict(id='9999',
+                                     filename='Brand_New_Assessment.csv'),
+    }
+    merged = catalog._merge_listing(entries, 'studydata')
+    assert merged['Code List'] == catalog._load_bundled_catalog(
+        'studydata')['Code List']
+    assert merged['Brand New Assessment']['filename'] == \
+        'Brand_New_Assessment_{DATETOKEN}.csv'
+
+    entries = catalog._parse_listing(GENETICS_LISTING, 'genetics')
+    assert entries['Project 999 New Variants'] == dict(
+        id='ppmi/ppmi_project999_new.tar.gz',
+        filename='ppmi_project999_new.tar.gz'
+    )
+    assert len(entries) == 2
+
+
+def test_load_catalog_refreshed(tmp_path, monkeypatch):
+    """Test that refreshed catalog entries take precedence over bundled."""
+    entries = catalog._merge_listing(
+        catalog._parse_listing(STUDYDATA_LISTING, 'studydata'), 'studydata'
+    )
+    catalog._save_refreshed(dict(studydata=dict(entries=entries)), tmp_path)
+    try:
+        studydata = catalog._load_catalog('studydata', str(tmp_path))
+        assert len(studydata) == 539
+        assert studydata['Brand New Assessment']['id'] == '9999'
+        assert len(catalog._load_catalog('genetics', str(tmp_path))) == 237
+
+        # the catalog is cached on the resolved data directory
+        monkeypatch.setenv('PPMI_PATH', str(tmp_path))
+        assert catalog._load_catalog('studydata') is studydata
+        monkeypatch.chdir(tmp_path)
+        assert catalog._load_catalog('studydata', '.') is studydata
+
+        # and cannot be modified by callers
+        with pytest.raises(TypeError):
+            studydata['Brand New Assessment'] = {}
+        with pytest.raises(TypeError):
+            studydata['Brand New Assessment']['id'] = '0'
+    finally:
+        catalog._clear_caches()
+
+
+def test_diff_catalog(tmp_path):
+    """Test that we can compare catalog snapshots."""
+    old = {
+        'Code List': dict(id='1', filename='Code_List_{DATETOKEN}.csv'),
+        'Old Name': dict(id='2', filename='Old_{DATETOKEN}.csv'),
+        'Moved': dict(id='3', filename='Moved.csv'),
+        'Gone': dict(id='4', filename='Gone.csv'),
+        'Guide': dict(id='5', filename='Guide_20240101.pdf'),
+    }
+    new = {
+        'Code List': dict(id='1', filename='Code_List_{DATETOKEN}.csv'),
+        'New Name': dict(id='2', filename='Old_{DATETOKEN}.csv'),
+        'Moved Elsewhere': dict(id='3', filename='Moved_Elsewhere.csv'),
+        'Guide': dict(id='6', filename='Guide_20250101.pdf'),
+        'Brand New': dict(id='7', filename='Brand_New.csv'),
+    }
+    diff = catalog.diff_catalog(old, new)
+    assert diff['added'] == {'Brand New': new['Brand New']}
+    assert diff['removed'] == {'Gone': old['Gone']}
+    assert diff['renamed'] == {'Old Name': 'New Name',
+                               'Moved': 'Moved Elsewhere'}
+    assert set(diff['modified']) == {'Guide', 'Moved Elsewhere'}
+    assert sorted(diff['fetch']) == ['Brand New', 'Guide', 'Moved Elsewhere']
+
+    # snapshots are versioned by tag and compared against current catalogs
+    catalog.snapshot_catalog('2024Q3', path=tmp_path)
+    assert catalog.list_snapshots(path=tmp_path) == ['2024Q3']
+    snapshot = catalog.load_snapshot('2024Q3', path=tmp_path)
+    assert len(snapshot['genetics']) == 237
+    diff = catalog.diff_catalog('2024Q3', type='genetics', path=tmp_path)
+    assert diff['fetch'] == [] and diff['removed'] == {}
+    with pytest.raises(FileNotFoundError):
+        catalog.load_snapshot('2023Q1', path=tmp_path)
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""Code for testing the `pypmi` package."""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pypmi import catalog, datasets
+
+VISITS = ['BL', 'V01', 'V02', 'V04', 'V06', 'V08', 'V10', 'V12']
+
+
+def _write_studydata(path, participants=10, seed=1234):
+    """Write synthetic study data for all behavioral measures to `path`."""
+    rs = np.random.default_rng(seed)
+    studydata = catalog._load_catalog('studydata')
+    columns = {}
+    for measure in datasets._BEHAVIOR.values():
+        for source, items in measure.items.items():
+            columns.setdefault(datasets._SOURCES[source], set()).update(items)
+
+    tables = {}
+    patno = np.repeat(np.arange(3000, 3000 + participants), len(VISITS))
+    for source, items in columns.items():
+        data = pd.DataFrame({
+            'REC_ID': np.arange(len(patno)),
+            'PATNO': patno,
+            'EVENT_ID': np.tile(VISITS, participants),
+            'INFODT': ['{:02d}/20{:02d}'.format(n % 12 + 1, 10 + n % 10)
+                       for n in range(len(patno))],
+        })
+        if source.where is not None:
+            data[source.where[0]] = source.where[1][0]
+        for item in sorted(items):
+            data[item] = rs.integers(0, 4, size=len(patno))
+        data['ORIG_ENTRY'] = 'unused'
+        tables.setdefault(source.dataset, []).append(data)
+
+    for dataset, frames in tables.items():
+        fname = studydata[dataset]['filename'].format(DATETOKEN='01Jan2024')
+        pd.concat(frames).to_csv(path / fname, index=False)
+
+
+def test_load_behavior(tmp_path):
+    """Test that we can score behavioral measures."""
+    (tmp_path / 'Epworth_Sleepiness_Scale_01Jan2024.csv').write_text(
+        'REC_ID,PATNO,EVENT_ID,INFODT,ESS1,ESS2,ESS3,ESS4,ESS5,ESS6,ESS7,ESS8\n'
+        '1,3000,BL,02/2011,1,1,1,1,1,1,1,1\n'
+        '2,3000,V04,03/2012,0,1,2,3,0,1,2,3\n'
+        '3,3001,BL,04/2011,1,1,1,1,,1,1,1\n'
+    )
+    (tmp_path / 'Vital_Signs_01Jan2024.csv').write_text(
+        'PATNO,EVENT_ID,INFODT,SYSSUP,SYSSTND\n'
+        '3000,BL,01/2011,120,110\n'
+        '3002,BL,01/2011,130,135\n'
+    )
+    behavior = datasets.load_behavior(['epworth', 'systolic_bp_drop'],
+                                      path=tmp_path)
+    assert list(behavior.columns) == ['participant', 'visit', 'date',
+                                      'epworth', 'systolic_bp_drop']
+    assert list(behavior['participant']) == [3000, 3000, 3001, 3002]
+    assert list(behavior['visit']) == ['BL', 'V04', 'BL', 'BL']
+    np.testing.assert_array_equal(behavior['epworth'], [8, 12, np.nan, np.nan])
+    np.testing.assert_array_equal(behavior['systolic_bp_drop'],
+                                  [10, np.nan, np.nan, -5])
+    assert behavior['date'].iloc[0] == pd.Timestamp('2011-01-01')
+
+    with pytest.raises(ValueError):
+        datasets.load_behavior(['not_a_measure'], path=tmp_path)
+    with pytest.raises(FileNotFoundError):
+        datasets.load_behavior(['moca'], path=tmp_path)
+
+
+def test_load_behavior_all(tmp_path):
+    """Test that we can score all behavioral measures."""
+    _write_studydata(tmp_path)
+    behavior = datasets.load_behavior(path=tmp_path)
+    assert list(behavior.columns[3:]) == sorted(datasets._BEHAVIOR)
+    assert len(behavior) == 10 * len(VISITS)
+    # retention is undefined if nothing was recalled in trials 2 and 3
+    scores = behavior.drop(columns=['hvlt_retention']).iloc[:, 3:]
+    assert scores.notna().all().all()
+    assert behavior['hvlt_retention'].dtype == float
+
+
+@pytest.mark.benchmark
+def test_load_behavior_benchmark(tmp_path):
+    """Benchmark that scoring measures stays within a fixed time budget."""
+    _write_studydata(tmp_path, participants=2500)
+    start = time.perf_counter()
+    behavior = datasets.load_behavior(path=tmp_path)
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    datasets.load_behavior(path=tmp_path)
+    cached = time.perf_counter() - start
+    assert len(behavior) == 2500 * len(VISITS)
+    assert first < 10
+    assert cached < 2
+
+
+@pytest.mark.parametrize(('dates', 'expected'), [
+    (['01/2011', '12/1945', None, '2011-03-15', '13/2011', 'bad'],
+     ['2011-01-01', '1945-12-01', None, '2011-03-15', None, None]),
+    ([], []),
+])
+def test_parse_dates(dates, expected):
+    """Test that we can parse dates in the PPMI study data format."""
+    parsed = datasets._parse_dates(pd.Series(dates, dtype=object))
+    pd.testing.assert_series_equal(
+        parsed, pd.Series(pd.to_datetime(expected), dtype='datetime64[ns]'),
+        check_index_type=False
+    )
+
+
+DEMOGRAPHICS = {
+    'Participant_Status_01Jan2024.csv':
+        'PATNO,COHORT,ENROLL_DATE,ENROLL_STATUS,SITE,ENROLL_AGE\n'
+        '3001,2,03/2011,Enrolled,10,60.2\n'
+        '3000,1,02/2011,Withdrew,10,69.1\n'
+        '3002,4,01/2020,Enrolled,12,71.0\n',
+    'Demographics_01Jan2024.csv':
+        'PATNO,EVENT_ID,BIRTHDT,SEX,HANDED,RAWHITE,RABLACK,RAASIAN,RAHAWOPI,'
+        'RAINDALS,RANOS\n'
+        '3000,SC,02/1942,1,1,1,0,0,0,0,0\n'
+        '3000,BL,02/1942,1,1,1,0,0,0,0,0\n'
+        '3001,SC,03/1951,0,2,1,1,0,0,0,0\n',
+    'PD_Diagnosis_History_01Jan2024.csv': 'PATNO,PDDXDT\n3000,06/2010\n',
+    'Family_History_01Jan2024.csv': 'PATNO,ANYFAMPD\n3000,0\n3001,1\n',
+    'Socio-Economics_01Jan2024.csv': 'PATNO,EDUCYRS\n3000,16\n3001,12\n',
+}
+
+
+def test_load_demographics(tmp_path, monkeypatch):
+    """Test that we can load compact demographic information."""
+    for fname, contents in DEMOGRAPHICS.items():
+        (tmp_path / fname).write_text(contents)
+    demo = datasets.load_demographics(path=tmp_path)
+    assert list(demo.columns) == [
+        'participant', 'diagnosis', 'date_birth', 'date_diagnosis',
+        'date_enroll', 'status', 'family_history', 'age', 'gender', 'race',
+        'site', 'handedness', 'education'
+    ]
+    assert demo['participant'].dtype == np.int32
+    assert list(demo['participant']) == [3000, 3001, 3002]
+    for col in ('diagnosis', 'status', 'gender', 'race', 'site',
+                'handedness'):
+        assert isinstance(demo[col].dtype, pd.CategoricalDtype)
+    assert list(demo['diagnosis']) == ['pd', 'hc', 'prodromal']
+    assert list(demo['race'].astype(object).fillna('')) == \
+        ['white', 'multiple', '']
+    assert list(demo['gender'].astype(object).fillna('')) == ['m', 'f', '']
+    assert demo['family_history'].tolist() == [False, True, pd.NA]
+    assert demo['date_diagnosis'].iloc[0] == pd.Timestamp('2010-06-01')
+    assert demo['age'].iloc[0] == pytest.approx(69, abs=0.01)
+
+    # results are cached until the study data change
+    with monkeypatch.context() as m:
+        m.setattr(datasets, 'read_studydata', None)
+        cached = datasets.load_demographics(path=tmp_path)
+        pd.testing.assert_frame_equal(cached, demo)
+    cached.loc[0, 'education'] = 0
+    assert datasets.load_demographics(path=tmp_path).loc[0, 'education'] == 16
+    (tmp_path / 'Socio-Economics_01Jan2024.csv').write_text(
+        'PATNO,EDUCYRS\n3000,18\n'
+    )
+    assert datasets.load_demographics(path=tmp_path).loc[0, 'education'] == 18
+
+
+def test_load_demographics_memory(tmp_path):
+    """Benchmark that demographic information is stored compactly."""
+    rs = np.random.default_rng(1234)
+    n = 5000
+    patno = np.arange(3000, 3000 + n)
+    dates = ['{:02d}/{}'.format(m, y) for m, y in
+             zip(rs.integers(1, 13, n), rs.integers(1930, 1990, n))]
+    pd.DataFrame(dict(PATNO=patno, COHORT=rs.integers(1, 5, n),
+                      ENROLL_DATE='01/2015', SITE=rs.integers(1, 40, n),
+                      ENROLL_STATUS=rs.choice(['Enrolled', 'Withdrew'], n))) \
+        .to_csv(tmp_path / 'Participant_Status_01Jan2024.csv', index=False)
+    race = {col: rs.integers(0, 2, n) for col in datasets._RACE}
+    pd.DataFrame(dict(PATNO=patno, BIRTHDT=dates, SEX=rs.integers(0, 2, n),
+                      HANDED=rs.integers(1, 4, n), **race)) \
+        .to_csv(tmp_path / 'Demographics_01Jan2024.csv', index=False)
+    pd.DataFrame(dict(PATNO=patno, PDDXDT=dates)) \
+        .to_csv(tmp_path / 'PD_Diagnosis_History_01Jan2024.csv', index=False)
+    pd.DataFrame(dict(PATNO=patno, ANYFAMPD=rs.integers(0, 2, n))) \
+        .to_csv(tmp_path / 'Family_History_01Jan2024.csv', index=False)
+    pd.DataFrame(dict(PATNO=patno, EDUCYRS=rs.integers(8, 20, n))) \
+        .to_csv(tmp_path / 'Socio-Economics_01Jan2024.csv', index=False)
+
+    demo = datasets.load_demographics(path=tmp_path)
+    assert len(demo) == n
+    compact = demo.memory_usage(deep=True).sum()
+    loose = demo.astype(object).memory_usage(deep=True).sum()
+    assert compact < loose / 10
+
+
+def test_align_visits(tmp_path):
+    """Test that we can align assessments from tables to the same visits."""
+    (tmp_path / 'Epworth_Sleepiness_Scale_01Jan2024.csv').write_text(
+        'PATNO,EVENT_ID,INFODT,ESS1\n'
+        '3000,BL,02/2011,1\n'
+        '3000,V04,03/2012,2\n'
+        '3001,BL,04/2011,3\n'
+        '3001,V04,,4\n'
+    )
+    (tmp_path / 'Vital_Signs_01Jan2024.csv').write_text(
+        'PATNO,EVENT_ID,INFODT,SYSSUP,SYSSTND\n'
+        '3000,SC,01/2011,120,110\n'
+        '3000,V04,09/2012,125,120\n'
+        '3002,BL,01/2011,130,135\n'
+    )
+    tables = {'Epworth Sleepiness Scale': ['ESS1'],
+              'Vital Signs': ['SYSSUP', 'SYSSTND']}
+
+    aligned = datasets.align_visits(tables, path=tmp_path)
+    assert aligned.index.names == ['participant', 'visit']
+    assert aligned.index.is_unique
+    assert aligned.index.tolist() == [(3000, 'SC'), (3000, 'BL'),
+                                      (3000, 'V04'), (3001, 'BL'),
+                                      (3001, 'V04'), (3002, 'BL')]
+    assert list(aligned.columns) == ['date', 'ESS1', 'SYSSUP', 'SYSSTND']
+    # assessments are matched to their own visit, even when dated apart
+    assert aligned['ESS1'].fillna(-1).tolist() == [-1, 1, 2, 3, 4, -1]
+    assert aligned['SYSSUP'].fillna(-1).tolist() == [120, -1, 125, -1, -1,
+                                                     130]
+    assert aligned.loc[(3000, 'V04'), 'date'] == pd.Timestamp('2012-03-01')
+
+    # visits missing from a table are matched to its nearest assessment
+    aligned = datasets.align_visits(tables, reference='Epworth Sleepiness '
+                                    'Scale', path=tmp_path)
+    assert aligned.index.tolist() == [(3000, 'BL'), (3000, 'V04'),
+                                      (3001, 'BL'), (3001, 'V04')]
+    assert aligned['SYSSUP'].fillna(-1).tolist() == [120, 125, -1, -1]
+    aligned = datasets.align_visits(tables, reference='Epworth Sleepiness '
+                                    'Scale', tolerance=10, path=tmp_path)
+    assert aligned['SYSSUP'].fillna(-1).tolist() == [-1, 125, -1, -1]
+
+    with pytest.raises(ValueError):
+        datasets.align_visits(tables, reference='Vital Signs', tolerance=-1,
+                              path=tmp_path)
+    with pytest.raises(ValueError):
+        datasets.align_visits(tables, reference='Demographics', path=tmp_path)
+    with pytest.raises(ValueError):
+        datasets.align_visits({'Vital Signs': ['PATNO']}, path=tmp_path)
+    with pytest.raises(FileNotFoundError):
+        datasets.align_visits({'Demographics': ['SEX']}, path=tmp_path)
+
+
+def test_load_variables(tmp_path, monkeypatch):
+    """Test that we can load variables without knowing their datasets."""
+    from pypmi import fetchers, manifest, schema
+
+    (tmp_path / 'Data_Dictionary_-_Harmonized_01Jan2024.csv').write_text(
+        'MOD_NAME,ITM_NAME,DATA_TYPE\n'
+        'SCREEN,SEX,NUMBER\n'
+        'SOCIOECO,EDUCYRS,NUMBER\n'
+        'NUPDRS3,NP3SPCH,NUMBER\n'
+    )
+    (tmp_path / 'Epworth_Sleepiness_Scale_01Jan2024.csv').write_text(
+        'PATNO,EVENT_ID,ESS1,ESS2\n'
+        '3000,BL,1,2\n'
+        '3000,V04,2,3\n'
+        '3001,BL,0,0\n'
+    )
+    (tmp_path / 'Vital_Signs_01Jan2024.csv').write_text(
+        'PATNO,EVENT_ID,SYSSUP,ESS1\n'
+        '3000,BL,120,9\n'
+        '3002,BL,130,9\n'
+    )
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(
+        'PATNO,SEX\n3000,1\n3001,0\n3002,0\n'
+    )
+    assert schema.find_variables(['ESS1', 'EDUCYRS', 'NP3SPCH', 'NOPE'],
+                                 path=tmp_path) == {
+        'ESS1': ['Epworth Sleepiness Scale', 'Vital Signs'],
+        'EDUCYRS': ['Socio-Economics'],
+        'NP3SPCH': ['MDS-UPDRS Part III Treatment Determination and Part '
+                    'III: Motor Examination'],
+        'NOPE': [],
+    }
+
+    data = datasets.load_variables(['SYSSUP', 'ESS2', 'ESS1', 'SEX'],
+                                   path=tmp_path)
+    assert list(data.columns) == ['participant', 'visit', 'SYSSUP', 'ESS2',
+                                  'ESS1', 'SEX']
+    assert list(data['participant']) == [3000, 3000, 3001, 3002]
+    assert list(data['visit']) == ['BL', 'V04', 'BL', 'BL']
+    # variables are taken from the table with most of them
+    assert list(data['ESS1'].fillna(-1)) == [1, 2, 0, -1]
+    assert list(data['SEX']) == [1, 1, 0, 0]
+
+    data = datasets.load_variables('SEX', path=tmp_path)
+    assert list(data.columns) == ['participant', 'SEX']
+
+    # required datasets that have not been downloaded are fetched
+    with pytest.raises(FileNotFoundError):
+        datasets.load_variables(['EDUCYRS'], path=tmp_path, fetch=False)
+
+    def _fetch_studydata(datasets, path=None, **kwargs):
+        assert datasets == ['Socio-Economics']
+        fname = path / 'Socio-Economics_01Jan2024.csv'
+        fname.write_text('PATNO,EDUCYRS\n3000,16\n')
+        manifest.rescan(path=path)
+        return [fname]
+
+    monkeypatch.setattr(fetchers, 'fetch_studydata', _fetch_studydata)
+    data = datasets.load_variables(['EDUCYRS', 'SEX'], path=tmp_path)
+    assert list(data['EDUCYRS'].fillna(0)) == [16, 0, 0]
+
+    with pytest.raises(ValueError):
+        datasets.load_variables(['NOPE'], path=tmp_path)
+    with pytest.raises(ValueError):
+        datasets.load_variables(['PATNO'], path=tmp_path)
+
+    # repeated assessments are dropped, but not silently
+    (tmp_path / 'Epworth_Sleepiness_Scale_01Jan2024.csv').write_text(
+        'PATNO,EVENT_ID,ESS1,ESS2\n'
+        '3000,BL,1,2\n'
+        '3000,BL,2,3\n'
+    )
+    with pytest.warns(UserWarning, match='1 repeated rows'):
+        data = datasets.load_variables(['ESS2'], path=tmp_path)
+    assert list(data['ESS2']) == [2]
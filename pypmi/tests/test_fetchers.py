@@ -2,11 +2,12 @@
 """Code for testing the `pypmi` package."""
 
 import os
+import re
 import pytest
 import requests
 from pathlib import Path
 
-from pypmi import fetchers
+from pypmi import catalog, fetchers
 
 def test_get_download_params():
     """Test that we can retrieve the authorization key."""
@@ -48,6 +49,30 @@ def test_fetchable_genetics():
     assert isinstance(dsets, list) and len(dsets) == 237
 
 
+def test_fetchable_genetics_projects():
+    """Test that we can retrieve the list of available genetics projects."""
+    projects = fetchers.fetchable_genetics(projects=True)
+    assert '118' in projects and '150.10' in projects
+    assert projects.index('150.9') < projects.index('150.10')
+
+
+@pytest.mark.parametrize(('kwargs', 'expected'), [
+    (dict(datasets='all'), 237),
+    (dict(project=118), 77),
+    (dict(project='150.2'), 2),
+    (dict(project=150), 22),
+    (dict(pattern='Project 118 WGS Variants - set*'), 74),
+    (dict(pattern=re.compile(r'set \d+ of 78')), 78),
+    (dict(datasets=['Project 118 WGS Variants - set 01 of 74'],
+          project=118), 77),
+])
+def test_select_datasets(kwargs, expected):
+    """Test that project and pattern selectors expand to catalog entries."""
+    selected = fetchers._select_datasets(fetchers._GENETICS, **kwargs)
+    assert len(selected) == expected
+    assert all(dset in fetchers._GENETICS for dset in selected)
+
+
 @pytest.mark.parametrize(('datasets', 'expected'), [
     (['Project 272: PPMI Isogenic iPSCs Whole Genome Sequencing'], 1),
     ([
@@ -65,3 +90,42 @@ def test_fetch_genetics(datadir, datasets, expected):
     )
     assert len(out) == expected
     assert all([f.is_file() for f in out])
+
+
+class _ListingSession:
+    """Stand-in for an authenticated session serving the IDA listings."""
+
+    def __init__(self, text, etag):
+        self.text, self.etag, self.requests = text, etag, []
+
+    def get(self, url, headers=None):
+        self.requests.append(headers)
+        response = requests.Response()
+        if (headers or {}).get('If-None-Match') == self.etag:
+            response.status_code = 304
+        else:
+            response.status_code = 200
+            response._content = self.text.encode()
+            response.headers['ETag'] = self.etag
+        return response
+
+
+def test_refresh_catalog(tmp_path, monkeypatch):
+    """Test that we can refresh the catalog using conditional requests."""
+    from pypmi.tests.test_catalog import GENETICS_LISTING
+
+    session = _ListingSession(GENETICS_LISTING, etag='"v1"')
+    monkeypatch.setattr(fetchers, '_get_auth_session', lambda **_: session)
+    try:
+        out = fetchers.refresh_catalog('genetics', path=tmp_path,
+                                       user='user', password='pass',
+                                       verbose=False)
+        assert 'Project 999 New Variants' in out['genetics']
+        assert len(out['genetics']) == 238
+
+        # the second refresh is validated against the cached ETag
+        fetchers.refresh_catalog('genetics', path=tmp_path, user='user',
+                                 password='pass', verbose=False)
+        assert session.requests[-1] == {'If-None-Match': '"v1"'}
+    finally:
+        catalog._clear_caches()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""Code for testing the `pypmi` package."""
+
+import pytest
+
+from pypmi.tests.test_catalog import _run_python, _self_importtime
+
+
+def test_version_is_lazy():
+    """Test that importing pypmi does not resolve the version."""
+    stdout, _ = _run_python(
+        'import sys, pypmi; print("pypmi._version" in sys.modules)'
+    )
+    assert stdout.strip() == 'False'
+
+    stdout, _ = _run_python(
+        'import sys, pypmi; v = pypmi.__version__; '
+        'print(isinstance(v, str), v is pypmi.__version__)'
+    )
+    assert stdout.split() == ['True', 'True']
+
+
+HEAVY = ('requests', 'tqdm', 'numpy', 'pandas', 'sqlite3',
+         'concurrent.futures')
+
+
+MODULES = ('pypmi', 'pypmi.utils', 'pypmi.catalog', 'pypmi.manifest',
+           'pypmi.fetchers', 'pypmi.schema', 'pypmi.memo')
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_submodule_imports(module):
+    """Test that importing submodules does not pull in heavy deps."""
+    _, stderr = _run_python('import {}'.format(module))
+    imported = {
+        line.split('|')[-1].strip() for line in stderr.splitlines()
+        if line.startswith('import time:')
+    }
+    assert not imported.intersection(HEAVY)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('module', MODULES)
+def test_submodule_importtime(module):
+    """Benchmark that importing submodules stays within a fixed budget."""
+    _, stderr = _run_python('import {}'.format(module))
+    assert _self_importtime(stderr, module) < 20000
+
+
+def test_lazy_exports():
+    """Test that public functions are resolved lazily from pypmi."""
+    stdout, _ = _run_python(
+        'import sys, pypmi; print("pypmi.fetchers" in sys.modules); '
+        'f = pypmi.fetch_studydata; '
+        'print("pypmi.fetchers" in sys.modules, '
+        'f is pypmi.fetchers.fetch_studydata, "rescan" in dir(pypmi))'
+    )
+    assert stdout.split() == ['False', 'True', 'True', 'True']
+
+    import pypmi
+    with pytest.raises(AttributeError):
+        getattr(pypmi, 'not_a_function')  # noqa: B009
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Code for testing the `pypmi` package."""
+
+from pypmi import manifest, utils
+
+
+def test_identify():
+    """Test that we can identify the dataset a file was downloaded from."""
+    templates = manifest._get_templates()
+    assert manifest._identify('Code_List_-_Harmonized_01Jan2024.csv',
+                              templates) == \
+        ('Code_List_-_Harmonized_{DATETOKEN}.csv', 'studydata', 'Code List',
+         '01Jan2024')
+    assert manifest._identify('ppmi_project118_set01of74.tar', templates) == \
+        ('ppmi_project118_set01of74.tar', 'genetics',
+         'Project 118 WGS Variants - set 01 of 74', None)
+    assert manifest._identify('notes.txt', templates) == \
+        ('notes.txt', None, None, None)
+
+
+def test_local_index(tmp_path):
+    """Test that we can query the index of downloaded files."""
+    for fn in ('Code_List_-_Harmonized_01Jan2024.csv',
+               'Code_List_-_Harmonized_15Mar2024.csv', 'notes.txt'):
+        (tmp_path / fn).write_text('PATNO,EVENT_ID\n3000,BL\n')
+
+    # the index is built from the existing files on first use
+    files = manifest.list_local(path=tmp_path)
+    assert len(files) == 3
+    assert len(manifest.list_local(type='studydata', path=tmp_path)) == 2
+    assert manifest.latest_local('Code List', path=tmp_path) == \
+        tmp_path / 'Code_List_-_Harmonized_15Mar2024.csv'
+    assert manifest.latest_local('Data Dictionary', path=tmp_path) is None
+
+    template = 'Code_List_-_Harmonized_{DATETOKEN}.csv'
+    assert utils._check_data_exist(tmp_path, template)
+    assert utils._check_data_exist(tmp_path, template, datetoken='01Jan2024')
+    assert not utils._check_data_exist(tmp_path, template,
+                                       datetoken='01Jan2000')
+    assert not utils._check_data_exist(
+        tmp_path, 'Data_Dictionary_-_Harmonized_{DATETOKEN}.csv'
+    )
+
+    # downloads are recorded incrementally, with their hash
+    fname = tmp_path / 'Data_Dictionary_-_Harmonized_01Jan2024.csv'
+    fname.write_text('ITM_NAME\nNP3TOT\n')
+    manifest._record_downloads([fname], hashes=[manifest._hash_file(fname)],
+                               path=tmp_path)
+    assert manifest.latest_local('Data Dictionary', path=tmp_path) == fname
+    entry = [f for f in manifest.list_local(path=tmp_path)
+             if f['dataset'] == 'Data Dictionary'][0]
+    assert entry['sha256'] == manifest._hash_file(fname)
+    assert entry['size'] == fname.stat().st_size
+
+    # stale entries are dropped when the file disappears
+    (tmp_path / 'Code_List_-_Harmonized_15Mar2024.csv').unlink()
+    assert manifest.latest_local('Code List', path=tmp_path) == \
+        tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv'
+    assert len(manifest.list_local(path=tmp_path)) == 3
+
+    # files copied in after the index was built are found once rescanned,
+    # which misses only do once per process
+    (tmp_path / 'Socio-Economics_01Jan2024.csv').write_text('PATNO\n3000\n')
+    assert not utils._check_data_exist(tmp_path,
+                                       'Socio-Economics_{DATETOKEN}.csv')
+    manifest.rescan(path=tmp_path)
+    assert utils._check_data_exist(tmp_path, 'Socio-Economics_{DATETOKEN}.csv')
+    assert manifest.latest_local('Socio-Economics', path=tmp_path) == \
+        tmp_path / 'Socio-Economics_01Jan2024.csv'
+
+
+def test_check_data_exist(tmp_path):
+    """Test that misses rescan the data directory once per process."""
+    assert manifest.list_local(path=tmp_path) == []
+    template = 'Code_List_-_Harmonized_{DATETOKEN}.csv'
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text('CODE\n')
+    assert utils._check_data_exist(tmp_path, template)
+    assert not utils._check_data_exist(
+        tmp_path, 'Data_Dictionary_-_Harmonized_{DATETOKEN}.csv'
+    )
+    (tmp_path / 'Data_Dictionary_-_Harmonized_01Jan2024.csv').write_text('')
+    assert not utils._check_data_exist(
+        tmp_path, 'Data_Dictionary_-_Harmonized_{DATETOKEN}.csv'
+    )
+
+
+def test_rescan(tmp_path):
+    """Test that we can detect changes made to the data directory."""
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text('a\n1\n')
+    (tmp_path / 'old.txt').write_text('old')
+    manifest.list_local(path=tmp_path)
+
+    # unhashed files are hashed, but not reported as changed
+    assert manifest.rescan(path=tmp_path) == \
+        dict(added=[], modified=[], removed=[])
+    assert all(f['sha256'] is not None
+               for f in manifest.list_local(path=tmp_path))
+
+    (tmp_path / 'old.txt').unlink()
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text('a\n1\n2\n')
+    extracted = tmp_path / 'project118' / 'set01'
+    extracted.mkdir(parents=True)
+    for n in range(5):
+        (extracted / 'sample{}.vcf'.format(n)).write_text(str(n))
+
+    changes = manifest.rescan(path=tmp_path, n_jobs=2)
+    assert sorted(changes['added']) == \
+        ['project118/set01/sample{}.vcf'.format(n) for n in range(5)]
+    assert changes['modified'] == ['Code_List_-_Harmonized_01Jan2024.csv']
+    assert changes['removed'] == ['old.txt']
+
+    files = {f['filename']: f for f in manifest.list_local(path=tmp_path)}
+    assert len(files) == 6 and '.pypmi/manifest.sqlite' not in files
+    assert files['Code_List_-_Harmonized_01Jan2024.csv']['sha256'] == \
+        manifest._hash_file(tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv')
+
+    # nothing changed since the last scan
+    assert manifest.rescan(path=tmp_path) == \
+        dict(added=[], modified=[], removed=[])
+
+
+def test_symlinked_files(tmp_path):
+    """Test that files symlinked into the data directory are indexed."""
+    external, data_dir = tmp_path / 'external', tmp_path / 'data'
+    external.mkdir()
+    data_dir.mkdir()
+    source = external / 'Code_List_-_Harmonized_01Jan2024.csv'
+    source.write_text('a\n1\n')
+    fname = data_dir / source.name
+    fname.symlink_to(source)
+
+    files = manifest.list_local(path=data_dir)
+    assert [f['filename'] for f in files] == [source.name]
+    assert manifest.latest_local('Code List', path=data_dir) == fname
+    assert manifest._get_hash(fname, path=data_dir) == \
+        manifest._hash_file(source)
+    assert manifest.rescan(path=data_dir) == \
+        dict(added=[], modified=[], removed=[])
+    assert utils._check_data_exist(data_dir, source.name.replace(
+        '01Jan2024', '{DATETOKEN}'
+    ))
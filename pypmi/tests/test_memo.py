@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""Code for testing the `pypmi` package."""
+
+import pandas as pd
+import pytest
+
+import pypmi
+from pypmi import manifest, memo, readers
+
+pytest.importorskip('pyarrow')
+
+DEMOGRAPHICS = ('PATNO,SEX,HANDED,RAWHITE\n'
+                '3000,1,1,1\n'
+                '3001,0,2,0\n')
+
+
+def _make_loader(calls):
+    """Return memoized loader of demographics appending its calls to list."""
+    @memo.memoize(lambda column, path=None: ['Demographics'])
+    def load(column, path=None):
+        calls.append(column)
+        data = readers.read_studydata('Demographics', path=path)
+        return data[['PATNO', column]].assign(
+            category=pd.Categorical(data[column], categories=[2, 1, 0])
+        )
+    return load
+
+
+def test_memoize(tmp_path, monkeypatch):
+    """Test that loaders are memoized on their arguments and input files."""
+    calls = []
+    load = _make_loader(calls)
+    with pytest.raises(FileNotFoundError):
+        load('SEX', path=tmp_path)
+    assert calls == ['SEX']
+
+    fname = tmp_path / 'Demographics_01Jan2024.csv'
+    fname.write_text(DEMOGRAPHICS)
+    manifest.rescan(path=tmp_path)
+    expected = load('SEX', path=tmp_path)
+    pd.testing.assert_frame_equal(load('SEX', path=tmp_path), expected)
+    pd.testing.assert_frame_equal(load(path=tmp_path, column='SEX'),
+                                  expected)
+    assert calls == ['SEX', 'SEX']
+    load('HANDED', path=tmp_path)
+    assert calls == ['SEX', 'SEX', 'HANDED']
+    assert len(list((tmp_path / '.pypmi' / 'memo').glob('*.parquet'))) == 2
+
+    # changing the input files invalidates results
+    fname.write_text(DEMOGRAPHICS.replace('3001,0,2,0', '3001,1,2,0'))
+    assert list(load('SEX', path=tmp_path)['SEX']) == [1, 1]
+    assert calls == ['SEX', 'SEX', 'HANDED', 'SEX']
+
+    # as does fetching new versions of them
+    memo._invalidate(['Demographics'], path=tmp_path)
+    load('SEX', path=tmp_path)
+    assert calls[-1] == 'SEX' and len(calls) == 5
+
+    # as does upgrading pypmi
+    load('SEX', path=tmp_path)
+    assert len(calls) == 5
+    monkeypatch.setattr(pypmi, '__version__', '0.0.0+other', raising=False)
+    load('SEX', path=tmp_path)
+    assert len(calls) == 6
+    memo.clear_memo(path=tmp_path)
+    assert not list((tmp_path / '.pypmi' / 'memo').glob('*.parquet'))
+
+
+def test_memoize_evict(tmp_path, monkeypatch):
+    """Test that least recently used results are evicted beyond size cap."""
+    calls = []
+    load = _make_loader(calls)
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(DEMOGRAPHICS)
+    load('SEX', path=tmp_path)
+    size = next((tmp_path / '.pypmi' / 'memo').glob('*.parquet')) \
+        .stat().st_size
+    monkeypatch.setenv('PPMI_MEMO_SIZE', str(int(size * 2.5)))
+
+    load('HANDED', path=tmp_path)
+    load('SEX', path=tmp_path)
+    load('RAWHITE', path=tmp_path)
+    assert calls == ['SEX', 'HANDED', 'RAWHITE']
+    # 'HANDED' was least recently used
+    load('SEX', path=tmp_path)
+    load('RAWHITE', path=tmp_path)
+    load('HANDED', path=tmp_path)
+    assert calls == ['SEX', 'HANDED', 'RAWHITE', 'HANDED']
+
+
+def test_memoize_concurrent(tmp_path):
+    """Test that concurrent loaders do not lose each other's results."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    calls = []
+    load = _make_loader(calls)
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(DEMOGRAPHICS)
+    manifest.rescan(path=tmp_path)
+    columns = ['SEX', 'HANDED', 'RAWHITE'] * 4
+    with ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda col: load(col, path=tmp_path), columns))
+    n_calls = len(calls)
+    for col in set(columns):
+        load(col, path=tmp_path)
+    assert len(calls) == n_calls
+
+    # results that were never indexed are cleared, too
+    memo_dir = tmp_path / '.pypmi' / 'memo'
+    (memo_dir / 'orphan.parquet').write_bytes(b'')
+    memo.clear_memo(path=tmp_path)
+    assert not list(memo_dir.glob('*.parquet'))
+
+
+def test_memoize_mapping_order(tmp_path):
+    """Test that mappings passed in a different order are memoized apart."""
+    from pypmi import datasets
+
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(DEMOGRAPHICS)
+    (tmp_path / 'Vital_Signs_01Jan2024.csv').write_text(
+        'PATNO,EVENT_ID,INFODT,SYSSUP\n3000,BL,01/2011,120\n'
+    )
+    (tmp_path / 'Epworth_Sleepiness_Scale_01Jan2024.csv').write_text(
+        'PATNO,EVENT_ID,INFODT,ESS1\n3000,BL,01/2011,1\n'
+    )
+    first = datasets.align_visits({'Vital Signs': ['SYSSUP'],
+                                   'Epworth Sleepiness Scale': ['ESS1']},
+                                  path=tmp_path)
+    second = datasets.align_visits({'Epworth Sleepiness Scale': ['ESS1'],
+                                    'Vital Signs': ['SYSSUP']},
+                                   path=tmp_path)
+    assert list(first.columns) == ['date', 'SYSSUP', 'ESS1']
+    assert list(second.columns) == ['date', 'ESS1', 'SYSSUP']
+    assert len(list((tmp_path / '.pypmi' / 'memo').glob('*.parquet'))) == 2
@@ -0,0 +1,439 @@
+# -*- coding: utf-8 -*-
+"""Code for testing the `pypmi` package."""
+
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from pypmi import readers
+
+pytest.importorskip('pyarrow')
+
+CODE_LIST = ('PAG_NAME,ITM_NAME,CODE,DECODE\n'
+             'NUPDRS3,NP3TOT,0,Normal\n'
+             'NUPDRS3,NP3TOT,1,Slight\n'
+             'MOCA,MCATOT,,\n')
+
+
+def test_read_studydata(tmp_path, monkeypatch):
+    """Test that we can read study data through the Parquet cache."""
+    fname = tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv'
+    fname.write_text(CODE_LIST)
+    expected = pd.read_csv(fname)
+
+    data = readers.read_studydata('Code List', path=tmp_path)
+    pd.testing.assert_frame_equal(data, expected)
+    cache = tmp_path / '.pypmi' / 'tables' / 'Code_List_-_Harmonized.parquet'
+    assert cache.is_file()
+
+    # subsequent reads (even after the file was touched) do not parse the CSV
+    def _read_csv(*args, **kwargs):
+        raise AssertionError('CSV file should not be parsed')
+
+    with monkeypatch.context() as m:
+        m.setattr(readers, '_read_csv', _read_csv)
+        pd.testing.assert_frame_equal(
+            readers.read_studydata('Code List', path=tmp_path), expected
+        )
+        stat = fname.stat()
+        os.utime(fname, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        pd.testing.assert_frame_equal(
+            readers.read_studydata('Code List', path=tmp_path), expected
+        )
+
+    # but modified files are converted again
+    fname.write_text(CODE_LIST + 'MOCA,MCATOT,1,Impaired\n')
+    assert len(readers.read_studydata('Code List', path=tmp_path)) == 4
+    assert len(readers.read_studydata('Code List', path=tmp_path,
+                                      cache=False)) == 4
+    assert len(readers.read_studydata('Code List', tmp_path, False)) == 4
+
+    with pytest.raises(FileNotFoundError):
+        readers.read_studydata('Demographics', path=tmp_path)
+    with pytest.raises(ValueError):
+        readers.read_studydata('PPMI Data User Guide', path=tmp_path)
+    with pytest.raises(ValueError):
+        readers.read_studydata('Not a dataset', path=tmp_path)
+
+
+def test_arrow_store(tmp_path):
+    """Test that we can read tables from the memory-mapped Arrow store."""
+    import pyarrow as pa
+
+    fname = tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv'
+    fname.write_text(CODE_LIST)
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text('PATNO,SEX\n3000,1\n')
+    (tmp_path / 'notes.txt').write_text('not a table')
+
+    store = readers.build_store(path=tmp_path)
+    assert sorted(p.name for p in store.iterdir()) == \
+        ['Code_List_-_Harmonized.arrow', 'Demographics.arrow']
+
+    allocated = pa.total_allocated_bytes()
+    table = readers.read_arrow('Code List', columns=['ITM_NAME', 'CODE'],
+                               path=tmp_path)
+    assert pa.total_allocated_bytes() == allocated
+    assert table.column_names == ['ITM_NAME', 'CODE']
+    pd.testing.assert_frame_equal(table.to_pandas(),
+                                  pd.read_csv(fname)[['ITM_NAME', 'CODE']])
+
+    # tables are updated in the store when the CSV file changes
+    fname.write_text(CODE_LIST + 'MOCA,MCATOT,1,Impaired\n')
+    assert readers.read_arrow('Code List', path=tmp_path).num_rows == 4
+
+    # tables built concurrently are all kept in the store
+    from concurrent.futures import ThreadPoolExecutor
+
+    for name in ('Code_List_-_Harmonized.arrow', 'Demographics.arrow'):
+        (store / name).unlink()
+    with ThreadPoolExecutor(2) as executor:
+        list(executor.map(
+            lambda name: readers.build_store([name], path=tmp_path),
+            ['Code List', 'Demographics']
+        ))
+    with pytest.MonkeyPatch.context() as m:
+        m.setattr(readers, 'read_studydata', None)
+        assert readers.read_arrow('Demographics', path=tmp_path).num_rows == 1
+        assert readers.read_arrow('Code List', path=tmp_path).num_rows == 4
+
+    with pytest.raises(FileNotFoundError):
+        readers.read_arrow('Data Dictionary', path=tmp_path)
+
+
+def test_pack_studydata(tmp_path):
+    """Test that we can read tables from a packed HDF5 container."""
+    pytest.importorskip('h5py')
+
+    fname = tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv'
+    fname.write_text(CODE_LIST)
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(
+        'PATNO,SEX,HANDED\n3000,1,R\n3001,0,\n'
+    )
+    out = readers.pack_studydata(path=tmp_path, out=tmp_path / 'ppmi.h5')
+    assert out == tmp_path / 'ppmi.h5'
+    assert readers.list_packed(out) == {
+        'Code List': ['PAG_NAME', 'ITM_NAME', 'CODE', 'DECODE'],
+        'Demographics': ['PATNO', 'SEX', 'HANDED'],
+    }
+
+    pd.testing.assert_frame_equal(readers.read_packed(out, 'Code List'),
+                                  pd.read_csv(fname))
+    data = readers.read_packed(out, 'Demographics', columns=['HANDED'])
+    assert data['HANDED'].iloc[0] == 'R' and pd.isna(data['HANDED'].iloc[1])
+
+    with pytest.raises(ValueError):
+        readers.read_packed(out, 'Data Dictionary')
+    with pytest.raises(ValueError):
+        readers.read_packed(out, 'Demographics', columns=['AGE'])
+
+
+@pytest.mark.parametrize('cache', [True, False])
+def test_read_studydata_columns(tmp_path, cache):
+    """Test that we can read a subset of columns of study data."""
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text(CODE_LIST)
+    for _ in range(2):
+        data = readers.read_studydata('Code List', columns=['CODE', 'PAG_NAME'],
+                                      path=tmp_path, cache=cache)
+        assert list(data.columns) == ['CODE', 'PAG_NAME']
+        assert len(data) == 3
+    with pytest.raises(ValueError):
+        readers.read_studydata('Code List', columns=['PATNO'], path=tmp_path,
+                               cache=cache)
+
+
+@pytest.mark.parametrize('cache', [True, False])
+def test_query(tmp_path, cache):
+    """Test that we can query study data lazily."""
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text(CODE_LIST)
+    query = readers.query('Code List', path=tmp_path, cache=cache)
+
+    data = query.select('ITM_NAME', 'DECODE').where('CODE', '>=', 0).collect()
+    assert list(data.columns) == ['ITM_NAME', 'DECODE']
+    assert list(data['DECODE']) == ['Normal', 'Slight']
+
+    assert len(query.collect()) == 3
+    assert len(query.where('PAG_NAME', '==', 'MOCA').collect()) == 1
+    data = (query.where('PAG_NAME', 'in', ['NUPDRS3', 'MOCA'])
+                 .where('CODE', '!=', 1)
+                 .select('CODE')
+                 .collect())
+    assert list(data['CODE']) == [0]
+    # missing values never match, consistently with the Parquet filters
+    data = query.where('CODE', 'not in', [0]).select('PAG_NAME').collect()
+    assert list(data['PAG_NAME']) == ['NUPDRS3']
+
+    with pytest.raises(ValueError):
+        query.where('CODE', '~', 1)
+    with pytest.raises(ValueError):
+        query.select('PATNO').collect()
+
+
+@pytest.mark.parametrize('backend', ['pandas', 'polars'])
+@pytest.mark.parametrize('cache', [True, False])
+def test_query_coerce(tmp_path, cache, backend):
+    """Test that filter values are compared in the dtype of their column."""
+    if backend == 'polars':
+        pytest.importorskip('polars')
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text(CODE_LIST)
+    query = readers.query('Code List', path=tmp_path, cache=cache,
+                          backend=backend).select('DECODE')
+
+    def _collect(query):
+        data = query.collect()
+        return list(data['DECODE'] if backend == 'pandas'
+                    else data.collect()['DECODE'])
+
+    assert _collect(query.where('CODE', '==', '1')) == ['Slight']
+    assert _collect(query.where('CODE', 'in', ['0', 'x'])) == ['Normal']
+    assert _collect(query.where('CODE', '==', 'x')) == []
+    assert _collect(query.where('CODE', '!=', 'x')) == ['Normal', 'Slight']
+    assert len(_collect(query.where('PAG_NAME', '!=', 3))) == 3
+    with pytest.raises(ValueError):
+        query.where('CODE', '>', 'x').collect()
+
+
+def test_query_chunks(tmp_path, monkeypatch):
+    """Test that CSV files are read once and with consistent dtypes."""
+    fname = tmp_path / 'Demographics_01Jan2024.csv'
+    fname.write_text('PATNO,HANDED,SEX\n3000,1,1\n3001,2,0\n3002,Mixed,1\n'
+                     '3003,,\n')
+    expected = pd.read_csv(fname)
+    query = readers.query('Demographics', path=tmp_path, cache=False)
+
+    reads = []
+    read_csv = pd.read_csv
+
+    def _read_csv(*args, **kwargs):
+        reads.append(args)
+        return read_csv(*args, **kwargs)
+
+    with monkeypatch.context() as m:
+        m.setattr(pd, 'read_csv', _read_csv)
+        data = query._scan_csv(fname, None, chunksize=2)
+    assert len(reads) == 1
+    pd.testing.assert_frame_equal(data, expected)
+    data = query.where('HANDED', '==', '1').select('PATNO') \
+        ._scan_csv(fname, ['PATNO', 'HANDED'], chunksize=2)
+    assert list(data['PATNO']) == [3000]
+    data = query.where('SEX', '>', 0).select('PATNO', 'SEX') \
+        ._scan_csv(fname, ['PATNO', 'SEX'], chunksize=2)
+    assert list(data['PATNO']) == [3000, 3002]
+    assert data['SEX'].dtype == 'float64'
+
+
+@pytest.mark.parametrize('cache', [True, False])
+def test_polars_backend(tmp_path, cache):
+    """Test that we can scan study data lazily with polars."""
+    pl = pytest.importorskip('polars')
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text(CODE_LIST)
+    expected = readers.read_studydata('Code List', path=tmp_path, cache=cache)
+
+    frame = readers.read_studydata('Code List', path=tmp_path, cache=cache,
+                                   backend='polars')
+    assert isinstance(frame, pl.LazyFrame)
+    pd.testing.assert_frame_equal(frame.collect().to_pandas(), expected,
+                                  check_dtype=False)
+    frame = readers.read_studydata('Code List', columns=['DECODE'],
+                                   path=tmp_path, cache=cache,
+                                   backend='polars')
+    assert frame.collect_schema().names() == ['DECODE']
+
+    query = readers.query('Code List', path=tmp_path, cache=cache,
+                          backend='polars')
+    frame = query.select('ITM_NAME', 'DECODE').where('CODE', '>=', 0) \
+                 .collect()
+    assert isinstance(frame, pl.LazyFrame)
+    assert frame.collect()['DECODE'].to_list() == ['Normal', 'Slight']
+    frame = query.where('CODE', 'not in', [0]).select('PAG_NAME').collect()
+    assert frame.collect()['PAG_NAME'].to_list() == ['NUPDRS3']
+
+    with pytest.raises(ValueError):
+        query.where('PATNO', '==', 1).collect()
+    with pytest.raises(ValueError):
+        readers.read_studydata('Code List', columns=['PATNO'], path=tmp_path,
+                               backend='polars')
+    with pytest.raises(ValueError):
+        readers.read_studydata('Code List', path=tmp_path, backend='dask')
+    with pytest.raises(ValueError):
+        readers.query('Code List', path=tmp_path, backend='dask')
+
+
+def test_polars_schema(tmp_path):
+    """Test that polars scans CSV files with the Data Dictionary dtypes."""
+    pl = pytest.importorskip('polars')
+    (tmp_path / 'Data_Dictionary_-_Harmonized_01Jan2024.csv').write_text(
+        'MOD_NAME,ITM_NAME,DSCR,DATA_TYPE\n'
+        'SCREEN,PATNO,Participant number,INTEGER\n'
+        'SCREEN,SEX,Sex,NUMBER\n'
+        'SCREEN,HANDED,Handedness,CHAR\n'
+    )
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(
+        'PATNO,SEX,HANDED\n3000,1,1\n3001,0,2\n'
+    )
+    frame = readers.read_studydata('Demographics', path=tmp_path,
+                                   cache=False, backend='polars')
+    assert frame.collect_schema() == pl.Schema(
+        {'PATNO': pl.Int64, 'SEX': pl.Float64, 'HANDED': pl.String}
+    )
+    assert frame.collect()['HANDED'].to_list() == ['1', '2']
+
+
+def _add_member(archive, name, contents):
+    """Add file `name` with `contents` to tar `archive`."""
+    import io
+    import tarfile
+
+    info = tarfile.TarInfo(name)
+    info.size = len(contents)
+    archive.addfile(info, io.BytesIO(contents))
+
+
+def test_iter_freeze(tmp_path):
+    """Test that we can stream tables from data freeze archives."""
+    import gzip
+    import tarfile
+
+    fname = tmp_path / 'PPMI_20250101.gz'
+    demographics = 'PATNO,SEX,HANDED\n' + ''.join(
+        '{},{},1\n'.format(3000 + n, n % 2) for n in range(10)
+    )
+    with tarfile.open(fname, 'w:gz') as archive:
+        _add_member(archive, 'PPMI_20250101/README.txt', b'not a table')
+        _add_member(archive, 'PPMI_20250101/Code_List_01Jan2025.csv',
+                    CODE_LIST.encode())
+        _add_member(archive, 'PPMI_20250101/Demographics_01Jan2025.csv',
+                    demographics.encode())
+
+    chunks = list(readers.iter_freeze('2025Q1 Data Freeze', chunksize=4,
+                                      path=tmp_path))
+    assert [(table, len(chunk)) for table, chunk in chunks] == [
+        ('Code_List_01Jan2025', 3), ('Demographics_01Jan2025', 4),
+        ('Demographics_01Jan2025', 4), ('Demographics_01Jan2025', 2),
+    ]
+    pd.testing.assert_frame_equal(
+        pd.concat([chunk for _, chunk in chunks[1:]], ignore_index=True),
+        pd.read_csv(io.StringIO(demographics))
+    )
+
+    chunks = readers.iter_freeze(fname, tables=['Demo*'],
+                                 columns=['PATNO', 'SEX'], chunksize=4)
+    table, chunk = next(chunks)
+    assert table == 'Demographics_01Jan2025'
+    assert list(chunk.columns) == ['PATNO', 'SEX']
+    chunks.close()
+
+    # tables without any of the requested columns are skipped
+    chunks = list(readers.iter_freeze(fname, columns=['ITM_NAME']))
+    assert [table for table, _ in chunks] == ['Code_List_01Jan2025']
+
+    # a single compressed table is treated as an archive of one table
+    single = tmp_path / 'Code_List.csv.gz'
+    with gzip.open(single, 'wt') as dest:
+        dest.write(CODE_LIST)
+    chunks = list(readers.iter_freeze(single))
+    assert len(chunks) == 1 and chunks[0][0] == 'Code_List'
+
+    with pytest.raises(FileNotFoundError):
+        next(readers.iter_freeze('2024Q1 Data Freeze', path=tmp_path))
+
+
+def test_iter_freeze_schema(tmp_path):
+    """Test that tables of freezes are parsed with the Data Dictionary."""
+    import tarfile
+
+    (tmp_path / 'Data_Dictionary_-_Harmonized_01Jan2024.csv').write_text(
+        'MOD_NAME,ITM_NAME,DSCR,DATA_TYPE\n'
+        'SCREEN,PATNO,Participant number,INTEGER\n'
+        'SCREEN,SEX,Sex,INTEGER\n'
+        'SCREEN,HANDED,Handedness,CHAR\n'
+    )
+    demographics = 'PATNO,SEX,HANDED\n3000,1,1\n3001,,2\n3002,1.5,3\n'
+    fname = tmp_path / 'PPMI_20250101.gz'
+    with tarfile.open(fname, 'w:gz') as archive:
+        _add_member(archive, 'PPMI_20250101/Demographics_01Jan2025.csv',
+                    demographics.encode())
+
+    with pytest.warns(UserWarning, match='Data Dictionary'):
+        chunks = [chunk for _, chunk in readers.iter_freeze(
+            fname, chunksize=2, path=tmp_path
+        )]
+    # columns are typed in every chunk, unless they do not match their dtype
+    assert [chunk['PATNO'].dtype for chunk in chunks] == ['Int64', 'Int64']
+    assert [chunk['HANDED'].dtype for chunk in chunks] == ['string'] * 2
+    assert list(chunks[0]['HANDED']) == ['1', '2']
+    assert chunks[0]['SEX'].dtype == 'Int64'
+    assert chunks[1]['SEX'].dtype == 'float64'
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_load_all_studydata(tmp_path, n_jobs):
+    """Test that we can load all study data in parallel."""
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text(CODE_LIST)
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(
+        'PATNO,SEX,HANDED\n' + '3000,1,R\n' * 100
+    )
+    (tmp_path / 'Vital_Signs_01Jan2024.csv').write_text('PATNO,WGTKG\n')
+
+    data = readers.load_all_studydata(path=tmp_path, n_jobs=n_jobs)
+    assert list(data) == ['Code List', 'Demographics', 'Vital Signs']
+    for name, frame in data.items():
+        pd.testing.assert_frame_equal(
+            frame, readers.read_studydata(name, path=tmp_path)
+        )
+
+    data = readers.load_all_studydata(['Vital Signs'], path=tmp_path,
+                                      n_jobs=n_jobs)
+    assert list(data) == ['Vital Signs'] and len(data['Vital Signs']) == 0
+
+
+def test_get_participant(tmp_path, monkeypatch):
+    """Test that we can load all rows of a participant from the index."""
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text(CODE_LIST)
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(
+        'PATNO,SEX,NOTES\r\n'
+        '3000,1,"first\r\nline"\r\n'
+        '3001,0,\r\n'
+        '\r\n'
+        '3000,1,"with ""quotes"", commas"\r\n'
+        '3002,0,last'
+    )
+    (tmp_path / 'Vital_Signs_01Jan2024.csv').write_text(
+        'PATNO,EVENT_ID,SYSSUP\n'
+        + ''.join('{},V{:02d},{}\n'.format(3000 + n // 10, n % 10, 100 + n)
+                  for n in range(30))
+    )
+    readers.build_participant_index(path=tmp_path)
+
+    # only the indexed rows are read
+    def _read_studydata(*args, **kwargs):
+        raise AssertionError('tables should not be read in full')
+
+    with monkeypatch.context() as m:
+        m.setattr(readers, 'read_studydata', _read_studydata)
+        data = readers.get_participant(3000, path=tmp_path)
+        assert sorted(data) == ['Demographics', 'Vital Signs']
+        assert list(data['Demographics']['NOTES']) == [
+            'first\r\nline', 'with "quotes", commas'
+        ]
+        assert list(data['Vital Signs']['SYSSUP']) == list(range(100, 110))
+        data = readers.get_participant('3002', path=tmp_path)
+        assert list(data['Demographics']['NOTES']) == ['last']
+        assert list(data['Vital Signs']['EVENT_ID'])[-1] == 'V09'
+        assert readers.get_participant(4000, path=tmp_path) == {}
+        data = readers.get_participant(3001, datasets=['Vital Signs'],
+                                       path=tmp_path)
+        assert list(data) == ['Vital Signs']
+
+    # tables are re-indexed when they change
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(
+        'PATNO,SEX\n3003,1\n'
+    )
+    data = readers.get_participant(3003, path=tmp_path)
+    assert list(data) == ['Demographics']
+    assert data['Demographics']['SEX'].tolist() == [1]
+
+    with pytest.raises(FileNotFoundError):
+        readers.get_participant(3000, datasets=['Socio-Economics'],
+                                path=tmp_path)
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+"""Code for testing the `pypmi` package."""
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pypmi import manifest, readers, schema
+
+pytest.importorskip('pyarrow')
+
+DICTIONARY = ('MOD_NAME,ITM_NAME,DSCR,DATA_TYPE\n'
+              'SCREEN,PATNO,Participant number,INTEGER\n'
+              'SCREEN,SEX,Sex,NUMBER\n'
+              'SCREEN,HANDED,Handedness,CHAR\n'
+              'SOCIOECO,EDUCYRS,Years of education,NUMBER\n'
+              'SOCIOECO,NOTES,Notes,UNKNOWN\n'
+              'PRIMDXPD,PRIMDIAG,Primary diagnosis,INTEGER\n')
+CODE_LIST = ('PAG_NAME,ITM_NAME,CODE,DECODE\n'
+             'NUPDRS3,NP3SPCH,0,Normal\n'
+             'NUPDRS3,NP3SPCH,1,Slight\n'
+             'NUPDRS3,NP3SPCH,2,Mild\n'
+             'NUPDRS3,PN3RIGRL,UR,Unable to rate\n'
+             'NUPDRS3,PN3RIGRL,0,Normal\n'
+             'NUPDRS3,DYSKPRES,0,No\n'
+             'NUPDRS3,DYSKPRES,1,Yes\n'
+             'NUPDRS3,DYSKPRES,9,No\n'
+             'MOCA,MCATOT,,\n')
+DEMOGRAPHICS = ('PATNO,SEX,HANDED\n'
+                '3000,1,1\n'
+                '3001,,2\n')
+
+
+def test_compile_schema(tmp_path):
+    """Test that we can compile column dtypes from the Data Dictionary."""
+    with pytest.raises(FileNotFoundError):
+        schema.compile_schema(path=tmp_path)
+    assert schema.get_schema('Demographics', path=tmp_path) == {}
+
+    fname = tmp_path / 'Data_Dictionary_-_Harmonized_01Jan2024.csv'
+    fname.write_text(DICTIONARY)
+    manifest.rescan(path=tmp_path)
+    compiled = schema.compile_schema(path=tmp_path)
+    assert compiled == {
+        'screen': {'PATNO': 'Int64', 'SEX': 'float64', 'HANDED': 'string'},
+        'socioeco': {'EDUCYRS': 'float64'},
+        'primdxpd': {'PRIMDIAG': 'Int64'},
+    }
+    assert (tmp_path / '.pypmi' / 'schema.json').is_file()
+    # tables are looked up by dataset name or by form code
+    assert schema.get_schema('Socio-Economics', path=tmp_path) == {
+        'EDUCYRS': 'float64'
+    }
+    assert schema.get_schema('SOCIOECO', path=tmp_path) == {
+        'EDUCYRS': 'float64'
+    }
+    assert schema.get_schema('Code List', path=tmp_path) == {}
+    with pytest.raises(ValueError):
+        schema.get_schema('Not a dataset', path=tmp_path)
+
+    # form codes of other tables are read from the downloaded files
+    assert schema.get_schema('Primary Clinical Diagnosis',
+                             path=tmp_path) == {}
+    (tmp_path / 'Primary_Clinical_Diagnosis_01Jan2024.csv').write_text(
+        'REC_ID,PATNO,EVENT_ID,PAG_NAME,PRIMDIAG\n1,3000,SC,PRIMDXPD,1\n'
+    )
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text(CODE_LIST)
+    manifest.rescan(path=tmp_path)
+    assert schema.get_schema('Primary Clinical Diagnosis',
+                             path=tmp_path) == {'PRIMDIAG': 'Int64'}
+    assert schema.get_schema('Code List', path=tmp_path) == {}
+
+    # new releases of the dictionary are compiled again
+    fname.write_text(DICTIONARY.replace('HANDED,Handedness,CHAR',
+                                        'HANDED,Handedness,NUMBER'))
+    assert schema.get_schema('Demographics', path=tmp_path)['HANDED'] \
+        == 'float64'
+
+    fname.write_text('NAME,DESCRIPTION\nPATNO,Participant number\n')
+    with pytest.raises(ValueError):
+        schema.compile_schema(path=tmp_path)
+
+
+@pytest.mark.parametrize('cache', [True, False])
+def test_read_with_schema(tmp_path, cache):
+    """Test that study data are read with dtypes from the Data Dictionary."""
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(DEMOGRAPHICS)
+    data = readers.read_studydata('Demographics', path=tmp_path, cache=cache)
+    assert data['HANDED'].dtype == 'int64'
+
+    dictionary = tmp_path / 'Data_Dictionary_-_Harmonized_01Jan2024.csv'
+    dictionary.write_text(DICTIONARY)
+    manifest.rescan(path=tmp_path)
+    data = readers.read_studydata('Demographics', path=tmp_path, cache=cache)
+    assert data['PATNO'].dtype == 'Int64'
+    assert data['HANDED'].dtype == 'string'
+    assert list(data['HANDED']) == ['1', '2']
+    filtered = readers.query('Demographics', path=tmp_path, cache=cache) \
+        .where('HANDED', '==', '2').collect()
+    assert list(filtered['PATNO']) == [3001]
+
+    # data that no longer match the dictionary are read with inferred dtypes
+    dictionary.write_text(DICTIONARY.replace('HANDED,Handedness,CHAR',
+                                             'HANDED,Handedness,INTEGER'))
+    (tmp_path / 'Demographics_01Jan2024.csv').write_text(
+        DEMOGRAPHICS.replace('3001,,2', '3001,,Mixed')
+    )
+    with pytest.warns(UserWarning, match='do not match'):
+        data = readers.read_studydata('Demographics', path=tmp_path,
+                                      cache=cache)
+    assert list(data['HANDED']) == ['1', 'Mixed']
+
+    # the cache (if any) now holds the inferred dtypes, so it is not re-parsed
+    query = readers.query('Demographics', path=tmp_path, cache=cache) \
+        .where('HANDED', '==', 'Mixed')
+    if cache:
+        filtered = query.collect()
+    else:
+        with pytest.warns(UserWarning, match='do not match'):
+            filtered = query.collect()
+    assert list(filtered['PATNO']) == [3001]
+
+
+def test_decode(tmp_path):
+    """Test that we can decode coded answers with the Code List."""
+    data = pd.DataFrame({'PATNO': [3000, 3001, 3002],
+                         'NP3SPCH': [0, 2, np.nan],
+                         'PN3RIGRL': ['UR', '0', '3'],
+                         'DYSKPRES': [9, 1, 0]})
+    with pytest.raises(FileNotFoundError):
+        schema.decode(data, 'NUPDRS3', path=tmp_path)
+    (tmp_path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text(CODE_LIST)
+    manifest.rescan(path=tmp_path)
+
+    decoded = schema.decode(data, 'NUPDRS3', path=tmp_path)
+    assert list(decoded['PATNO']) == [3000, 3001, 3002]
+    assert list(decoded['NP3SPCH'].cat.categories) == ['Normal', 'Slight',
+                                                        'Mild']
+    assert decoded['NP3SPCH'].tolist()[:2] == ['Normal', 'Mild']
+    assert decoded['PN3RIGRL'].tolist()[:2] == ['Unable to rate', 'Normal']
+    assert decoded[['NP3SPCH', 'PN3RIGRL']].isna().sum().tolist() == [1, 1]
+    assert decoded['DYSKPRES'].tolist() == ['No', 'Yes', 'No']
+    assert list(decoded['DYSKPRES'].cat.categories) == ['No', 'Yes']
+    assert data['NP3SPCH'].dtype == 'float64'
+
+    # tables are looked up by dataset name or by form code
+    pd.testing.assert_frame_equal(
+        schema.decode(data, 'MDS-UPDRS Part III Treatment Determination and '
+                      'Part III: Motor Examination', path=tmp_path),
+        decoded
+    )
+    decoded = schema.decode(data, 'nupdrs3', columns=['NP3SPCH'],
+                            path=tmp_path)
+    assert decoded['PN3RIGRL'].tolist() == ['UR', '0', '3']
+    with pytest.raises(ValueError):
+        schema.decode(data, 'NUPDRS3', columns=['PATNO'], path=tmp_path)
+    with pytest.raises(ValueError):
+        schema.decode(data, 'Not a table', path=tmp_path)
+
+
+def _write_codes(path, n_items=20, n_codes=5):
+    """Write Code List of `n_items` items coded 0 to `n_codes` to `path`."""
+    codes = ['PAG_NAME,ITM_NAME,CODE,DECODE']
+    for item in range(n_items):
+        codes += ['TABLE,ITEM{},{},Label {}'.format(item, code, code)
+                  for code in range(n_codes)]
+    (path / 'Code_List_-_Harmonized_01Jan2024.csv').write_text(
+        '\n'.join(codes) + '\n'
+    )
+    rs = np.random.default_rng(1234)
+    return pd.DataFrame(rs.integers(0, n_codes, size=(100000, n_items)),
+                        columns=['ITEM{}'.format(n) for n in range(n_items)])
+
+
+def test_decode_large(tmp_path):
+    """Test that decoded tables are stored compactly as categoricals."""
+    data = _write_codes(tmp_path)
+    decoded = schema.decode(data, 'TABLE', path=tmp_path)
+    labels = {code: 'Label {}'.format(code) for code in range(5)}
+    expected = data.apply(lambda col: col.map(lambda x: labels[x]))
+
+    pd.testing.assert_frame_equal(decoded.astype(str), expected)
+    assert decoded.memory_usage(deep=True).sum() \
+        < expected.memory_usage(deep=True).sum() / 10
+
+
+@pytest.mark.benchmark
+def test_decode_benchmark(tmp_path):
+    """Benchmark decoding against mapping rows through dictionaries."""
+    data = _write_codes(tmp_path)
+    schema.decode(data.head(), 'TABLE', path=tmp_path)
+
+    start = time.perf_counter()
+    schema.decode(data, 'TABLE', path=tmp_path)
+    vectorized = time.perf_counter() - start
+    start = time.perf_counter()
+    labels = {code: 'Label {}'.format(code) for code in range(5)}
+    data.apply(lambda col: col.map(lambda x: labels[x]))
+    mapped = time.perf_counter() - start
+
+    assert vectorized * 5 < mapped
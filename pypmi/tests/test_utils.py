@@ -44,6 +44,30 @@ def test_get_data_dir():
     if ppmi_path is not None:
         os.environ['PPMI_PATH'] = ppmi_path
 
+def test_get_cache_dir(tmp_path):
+    """Test that we can retrieve the cache directory."""
+    assert utils._get_cache_dir(tmp_path) == tmp_path.resolve() / '.pypmi'
+
+
+def test_atomic_write(tmp_path):
+    """Test that files are written through unique temporary files."""
+    fname = tmp_path / 'sub' / 'index.json'
+    with utils._atomic_write(fname) as first, \
+            utils._atomic_write(fname) as second:
+        assert first != second and first.parent == fname.parent
+        first.write_text('first')
+        second.write_text('second')
+        assert not fname.exists()
+    assert fname.read_text() == 'first'
+
+    with pytest.raises(RuntimeError):
+        with utils._atomic_write(fname) as tmp:
+            tmp.write_text('failed')
+            raise RuntimeError
+    assert fname.read_text() == 'first'
+    assert [f.name for f in fname.parent.iterdir()] == ['index.json']
+
+
 def test_check_data_exist(datadir):
     """Test that we can check if data exists."""
     # confirm that we can check if data exists
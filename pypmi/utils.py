@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 """Common utility functions for the `pypmi` package."""
 
+import contextlib
 import os
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
 from pathlib import Path
 
+_RESCANNED = set()
+
 
 def _get_cred(user: str = None,
                         password: str = None) -> Tuple[str, str]:
@@ -75,7 +78,6 @@ def _get_data_dir(path: str = None) -> str:
     FileNotFoundError
     """
     # try and find directory in environmental variable "$PPMI_PATH"
-    print(path, os.environ['PPMI_PATH'])
     if path is None:
         try:
             path = Path(os.environ['PPMI_PATH']).resolve()
@@ -87,12 +89,100 @@ def _get_data_dir(path: str = None) -> str:
     return path
 
 
+def _get_cache_dir(path: str = None) -> Path:
+    """
+    Get directory where `pypmi` caches information about PPMI data at `path`.
+
+    The cache directory is a hidden sub-directory of the PPMI data directory;
+    it is not created by this function.
+
+    Parameters
+    ----------
+    path : str, optional
+        Filepath to directory containing PPMI data files. If not specified this
+        function will, in order, look (1) for an environmental variable
+        $PPMI_PATH and (2) in the current directory. Default: None
+
+    Returns
+    -------
+    cache : pathlib.Path
+        Filepath to cache directory
+    """
+    return _get_data_dir(path) / '.pypmi'
+
+
+@contextlib.contextmanager
+def _atomic_write(fname: Path) -> Iterator[Path]:
+    """
+    Yield unique temporary file that replaces `fname` once written.
+
+    The temporary file is created next to `fname`, so that concurrent writers
+    never share it and the final rename is atomic. It is removed if writing
+    fails.
+
+    Parameters
+    ----------
+    fname : pathlib.Path
+        Filepath to write
+
+    Yields
+    ------
+    tmp : pathlib.Path
+        Filepath to temporary file to write instead of `fname`
+    """
+    import tempfile
+
+    fname = Path(fname)
+    fname.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=fname.parent, prefix=fname.name + '.',
+                               suffix='.tmp')
+    os.close(fd)
+    try:
+        yield Path(tmp)
+        os.replace(tmp, fname)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(tmp)
+        raise
+
+
 def _check_data_exist(path, fname, datetoken=None):
-    # check data existence:
-    path = _get_data_dir(path)
+    """
+    Check whether data file `fname` has been downloaded to `path`.
+
+    Parameters
+    ----------
+    path : str
+        Filepath to directory containing PPMI data files. If not specified
+        will look for an environmental variable $PPMI_PATH and, if not set,
+        use the current directory.
+    fname : str
+        Catalog filename template (e.g., 'Code_List_{DATETOKEN}.csv')
+    datetoken : str, optional
+        Date token of the file (e.g., '01Jan2024'). If not specified any
+        downloaded version of `fname` is accepted. Default: None
+
+    Returns
+    -------
+    exists : bool
+        Whether the data file exists. Files copied into the data directory
+        outside of `pypmi` are only found by the first check of a process
+        that misses; use :py:func:`pypmi.manifest.rescan` to index them
+        afterwards.
+    """
+    from .manifest import _find_files, rescan
+
+    data_dir = _get_data_dir(path)
     if datetoken is not None:
-        fname = fname.format(DATETOKEN=datetoken)
-        return (path / fname).is_file()
-    else:
-        fname = fname.format(DATETOKEN="*")
-        return any(path.glob(fname))
\ No newline at end of file
+        return (data_dir / fname.format(DATETOKEN=datetoken)).is_file()
+    # look up any version in the index of downloaded files rather than
+    # globbing the (potentially very large) data directory
+    if _find_files(fname, path=path):
+        return True
+    # files copied into the data directory are not indexed until rescan(),
+    # which is done on the first miss of each process only
+    if data_dir in _RESCANNED:
+        return False
+    _RESCANNED.add(data_dir)
+    rescan(path, hash=False)
+    return len(_find_files(fname, path=path)) > 0